@@ -0,0 +1,102 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CHUNK_SIZE = 64 * 1024
+
+
+class FakePaperApi:
+    """本機替身：提供與 api.papermc.io 相同路徑的版本 / build JSON，以及合成的 jar
+
+    latency_ms 為每個請求回應前的延遲；bandwidth 為每條連線的下載速度上限
+    （bytes/s，None 表示不限速）。requests 記錄收到的請求數。
+    """
+
+    def __init__(self, versions=("1.21.4",), builds=5, jar_size=8 * 1024 * 1024, latency_ms=0, bandwidth=None,
+                 host="127.0.0.1", port=0):
+        self.versions = list(versions)
+        self.builds = list(range(1, builds + 1))
+        self.latency_ms = latency_ms
+        self.bandwidth = bandwidth
+        self.requests = 0
+        self._lock = threading.Lock()
+        # 每個版本的最新 build 共用同一個合成 jar，BungeeCord 另一個
+        self.jar = os.urandom(jar_size)
+        self.jar_sha256 = hashlib.sha256(self.jar).hexdigest()
+        self.bungee_jar = os.urandom(max(1, jar_size // 2))
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self.base_url = f"http://{host}:{self.server.server_address[1]}"
+        self.paper_api = f"{self.base_url}/v2/projects/paper"
+        self.bungee_url = f"{self.base_url}/bungee/BungeeCord.jar"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True, name="fake-paper-api").start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _route(self, path):
+        parts = [p for p in path.split("?")[0].strip("/").split("/") if p]
+        if parts == ["bungee", "BungeeCord.jar"]:
+            return self.bungee_jar
+        if parts[:3] != ["v2", "projects", "paper"]:
+            return None
+        parts = parts[3:]
+        if not parts:
+            return {"project_id": "paper", "versions": self.versions}
+        if len(parts) < 2 or parts[0] != "versions" or parts[1] not in self.versions:
+            return None
+        version = parts[1]
+        if len(parts) == 2:
+            return {"version": version, "builds": self.builds}
+        if len(parts) >= 4 and parts[2] == "builds" and parts[3].isdigit() and int(parts[3]) in self.builds:
+            name = f"paper-{version}-{parts[3]}.jar"
+            if len(parts) == 4:
+                return {"build": int(parts[3]), "downloads": {"application": {"name": name, "sha256": self.jar_sha256}}}
+            if parts[4:] == ["downloads", name]:
+                return self.jar
+        return None
+
+    def _handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                with api._lock:
+                    api.requests += 1
+                if api.latency_ms:
+                    time.sleep(api.latency_ms / 1000)
+                payload = api._route(self.path)
+                if payload is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                is_json = not isinstance(payload, bytes)
+                body = json.dumps(payload).encode("utf-8") if is_json else payload
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json" if is_json else "application/java-archive")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self._send(body)
+
+            def _send(self, body):
+                started = time.monotonic()
+                for offset in range(0, len(body), CHUNK_SIZE):
+                    self.wfile.write(body[offset:offset + CHUNK_SIZE])
+                    if api.bandwidth:
+                        # 依已送出的量計算應有的時間，模擬頻寬上限
+                        ahead = (offset + CHUNK_SIZE) / api.bandwidth - (time.monotonic() - started)
+                        if ahead > 0:
+                            time.sleep(ahead)
+
+        return Handler
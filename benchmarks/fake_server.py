@@ -0,0 +1,173 @@
+"""假的 Paper / BungeeCord 伺服器，用來取代 java 執行效能測試
+
+以 `java <JVM 參數> -jar paper.jar nogui` 的形式被啟動腳本呼叫（效能測試會在 PATH
+最前面放一個 java 替身）。會印出類似 Paper 的 console 輸出、監聽 server.properties
+或 config.yml 中的 port 並回應 Server List Ping，從標準輸入讀取指令：
+
+    stop / end      正常結束
+    tps / mspt      印出與 Paper 相同格式的結果
+    spam N          立即印出 N 行聊天訊息，最後印出 "spam done"
+
+FAKE_STARTUP_SECONDS 環境變數可調整啟動耗時（預設 0.2 秒）。
+"""
+import json
+import os
+import re
+import socket
+import struct
+import sys
+import threading
+import time
+
+STARTUP_SECONDS = float(os.environ.get("FAKE_STARTUP_SECONDS", "0.2"))
+
+
+def _stamp(level="INFO"):
+    return f"[{time.strftime('%H:%M:%S')} {level}]: "
+
+def emit(text, level="INFO"):
+    sys.stdout.write(_stamp(level) + text + "\n")
+    sys.stdout.flush()
+
+def _pack_varint(value):
+    value &= 0xFFFFFFFF
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        out.append(byte | 0x80 if value else byte)
+        if not value:
+            return bytes(out)
+
+def _packet(packet_id, payload=b""):
+    body = _pack_varint(packet_id) + payload
+    return _pack_varint(len(body)) + body
+
+def _recv_varint(conn):
+    result = 0
+    for shift in range(0, 35, 7):
+        data = conn.recv(1)
+        if not data:
+            raise ConnectionError
+        result |= (data[0] & 0x7F) << shift
+        if not data[0] & 0x80:
+            return result
+    raise ValueError("VarInt 過長")
+
+def _recv_packet(conn):
+    length = _recv_varint(conn)
+    data = bytearray()
+    while len(data) < length:
+        chunk = conn.recv(length - len(data))
+        if not chunk:
+            raise ConnectionError
+        data.extend(chunk)
+    return bytes(data)
+
+def _varint_from(data, pos):
+    result = 0
+    for shift in range(0, 35, 7):
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+    raise ValueError("VarInt 過長")
+
+
+def read_port(kind):
+    if kind == "bungee":
+        try:
+            with open("config.yml", "r", encoding="utf-8") as f:
+                match = re.search(r"host:\s*[\w.]+:(\d+)", f.read())
+            return int(match.group(1)) if match else 25577
+        except OSError:
+            return 25577
+    try:
+        with open("server.properties", "r", encoding="utf-8") as f:
+            match = re.search(r"^server-port=(\d+)", f.read(), re.MULTILINE)
+        return int(match.group(1)) if match else 25565
+    except OSError:
+        return 25565
+
+def handle_ping(conn, motd):
+    with conn:
+        conn.settimeout(5)
+        try:
+            handshake = _recv_packet(conn)
+            packet_id, pos = _varint_from(handshake, 0)
+            protocol, pos = _varint_from(handshake, pos)
+            address_len, pos = _varint_from(handshake, pos)
+            next_state, _ = _varint_from(handshake, pos + address_len + 2)
+            if packet_id != 0x00 or next_state != 1:
+                return
+            _recv_packet(conn)
+            status = json.dumps({"version": {"name": "Fake", "protocol": protocol},
+                                 "players": {"max": 20, "online": 0}, "description": {"text": motd}})
+            data = status.encode("utf-8")
+            conn.sendall(_packet(0x00, _pack_varint(len(data)) + data))
+            ping = _recv_packet(conn)
+            conn.sendall(_packet(0x01, ping[1:9]))
+        except (OSError, ConnectionError, ValueError, IndexError, struct.error):
+            pass
+
+def serve(sock, motd):
+    while True:
+        try:
+            conn, _ = sock.accept()
+        except OSError:
+            return
+        threading.Thread(target=handle_ping, args=(conn, motd), daemon=True).start()
+
+
+def main(argv):
+    jar = argv[argv.index("-jar") + 1] if "-jar" in argv else "paper.jar"
+    kind = "bungee" if "bungee" in jar.lower() else "paper"
+    started = time.monotonic()
+    port = read_port(kind)
+    if kind == "paper":
+        emit("Starting minecraft server version 1.21.4")
+        emit(f"Starting Minecraft server on 127.0.0.1:{port}")
+        emit('Preparing level "world"')
+    else:
+        emit("Enabled BungeeCord version git:BungeeCord-Bootstrap:fake")
+    time.sleep(STARTUP_SECONDS)
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    try:
+        sock.bind(("0.0.0.0" if kind == "bungee" else "127.0.0.1", port))
+    except OSError as e:
+        emit(f"**** FAILED TO BIND TO PORT! {e}", "ERROR")
+        return 1
+    sock.listen(64)
+    threading.Thread(target=serve, args=(sock, f"Fake {kind} {os.path.basename(os.getcwd())}"), daemon=True).start()
+    if kind == "paper":
+        emit(f'Done ({time.monotonic() - started:.3f}s)! For help, type "help"')
+    else:
+        emit(f"Listening on /0.0.0.0:{port}")
+
+    for line in sys.stdin:
+        command = line.strip()
+        if command in ("stop", "end"):
+            emit("Stopping server" if kind == "paper" else "Closing listener")
+            break
+        if command == "tps":
+            emit("TPS from last 1m, 5m, 15m: 20.0, 20.0, 20.0")
+        elif command == "mspt":
+            emit("Server tick times (avg/min/max) from last 5s, 10s, 1m:")
+            emit("◴ 1.2/0.8/3.4, 1.1/0.7/5.0, 1.3/0.7/9.1")
+        elif command.startswith("spam "):
+            count = int(command.split()[1])
+            prefix = _stamp()
+            lines = [f"{prefix}<Player{i % 50}> message number {i} with some chat text\n" for i in range(count)]
+            sys.stdout.write("".join(lines))
+            emit("spam done")
+        elif command:
+            emit("Unknown command. Type \"/help\" for help.")
+    sock.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,243 @@
+"""CraftControl 離線效能測試
+
+不連網、不需要 Java：Paper API 與 BungeeCord 下載由本機 FakePaperApi 提供，
+伺服器由 fake_server.py 扮演（在 PATH 最前面放一個 java 替身）。對每個 N
+依序量測：補齊 N 台 Paper + BungeeCord、start_all、一輪狀態輪詢、console
+輸出吞吐量、stop_all，結果以 JSON 輸出，方便跨版本比較。
+
+    python -m benchmarks.run --sizes 1,10,50,100 --output bench.json
+
+目前只支援 Linux / macOS（java 替身是 shell script）。
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _rss_bytes():
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except OSError:
+        import resource
+        # 沒有 /proc 時只能取得整個程序的最高值（macOS 單位為 bytes，Linux 為 KB）
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class PeakRss:
+    """量測區間內 CraftControl 本身（不含伺服器子程序）的 RSS 最高值"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.start = self.peak = 0
+        self._stop = threading.Event()
+
+    def __enter__(self):
+        self.start = self.peak = _rss_bytes()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, _rss_bytes())
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, _rss_bytes())
+
+
+def measure(results, benchmark, n, fn, **extra):
+    """執行 fn 並記錄耗時與 RSS；fn 回傳的 dict 會併入結果"""
+    with PeakRss() as rss:
+        started = time.perf_counter()
+        detail = fn() or {}
+        seconds = time.perf_counter() - started
+    row = {"benchmark": benchmark, "n": n, "seconds": round(seconds, 4),
+           "peak_rss_mb": round(rss.peak / (1024 * 1024), 1),
+           "rss_delta_mb": round((rss.peak - rss.start) / (1024 * 1024), 1)}
+    row.update(extra)
+    row.update(detail)
+    results.append(row)
+    print(f"{benchmark:<12} n={n:<4} {seconds:8.3f}s  peak RSS {row['peak_rss_mb']:.1f} MB  "
+          + " ".join(f"{k}={v}" for k, v in detail.items()), flush=True)
+    return row
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def _install_java_shim(bin_dir):
+    shim = os.path.join(bin_dir, "java")
+    with open(shim, "w", encoding="utf-8") as f:
+        f.write(f'#!/bin/sh\nexec "{sys.executable}" "{os.path.join(BENCH_DIR, "fake_server.py")}" "$@"\n')
+    os.chmod(shim, 0o755)
+
+
+def run(args, work_dir):
+    # 必須在 import gui 之前設定：各模組在 import 時決定快取與伺服器路徑
+    from benchmarks.fake_paper_api import FakePaperApi
+    api = FakePaperApi(jar_size=args.jar_size * 1024 * 1024, latency_ms=args.latency_ms,
+                       bandwidth=args.bandwidth * 1024 * 1024 if args.bandwidth else None).start()
+    base_dir = os.path.join(work_dir, "base")
+    bin_dir = os.path.join(work_dir, "bin")
+    os.makedirs(bin_dir)
+    _install_java_shim(bin_dir)
+    os.environ.update({
+        "CRAFTCONTROL_BASE_DIR": base_dir,
+        "CRAFTCONTROL_PAPER_API": api.paper_api,
+        "CRAFTCONTROL_BUNGEE_URL": api.bungee_url,
+        "FAKE_STARTUP_SECONDS": str(args.startup_seconds),
+        "PATH": bin_dir + os.pathsep + os.environ.get("PATH", ""),
+    })
+
+    from gui.artifact_store import STORE_DIR
+    from gui.config_manager import get_provision_workers, get_start_concurrency
+    from gui.controller import add_output_listener, send_command
+    from gui.engine import Engine, build_server_paths
+    from gui.log_pipeline import LogPipeline
+    from gui.server_properties import configure_fleet
+    from gui.status_poller import StatusPoller
+
+    sizes = sorted(args.sizes)
+    log_pipeline = LogPipeline(os.path.join(base_dir, "logs", "craftcontrol.log"))
+    engine = Engine(build_server_paths(max(sizes), base_dir), log_pipeline)
+    # 各伺服器收到 "spam done" 的事件，用來量測 console 輸出吞吐量
+    spam_done = {}
+    add_output_listener(lambda name, line: line.endswith("spam done") and name in spam_done
+                        and spam_done[name].set())
+
+    results = []
+    version = api.versions[0]
+    for n in sizes:
+        names = ["BungeeCord"] + [f"Paper {i}" for i in range(1, n + 1)]
+        paths = {name: engine.server_paths[name] for name in names}
+        papers = names[1:]
+        # 每個 N 都從空的伺服器資料夾與 jar 倉庫開始（metadata 快取保留，與實際使用相同）
+        shutil.rmtree(os.path.join(base_dir, "servers"), ignore_errors=True)
+        shutil.rmtree(STORE_DIR, ignore_errors=True)
+
+        requests_before = api.requests
+
+        def provision():
+            failures = engine.provision(version, names)
+            if failures:
+                raise RuntimeError(f"補齊失敗：{failures}")
+            return {"api_requests": api.requests - requests_before}
+
+        measure(results, "provision", n, provision, workers=get_provision_workers())
+        configure_fleet(paths, args.base_port, args.base_port - 1, "127.0.0.1", False)
+
+        def start_all():
+            failures = engine.start_all(names)
+            if failures:
+                raise RuntimeError(f"啟動失敗：{failures}")
+
+        measure(results, "start_all", n, start_all, concurrency=get_start_concurrency(),
+                startup_seconds=args.startup_seconds)
+        try:
+            targets = {name: port for name, port in engine.status_targets().items() if name in paths}
+            poller = StatusPoller(lambda: targets, timeout=args.poll_timeout)
+
+            def status_poll():
+                rounds = []
+                for _ in range(args.poll_rounds):
+                    t0 = time.perf_counter()
+                    polled = poller.poll_once()
+                    rounds.append(time.perf_counter() - t0)
+                online = sum(1 for r in polled.values() if r["online"])
+                return {"median_round_s": round(statistics.median(rounds), 4),
+                        "max_round_s": round(max(rounds), 4), "online": online}
+
+            measure(results, "status_poll", n, status_poll, rounds=args.poll_rounds)
+
+            def log_throughput():
+                for name in papers:
+                    spam_done[name] = threading.Event()
+                for name in papers:
+                    send_command(name, f"spam {args.log_lines}")
+                for name in papers:
+                    if not spam_done[name].wait(120):
+                        raise RuntimeError(f"{name} 未在時限內輸出完畢")
+                spam_done.clear()
+
+            row = measure(results, "log_lines", n, log_throughput, lines_per_server=args.log_lines)
+            row["lines_per_second"] = round(args.log_lines * n / row["seconds"])
+        finally:
+            measure(results, "stop_all", n, lambda: {"failures": len(engine.stop_all(names))})
+
+    engine.shutdown()
+    log_pipeline.close()
+    api.stop()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="benchmarks.run", description="CraftControl 離線效能測試")
+    parser.add_argument("--sizes", default="1,10,50,100",
+                        type=lambda text: [int(n) for n in text.split(",") if n.strip()],
+                        help="要量測的 Paper 數量，以逗號分隔")
+    parser.add_argument("--jar-size", type=int, default=8, help="合成 jar 大小（MB）")
+    parser.add_argument("--latency-ms", type=float, default=0, help="假 API 每個請求的延遲")
+    parser.add_argument("--bandwidth", type=float, default=0, help="假 API 下載速度上限（MB/s，0 為不限）")
+    parser.add_argument("--startup-seconds", type=float, default=0.2, help="假伺服器啟動耗時")
+    parser.add_argument("--poll-rounds", type=int, default=5)
+    parser.add_argument("--poll-timeout", type=float, default=1.0)
+    parser.add_argument("--log-lines", type=int, default=20000, help="每台伺服器輸出的行數")
+    parser.add_argument("--base-port", type=int, default=41000, help="假伺服器的起始 port，避免與實際伺服器衝突")
+    parser.add_argument("--output", help="結果 JSON 的路徑（預設只印出）")
+    parser.add_argument("--keep", action="store_true", help="保留暫存的伺服器資料夾")
+    args = parser.parse_args(argv)
+    if os.name == "nt":
+        print("效能測試目前只支援 Linux / macOS", file=sys.stderr)
+        return 2
+
+    work_dir = tempfile.mkdtemp(prefix="craftcontrol-bench-")
+    started = time.time()
+    try:
+        results = run(args, work_dir)
+    finally:
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "timestamp": started,
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "params": {k: v for k, v in vars(args).items() if k not in ("output", "keep")},
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"結果已寫入 {args.output}")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,272 @@
+import argparse
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+
+from gui.api_client import ApiClient, ApiError
+from gui.api_server import DEFAULT_API_HOST, DEFAULT_API_PORT, create_api_server
+from gui.config_manager import (get_api_port, get_api_token, get_base_dir, get_node_token, get_paper_count,
+                                 set_paper_count)
+from gui.engine import Engine, build_server_paths, discover_paper_count
+from gui.log_pipeline import LogPipeline
+from gui.node_agent import DEFAULT_NODE_PORT, NodeAgent
+
+
+def run_daemon(args):
+    paper_count = args.paper_count or get_paper_count()
+    if paper_count is None:
+        print("未設定 Paper 數量，請加上 --paper-count", file=sys.stderr)
+        return 2
+    if args.paper_count:
+        set_paper_count(args.paper_count)
+
+    log_pipeline = LogPipeline(os.path.join(get_base_dir(), "logs", "craftcontrol.log"), echo=True)
+    engine = Engine(build_server_paths(paper_count), log_pipeline)
+    engine.ensure_server_dirs()
+    engine.configure_network()
+    engine.check_server_files()
+    engine.start_polling()
+    if args.version:
+        threading.Thread(target=engine.provision, args=(args.version,), daemon=True).start()
+
+    server = create_api_server(engine, args.host, args.port, get_api_token())
+    engine.log(f"CraftControl daemon 已啟動：http://{args.host}:{args.port}")
+
+    def shutdown(signum, frame):
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if args.stop_on_exit:
+            engine.stop_all()
+        engine.shutdown()
+        log_pipeline.close()
+    return 0
+
+def run_node(args):
+    """在這台主機上執行 node agent，由其他主機的 daemon 透過 nodes 設定控制"""
+    token = args.token or get_node_token()
+    if not token:
+        print("未設定 node_token，請在 config.json 設定或加上 --token", file=sys.stderr)
+        return 2
+    # 不寫入 config.json：同一台主機上可以用 CRAFTCONTROL_BASE_DIR 執行多個 agent
+    paper_count = max(args.paper_count or 0, discover_paper_count())
+    log_pipeline = LogPipeline(os.path.join(get_base_dir(), "logs", "craftcontrol.log"), echo=True)
+    engine = Engine(build_server_paths(paper_count), log_pipeline)
+    if args.base_port:
+        engine.backend_base_port, engine.proxy_port = args.base_port, args.base_port - 1
+    engine.ensure_server_dirs()
+    engine.configure_network()
+    engine.check_server_files()
+    engine.start_polling()
+
+    agent = NodeAgent(engine, args.name or socket.gethostname(), args.listen, args.node_port, token)
+    agent.start()
+    engine.log(f"CraftControl node agent「{agent.name}」已啟動：{args.listen}:{agent.port}（{paper_count} 台 Paper）")
+
+    stopped = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopped.set())
+    try:
+        stopped.wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        agent.shutdown()
+        if args.stop_on_exit:
+            engine.stop_all()
+        engine.shutdown()
+        log_pipeline.close()
+    return 0
+
+def _print_fleet(fleet):
+    for node, info in fleet["nodes"].items():
+        if info["online"]:
+            print(f"[{node}] {info['host']}:{info['port']}  {info['servers']} 台  "
+                  f"剩餘 {info['free_mb']} MB / 共 {info['total_mb']} MB")
+        else:
+            print(f"[{node}] {info['host']}:{info['port']}  ❌ 無法連線：{info.get('error')}")
+    _print_status(fleet["servers"])
+
+def _print_status(status):
+    # 多主機的名稱為 <node>/<name>，欄寬依最長的名稱調整
+    width = max([14] + [len(name) for name in status])
+    for name, s in status.items():
+        if s.get("sleeping"):
+            state = "休眠中"
+        elif s["online"]:
+            state = f"運行中 {s['players']}/{s['max_players']}"
+        elif s["running"]:
+            state = "啟動中"
+        else:
+            state = "未啟動"
+        tps = f" tps={s['tps'][0]:.1f}" if s.get("tps") else ""
+        print(f"{name:<{width}} {state:<12} port={s['port']} pid={s['pid']} restarts={s.get('restarts', 0)}{tps}")
+
+def _print_performance(name, result):
+    metrics = result["metrics"]
+    if metrics is None:
+        print(f"{name:<14} 尚無資料")
+        return
+    startup = f"{metrics['startup_seconds']:.1f}s" if metrics["startup_seconds"] is not None else "-"
+    tps = "/".join(f"{v:.1f}" for v in metrics["tps"]) if metrics["tps"] else "-"
+    mspt = f"{metrics['mspt'][0]:.1f}" if metrics["mspt"] else "-"
+    print(f"{name:<14} 啟動 {startup:<8} TPS {tps:<16} MSPT {mspt:<6} lag {metrics['lag_spikes']} 次"
+          f"（落後 {metrics['ticks_behind']} ticks） GC 暫停 {metrics['gc_pauses']} 次（最長 {metrics['gc_pause_max_ms']:.0f}ms）")
+    for event in result["events"]:
+        when = time.strftime("%m-%d %H:%M:%S", time.localtime(event["time"]))
+        print(f"    {when} {event['type']:<8} {event['value']} {event['detail']}")
+
+def run_client(args):
+    client = ApiClient(args.host, args.port, get_api_token())
+    try:
+        if args.command == "status":
+            _print_status(client.status())
+        elif args.command in ("start", "stop"):
+            if args.all or not args.names:
+                action = client.start_all if args.command == "start" else client.stop_all
+                print(action()["message"])
+            else:
+                action = client.start if args.command == "start" else client.stop
+                for name in args.names:
+                    print(action(name)["message"])
+        elif args.command == "cmd":
+            print(client.send_command(args.name, " ".join(args.text))["message"])
+        elif args.command == "console":
+            print("\n".join(client.console(args.name, args.lines)))
+        elif args.command == "upgrade":
+            print(client.upgrade(args.version, args.names or None, args.batch_size)["message"])
+        elif args.command == "broadcast":
+            results = client.broadcast(" ".join(args.text), args.names, args.via, args.timeout)
+            for name, result in results.items():
+                mark = "✅" if result["ok"] else "❌"
+                print(f"{mark} {name} [{result['via']}]")
+                for line in result["response"].splitlines():
+                    print(f"    {line}")
+        elif args.command == "fleet":
+            if args.action == "status":
+                _print_fleet(client.fleet())
+            elif args.action == "place":
+                if not args.args:
+                    print("請指定 Paper 版本", file=sys.stderr)
+                    return 2
+                print(f"已新增 {client.fleet_place(args.args[0])['name']}")
+            else:
+                for full_name in args.args:
+                    print(client.fleet_action(full_name, args.action)["message"])
+        elif args.command == "perf":
+            for name in args.names or list(client.status()):
+                _print_performance(name, client.performance(name, args.events))
+        elif args.command == "logs":
+            matches = client.search_logs(args.pattern, args.servers, args.since, args.until, args.level, args.limit)
+            for match in matches:
+                when = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(match["time"])) if match["time"] else "-"
+                print(f"{when} {match['server']:<12} {match['line']}")
+            print(f"共 {len(matches)} 筆")
+        elif args.command == "backup":
+            print(client.backup(args.names or None)["message"])
+        elif args.command == "backups":
+            for snapshot in client.list_backups(args.name):
+                print(snapshot)
+        elif args.command == "restore":
+            print(client.restore(args.name, args.snapshot)["message"])
+        elif args.command == "prune":
+            result = client.prune_backups()
+            print(f"已清除 {result['removed']} 份備份，釋放 {result['freed_bytes'] / (1024 * 1024):.1f} MB")
+        elif args.command == "memory":
+            result = client.apply_memory_plan(args.force) if args.apply else client.memory_plan()
+            for name, heap_mb in result["plan"].items():
+                print(f"{name:<14} {heap_mb} MB")
+            for warning in result["warnings"]:
+                print(f"⚠️ {warning}")
+        elif args.command == "provision":
+            print(client.provision(args.version, args.names or None)["message"])
+    except (ApiError, OSError) as e:
+        print(f"錯誤：{e}", file=sys.stderr)
+        return 1
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="craftctl", description="CraftControl headless daemon 與命令列工具")
+    parser.add_argument("--host", default=DEFAULT_API_HOST)
+    parser.add_argument("--port", type=int, default=get_api_port() or DEFAULT_API_PORT)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    daemon = sub.add_parser("daemon", help="以 headless 模式執行並提供本機控制 API")
+    daemon.add_argument("--paper-count", type=int)
+    daemon.add_argument("--version", help="啟動後自動補齊此 Paper 版本的缺失檔案")
+    daemon.add_argument("--stop-on-exit", action="store_true", help="daemon 結束時停止所有伺服器")
+
+    node = sub.add_parser("node", help="在這台主機執行 node agent，讓其他主機的 daemon 控制本機伺服器")
+    node.add_argument("--name", help="node 名稱（預設為主機名稱）")
+    node.add_argument("--listen", default="0.0.0.0")
+    node.add_argument("--node-port", type=int, default=DEFAULT_NODE_PORT)
+    node.add_argument("--token", help="驗證 token（預設為 config.json 的 node_token）")
+    node.add_argument("--paper-count", type=int, help="至少建立的 Paper 數量")
+    node.add_argument("--base-port", type=int, help="後端起始 port（BungeeCord 使用前一個 port），同一台主機執行多個 agent 時使用")
+    node.add_argument("--stop-on-exit", action="store_true", help="agent 結束時停止所有伺服器")
+
+    sub.add_parser("status", help="顯示所有伺服器狀態")
+    fleet = sub.add_parser("fleet", help="多主機：status 顯示所有 node、place VERSION 新增一台、start / stop <node>/<name>")
+    fleet.add_argument("action", nargs="?", choices=("status", "place", "start", "stop"), default="status")
+    fleet.add_argument("args", nargs="*")
+    for name in ("start", "stop"):
+        p = sub.add_parser(name, help=f"{name} 指定伺服器，未指定則全部")
+        p.add_argument("names", nargs="*")
+        p.add_argument("--all", action="store_true")
+    cmd = sub.add_parser("cmd", help="傳送 console 指令")
+    cmd.add_argument("name")
+    cmd.add_argument("text", nargs="+")
+    console = sub.add_parser("console", help="顯示最近的 console 輸出")
+    console.add_argument("name")
+    console.add_argument("--lines", type=int, default=50)
+    upgrade = sub.add_parser("upgrade", help="滾動更新 Paper 到指定版本的最新 build，BungeeCord 不中斷")
+    upgrade.add_argument("version")
+    upgrade.add_argument("names", nargs="*")
+    upgrade.add_argument("--batch-size", type=int, help="每批同時重新啟動的台數")
+    broadcast = sub.add_parser("broadcast", help="同時送出 console 指令到多台伺服器並顯示回應")
+    broadcast.add_argument("text", nargs="+")
+    broadcast.add_argument("--names", nargs="+", help="只送給這些伺服器（預設全部）")
+    broadcast.add_argument("--via", choices=("auto", "rcon", "stdin"), default="auto")
+    broadcast.add_argument("--timeout", type=float, default=3.0)
+    perf = sub.add_parser("perf", help="顯示從 console 解析的啟動時間、TPS / MSPT、lag 與 GC 暫停")
+    perf.add_argument("names", nargs="*")
+    perf.add_argument("--events", type=int, default=10, help="每台顯示的最近事件數")
+    logs = sub.add_parser("logs", help="以 regex 搜尋所有伺服器的日誌（含封存的 .log.gz）")
+    logs.add_argument("pattern")
+    logs.add_argument("--servers", nargs="+", help="只搜尋這些伺服器（預設全部）")
+    logs.add_argument("--level", nargs="+", choices=("TRACE", "DEBUG", "INFO", "WARN", "ERROR", "FATAL"), type=str.upper)
+    logs.add_argument("--since", help="起始時間：ISO 格式或相對時間（30m、2h、7d）")
+    logs.add_argument("--until", help="結束時間，格式同 --since")
+    logs.add_argument("--limit", type=int, default=200, help="最多顯示最新的幾筆")
+    backup = sub.add_parser("backup", help="增量備份世界（不指定名稱則備份全部）")
+    backup.add_argument("names", nargs="*")
+    backups = sub.add_parser("backups", help="列出伺服器的備份")
+    backups.add_argument("name")
+    restore = sub.add_parser("restore", help="以備份取代世界（伺服器需先停止）")
+    restore.add_argument("name")
+    restore.add_argument("snapshot")
+    sub.add_parser("prune", help="依保留設定清除舊備份")
+    memory = sub.add_parser("memory", help="依主機記憶體計算每台伺服器的 heap 分配")
+    memory.add_argument("--apply", action="store_true", help="套用計畫並重寫啟動腳本")
+    memory.add_argument("--force", action="store_true", help="即使超過實體記憶體也套用")
+    provision = sub.add_parser("provision", help="補齊缺失的 jar 與啟動腳本")
+    provision.add_argument("version")
+    provision.add_argument("names", nargs="*")
+
+    args = parser.parse_args(argv)
+    if args.command == "daemon":
+        return run_daemon(args)
+    if args.command == "node":
+        return run_node(args)
+    return run_client(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
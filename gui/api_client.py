@@ -0,0 +1,104 @@
+import json
+from urllib.error import HTTPError
+from urllib.parse import quote, urlencode
+from urllib.request import Request, urlopen
+
+from gui.api_server import DEFAULT_API_HOST, DEFAULT_API_PORT
+
+
+class ApiError(Exception):
+    pass
+
+
+class ApiClient:
+    """CraftControl daemon 的 HTTP/JSON 用戶端"""
+
+    def __init__(self, host=DEFAULT_API_HOST, port=DEFAULT_API_PORT, token=None, timeout=30):
+        self.base_url = f"http://{host}:{port}"
+        self.token = token
+        self.timeout = timeout
+
+    def _request(self, method, path, payload=None):
+        data = json.dumps(payload).encode("utf-8") if payload is not None else None
+        req = Request(self.base_url + path, data=data, method=method)
+        req.add_header("Content-Type", "application/json")
+        if self.token:
+            req.add_header("Authorization", f"Bearer {self.token}")
+        try:
+            with urlopen(req, timeout=self.timeout) as r:
+                return json.loads(r.read().decode("utf-8"))
+        except HTTPError as e:
+            try:
+                message = json.loads(e.read().decode("utf-8")).get("error") or e.reason
+            except ValueError:
+                message = e.reason
+            raise ApiError(f"HTTP {e.code}：{message}") from e
+
+    def status(self, name=None):
+        if name is None:
+            return self._request("GET", "/servers")
+        return self._request("GET", f"/servers/{quote(name)}")
+
+    def console(self, name, lines=100):
+        return self._request("GET", f"/servers/{quote(name)}/console?lines={lines}")["lines"]
+
+    def performance(self, name, events=50):
+        return self._request("GET", f"/servers/{quote(name)}/perf?events={events}")
+
+    def start(self, name):
+        return self._request("POST", f"/servers/{quote(name)}/start", {})
+
+    def stop(self, name):
+        return self._request("POST", f"/servers/{quote(name)}/stop", {})
+
+    def send_command(self, name, command):
+        return self._request("POST", f"/servers/{quote(name)}/command", {"command": command})
+
+    def broadcast(self, command, names=None, via="auto", timeout=3.0):
+        return self._request("POST", "/broadcast", {"command": command, "names": names, "via": via,
+                                                    "timeout": timeout})
+
+    def search_logs(self, pattern, names=None, since=None, until=None, levels=None, limit=200):
+        params = [("q", pattern), ("limit", limit)] + [("server", name) for name in names or ()]
+        params += [("level", level) for level in levels or ()]
+        params += [(key, value) for key, value in (("since", since), ("until", until)) if value]
+        return self._request("GET", f"/logs/search?{urlencode(params)}")["matches"]
+
+    def fleet(self):
+        return self._request("GET", "/fleet")
+
+    def fleet_place(self, version):
+        return self._request("POST", "/fleet/place", {"version": version})
+
+    def fleet_action(self, full_name, action, command=None):
+        return self._request("POST", f"/fleet/servers/{quote(full_name)}/{action}", {"command": command})
+
+    def start_all(self, names=None):
+        return self._request("POST", "/start-all", {"names": names})
+
+    def stop_all(self, names=None):
+        return self._request("POST", "/stop-all", {"names": names})
+
+    def provision(self, version, names=None):
+        return self._request("POST", "/provision", {"version": version, "names": names})
+
+    def upgrade(self, version, names=None, batch_size=None):
+        return self._request("POST", "/upgrade", {"version": version, "names": names, "batch_size": batch_size})
+
+    def backup(self, names=None):
+        return self._request("POST", "/backup", {"names": names})
+
+    def list_backups(self, name):
+        return self._request("GET", f"/servers/{quote(name)}/backups")["snapshots"]
+
+    def restore(self, name, snapshot):
+        return self._request("POST", f"/servers/{quote(name)}/restore", {"snapshot": snapshot})
+
+    def prune_backups(self):
+        return self._request("POST", "/backups/prune", {})
+
+    def memory_plan(self):
+        return self._request("GET", "/memory/plan")
+
+    def apply_memory_plan(self, force=False):
+        return self._request("POST", "/memory/apply", {"force": force})
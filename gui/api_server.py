@@ -0,0 +1,209 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+from gui.log_index import parse_time
+from gui.node_agent import NodeError
+
+DEFAULT_API_HOST = "127.0.0.1"
+DEFAULT_API_PORT = 8765
+
+# 會花較久時間的操作改在背景執行，API 立即回傳 202
+_BACKGROUND_ACTIONS = {"start-all", "stop-all", "provision", "backup", "upgrade"}
+# 瀏覽器送出的 Origin 只接受本機網頁，避免任意網站對 daemon 發出請求
+_LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1"}
+
+
+def _is_local_origin(origin):
+    if not origin:
+        return True
+    return urlparse(origin).hostname in _LOCAL_HOSTS
+
+
+def _log_failure(engine, action, task):
+    # 背景操作沒有人等待回應，失敗時至少要寫進日誌
+    try:
+        task()
+    except Exception as e:
+        engine.log(f"❌ {action} 失敗：{e}")
+
+
+def _make_handler(engine, token):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _reply(self, status, payload):
+            if isinstance(payload, str):
+                body, content_type = payload.encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8"
+            else:
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                content_type = "application/json; charset=utf-8"
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _authorized(self):
+            if not token:
+                return True
+            return self.headers.get("Authorization") == f"Bearer {token}"
+
+        def _body(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            if not length:
+                return {}
+            return json.loads(self.rfile.read(length).decode("utf-8"))
+
+        def _route(self, method):
+            if not _is_local_origin(self.headers.get("Origin")):
+                return 403, {"error": "不接受來自其他網站的請求"}
+            # 表單與 no-cors fetch 無法送出 application/json，不必等 CORS 預檢就能擋下
+            if method == "POST" and not (self.headers.get("Content-Type") or "").startswith("application/json"):
+                return 415, {"error": "POST 需為 Content-Type: application/json"}
+            if not self._authorized():
+                return 401, {"error": "未授權"}
+            url = urlparse(self.path)
+            parts = [unquote(p) for p in url.path.strip("/").split("/") if p]
+            query = parse_qs(url.query)
+
+            if method == "GET" and parts == ["servers"]:
+                return 200, engine.status()
+            if method == "GET" and parts == ["metrics"]:
+                return 200, engine.telemetry.export_prometheus() + engine.console_metrics.export_prometheus()
+            if method == "GET" and parts == ["memory", "plan"]:
+                plan, warnings = engine.plan_memory()
+                return 200, dict(engine.memory_summary(), plan=plan, warnings=warnings)
+            if method == "POST" and parts == ["memory", "apply"]:
+                plan, _ = engine.plan_memory()
+                success, warnings = engine.apply_memory_plan(plan, force=bool(self._body().get("force")))
+                return (200 if success else 409), {"ok": success, "plan": plan, "warnings": warnings}
+            if method == "GET" and parts == ["logs", "search"]:
+                pattern = query.get("q", [""])[0]
+                if not pattern:
+                    return 400, {"error": "缺少 q"}
+                matches = engine.search_logs(pattern, query.get("server"), parse_time(query.get("since", [""])[0]),
+                                             parse_time(query.get("until", [""])[0]), query.get("level"),
+                                             int(query.get("limit", ["200"])[0]))
+                return 200, {"pattern": pattern, "matches": matches}
+            if parts[:1] == ["fleet"]:
+                return self._route_fleet(method, parts[1:])
+            if parts[:1] == ["servers"] and len(parts) >= 2:
+                name = parts[1]
+                if name not in engine.server_paths:
+                    return 404, {"error": f"找不到伺服器：{name}"}
+                action = parts[2] if len(parts) > 2 else None
+                if method == "GET" and action is None:
+                    return 200, engine.server_status(name)
+                if method == "GET" and action == "console":
+                    lines = int(query.get("lines", ["100"])[0])
+                    return 200, {"name": name, "lines": engine.console(name, lines)}
+                if method == "GET" and action == "backups":
+                    return 200, {"name": name, "snapshots": engine.list_backups(name)}
+                if method == "POST" and action == "restore":
+                    snapshot = self._body().get("snapshot")
+                    if snapshot not in engine.list_backups(name):
+                        return 404, {"error": f"找不到備份：{snapshot}"}
+                    try:
+                        engine.restore(name, snapshot)
+                    except RuntimeError as e:
+                        return 409, {"ok": False, "message": str(e)}
+                    return 200, {"ok": True, "message": f"{name} 已還原至 {snapshot}"}
+                if method == "GET" and action == "perf":
+                    if query.get("format", [""])[0] == "csv":
+                        return 200, engine.console_metrics.export_events_csv([name])
+                    return 200, dict(engine.performance(name, int(query.get("events", ["50"])[0])), name=name)
+                if method == "GET" and action == "health":
+                    return 200, dict(engine.health(name), name=name)
+                if method == "GET" and action == "telemetry":
+                    if query.get("format", [""])[0] == "csv":
+                        return 200, engine.telemetry.export_csv([name])
+                    window = int(query.get("window", ["60"])[0])
+                    return 200, {"name": name, "current": engine.telemetry.current(name),
+                                 "stats": engine.telemetry.stats(name, window)}
+                if method == "POST" and action == "start":
+                    success, msg = engine.start(name)
+                    return (200 if success else 409), {"ok": success, "message": msg}
+                if method == "POST" and action == "stop":
+                    success, msg = engine.stop(name)
+                    return (200 if success else 409), {"ok": success, "message": msg}
+                if method == "POST" and action == "command":
+                    success, msg = engine.send_command(name, self._body().get("command", ""))
+                    return (200 if success else 409), {"ok": success, "message": msg}
+            if method == "POST" and parts == ["broadcast"]:
+                body = self._body()
+                if not body.get("command"):
+                    return 400, {"error": "缺少 command"}
+                return 200, engine.broadcast(body["command"], body.get("names"), body.get("via", "auto"),
+                                             float(body.get("timeout", 3.0)))
+            if method == "POST" and parts == ["backups", "prune"]:
+                removed, freed = engine.prune_backups()
+                return 200, {"ok": True, "removed": removed, "freed_bytes": freed}
+            if method == "POST" and len(parts) == 1 and parts[0] in _BACKGROUND_ACTIONS:
+                body = self._body()
+                names = body.get("names")
+                if parts[0] == "start-all":
+                    task = lambda: engine.start_all(names)
+                elif parts[0] == "stop-all":
+                    task = lambda: engine.stop_all(names)
+                elif parts[0] == "backup":
+                    task = lambda: engine.backup(names)
+                else:
+                    version = body.get("version")
+                    if not version:
+                        return 400, {"error": "缺少 version"}
+                    if parts[0] == "upgrade":
+                        task = lambda: engine.upgrade(version, names, body.get("batch_size"))
+                    else:
+                        task = lambda: engine.provision(version, names)
+                threading.Thread(target=_log_failure, args=(engine, parts[0], task), daemon=True).start()
+                return 202, {"ok": True, "message": f"{parts[0]} 已開始"}
+            return 404, {"error": "未知的路徑"}
+
+        def _route_fleet(self, method, parts):
+            fleet = engine.fleet
+            if fleet is None:
+                return 404, {"error": "未設定 nodes"}
+            if method == "GET" and not parts:
+                return 200, {"nodes": fleet.nodes(), "servers": fleet.status()}
+            if method == "POST" and parts == ["place"]:
+                version = self._body().get("version")
+                if not version:
+                    return 400, {"error": "缺少 version"}
+                return 200, {"ok": True, "name": fleet.place(version)}
+            # /fleet/servers/<node>/<name>/<action>
+            if method == "POST" and len(parts) == 4 and parts[0] == "servers":
+                full_name, action = f"{parts[1]}/{parts[2]}", parts[3]
+                if action in ("start", "stop"):
+                    success, msg = fleet.call(full_name, action)
+                elif action == "command":
+                    success, msg = fleet.call(full_name, "command", command=self._body().get("command", ""))
+                else:
+                    return 404, {"error": f"未知的操作：{action}"}
+                return (200 if success else 409), {"ok": success, "message": msg}
+            return 404, {"error": "未知的路徑"}
+
+        def _handle(self, method):
+            try:
+                status, payload = self._route(method)
+            except (KeyError, ValueError) as e:
+                status, payload = 400, {"error": str(e)}
+            except NodeError as e:
+                status, payload = 502, {"error": str(e)}
+            except Exception as e:
+                status, payload = 500, {"error": str(e)}
+            self._reply(status, payload)
+
+        def do_GET(self):
+            self._handle("GET")
+
+        def do_POST(self):
+            self._handle("POST")
+
+    return Handler
+
+def create_api_server(engine, host=DEFAULT_API_HOST, port=DEFAULT_API_PORT, token=None):
+    """建立本機 HTTP/JSON 控制 API；預設只監聽 127.0.0.1"""
+    return ThreadingHTTPServer((host, port), _make_handler(engine, token))
@@ -0,0 +1,69 @@
+import hashlib
+import os
+import shutil
+import threading
+
+from gui.config_manager import get_base_dir
+from gui.downloader import download_file
+
+# 以 SHA-256 為鍵的本機 jar 倉庫：同一個 build 只下載一次，再連結到每個伺服器資料夾
+STORE_DIR = os.path.join(get_base_dir(), "cache", "artifacts")
+
+# Linux FICLONE ioctl，用於支援 reflink 的檔案系統 (btrfs / xfs)
+FICLONE = 0x40049409
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def _lock_for(sha256):
+    with _locks_guard:
+        return _locks.setdefault(sha256, threading.Lock())
+
+def artifact_path(sha256):
+    sha256 = sha256.lower()
+    return os.path.join(STORE_DIR, sha256[:2], sha256 + ".jar")
+
+def has_artifact(sha256):
+    return os.path.exists(artifact_path(sha256))
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def fetch_artifact(url, sha256, progress=None):
+    """確保倉庫中有此 sha256 的檔案，必要時下載並驗證，回傳倉庫路徑"""
+    path = artifact_path(sha256)
+    with _lock_for(sha256):
+        if os.path.exists(path):
+            return path
+        # 串流下載並即時驗證 sha256，失敗時不會留下半成品
+        download_file(url, path, sha256=sha256, progress=progress)
+        return path
+
+def _reflink(src, dst):
+    import fcntl
+    with open(src, "rb") as fs, open(dst, "wb") as fd:
+        fcntl.ioctl(fd.fileno(), FICLONE, fs.fileno())
+
+def materialize(sha256, dest):
+    """將倉庫中的檔案放到 dest：優先 hardlink，其次 reflink，最後複製"""
+    src = artifact_path(sha256)
+    tmp_dest = dest + ".tmp"
+    if os.path.exists(tmp_dest):
+        os.remove(tmp_dest)
+    try:
+        os.link(src, tmp_dest)
+        method = "hardlink"
+    except OSError:
+        try:
+            _reflink(src, tmp_dest)
+            method = "reflink"
+        except (OSError, ImportError):
+            shutil.copyfile(src, tmp_dest)
+            method = "copy"
+    os.replace(tmp_dest, dest)
+    return method
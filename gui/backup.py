@@ -0,0 +1,322 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from gui.config_manager import get_base_dir
+from gui.server_properties import read_properties
+
+BACKUP_DIR = os.path.join(get_base_dir(), "backups")
+OBJECTS_DIR = os.path.join(BACKUP_DIR, "objects")
+
+# 以 256 KiB（64 個 region sector）切塊：只改了幾個 chunk 的 .mca 只會多存幾塊
+BLOCK_SIZE = 256 * 1024
+COMPRESS_LEVEL = 6
+# 備份期間不複製的檔案
+SKIP_FILES = {"session.lock"}
+# save-all flush 完成時 console 出現的字樣
+SAVE_DONE_MARKERS = ("Saved the game", "Saved the world")
+
+
+def object_path(sha256):
+    return os.path.join(OBJECTS_DIR, sha256[:2], sha256)
+
+def _store_block(data):
+    """把一個區塊存進物件倉庫（已存在就略過），回傳 (sha256, 新寫入的位元組數)"""
+    # hashlib 與 zlib 處理大區塊時會釋放 GIL，執行緒池即可平行使用多核心
+    sha256 = hashlib.sha256(data).hexdigest()
+    path = object_path(sha256)
+    if os.path.exists(path):
+        return sha256, 0
+    compressed = zlib.compress(data, COMPRESS_LEVEL)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(compressed)
+    os.replace(tmp_path, path)
+    return sha256, len(compressed)
+
+def _store_file(path):
+    """切塊存入倉庫，回傳 (區塊 sha256 清單, 新寫入的位元組數)"""
+    blocks, written = [], 0
+    with open(path, "rb") as f:
+        for data in iter(lambda: f.read(BLOCK_SIZE), b""):
+            sha256, n = _store_block(data)
+            blocks.append(sha256)
+            written += n
+    return blocks, written
+
+def world_dirs(folder):
+    """伺服器的世界資料夾：level-name 以及 _nether / _the_end"""
+    level = read_properties(os.path.join(folder, "server.properties")).get("level-name", "world")
+    return [d for d in (level, f"{level}_nether", f"{level}_the_end") if os.path.isdir(os.path.join(folder, d))]
+
+def _walk(folder, dirs):
+    for top in dirs:
+        for root, _, files in os.walk(os.path.join(folder, top)):
+            for file in files:
+                if file not in SKIP_FILES:
+                    path = os.path.join(root, file)
+                    yield os.path.relpath(path, folder).replace(os.sep, "/"), path
+
+
+class BackupManager:
+    """增量、去重複的世界備份
+
+    每次備份產生一份 manifest（相對路徑 → 大小、mtime、區塊清單）。大小與
+    mtime 都沒變的檔案直接沿用上一份 manifest 的區塊，不讀取也不複製；有變的
+    檔案切塊後只把倉庫中還沒有的區塊壓縮寫入。所有伺服器共用同一個執行緒池，
+    io_workers 即為同時讀寫的檔案數上限，避免備份拖慢伺服器 TPS；同時也是同時
+    進行備份的伺服器數上限，排隊中的伺服器在輪到之前不會送出 save-off。
+    """
+
+    def __init__(self, send_command, is_running, log=print, io_workers=2, save_timeout=120):
+        self.send_command = send_command
+        self.is_running = is_running
+        self.log = log
+        self.io_workers = io_workers
+        self.save_timeout = save_timeout
+        self._saved = {}
+        self._saved_lock = threading.Lock()
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max(1, io_workers))
+        # 選擇快照 id 與寫入 manifest 必須一起完成，避免同時備份同一台時互相覆蓋
+        self._manifest_lock = threading.Lock()
+        # 清除舊區塊時不能有備份正在寫入尚未被 manifest 引用的區塊
+        self._state = threading.Condition()
+        self._active = 0
+        self._pruning = False
+
+    def on_output(self, server_name, line):
+        # 由 console 讀取執行緒呼叫，通知等待 save-all flush 的備份
+        if any(marker in line for marker in SAVE_DONE_MARKERS):
+            with self._saved_lock:
+                event = self._saved.get(server_name)
+            if event is not None:
+                event.set()
+
+    def _executor(self):
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=max(1, self.io_workers), thread_name_prefix="backup")
+            return self._pool
+
+    def _server_dir(self, server_id):
+        return os.path.join(BACKUP_DIR, server_id)
+
+    def list_snapshots(self, server_id):
+        """由舊到新的快照 id（時間戳）"""
+        folder = self._server_dir(server_id)
+        if not os.path.isdir(folder):
+            return []
+        return sorted(f[:-5] for f in os.listdir(folder) if f.endswith(".json"))
+
+    def load_manifest(self, server_id, snapshot):
+        with open(os.path.join(self._server_dir(server_id), snapshot + ".json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _flush_saves(self, name):
+        """save-off 後 save-all flush，等待寫入完成；伺服器未執行時回傳 False"""
+        if not self.is_running(name):
+            return False
+        event = threading.Event()
+        with self._saved_lock:
+            self._saved[name] = event
+        try:
+            self.send_command(name, "save-off")
+            self.send_command(name, "save-all flush")
+            if not event.wait(self.save_timeout):
+                self.log(f"⚠️ {name} 未在 {self.save_timeout} 秒內完成存檔，仍繼續備份")
+        finally:
+            with self._saved_lock:
+                self._saved.pop(name, None)
+        return True
+
+    def backup(self, name, folder):
+        """備份一台伺服器，回傳快照 id"""
+        with self._state:
+            while self._pruning:
+                self._state.wait()
+            self._active += 1
+        try:
+            return self._backup(name, folder)
+        finally:
+            with self._state:
+                self._active -= 1
+                self._state.notify_all()
+
+    def _backup(self, name, folder):
+        server_id = os.path.basename(folder)
+        dirs = world_dirs(folder)
+        if not dirs:
+            raise FileNotFoundError(f"{name} 沒有世界資料夾")
+
+        previous = {}
+        snapshots = self.list_snapshots(server_id)
+        if snapshots:
+            previous = self.load_manifest(server_id, snapshots[-1])["files"]
+
+        started = time.monotonic()
+        # 先取得 I/O 名額再 save-off：save-off → flush → 複製 → save-on 都在名額內完成
+        with self._slots:
+            files, pending, written = self._copy_world(name, folder, dirs, previous)
+
+        manifest = {
+            "server": name,
+            "created": time.time(),
+            "dirs": dirs,
+            "files": files,
+            "changed_files": len(pending),
+            "written_bytes": written,
+        }
+        snapshot = self._write_manifest(server_id, manifest)
+        self.log(f"✅ {name} 備份完成：{snapshot}（{len(pending)}/{len(files)} 個檔案有變動，"
+                 f"新增 {written / (1024 * 1024):.1f} MB，{time.monotonic() - started:.1f}s）")
+        return snapshot
+
+    def _copy_world(self, name, folder, dirs, previous):
+        saves_paused = self._flush_saves(name)
+        try:
+            files, pending = {}, {}
+            for rel, path in _walk(folder, dirs):
+                st = os.stat(path)
+                old = previous.get(rel)
+                if old and old["size"] == st.st_size and old["mtime_ns"] == st.st_mtime_ns:
+                    files[rel] = old
+                    continue
+                files[rel] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+                pending[rel] = self._executor().submit(_store_file, path)
+            written = 0
+            for rel, future in pending.items():
+                files[rel]["blocks"], n = future.result()
+                written += n
+        finally:
+            if saves_paused:
+                self.send_command(name, "save-on")
+        return files, pending, written
+
+    def _write_manifest(self, server_id, manifest):
+        """以毫秒時間戳為快照 id 寫入 manifest（同一毫秒內再加序號），回傳 id"""
+        folder = self._server_dir(server_id)
+        os.makedirs(folder, exist_ok=True)
+        now = manifest["created"]
+        base = time.strftime("%Y%m%d-%H%M%S", time.localtime(now)) + f"-{int(now % 1 * 1000):03d}"
+        with self._manifest_lock:
+            snapshot, n = base, 1
+            while os.path.exists(os.path.join(folder, snapshot + ".json")):
+                snapshot, n = f"{base}-{n}", n + 1
+            path = os.path.join(folder, snapshot + ".json")
+            # manifest 最後才寫入：中途失敗的備份不會留下不完整的快照
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(manifest, f)
+            os.replace(path + ".tmp", path)
+        return snapshot
+
+    def backup_all(self, servers):
+        """同時備份 {name: folder}，回傳 {name: 錯誤訊息}"""
+        failures = {}
+
+        def one(name, folder):
+            try:
+                self.backup(name, folder)
+            except Exception as e:
+                failures[name] = str(e)
+                self.log(f"❌ {name} 備份失敗：{e}")
+
+        threads = [threading.Thread(target=one, args=item, daemon=True, name=f"backup-{item[0]}")
+                   for item in servers.items()]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return failures
+
+    def restore(self, name, folder, snapshot):
+        """以快照取代世界資料夾；原本的資料夾改名為 <名稱>.pre-restore 保留一份"""
+        if self.is_running(name):
+            raise RuntimeError(f"{name} 正在運行，請先停止再還原")
+        server_id = os.path.basename(folder)
+        manifest = self.load_manifest(server_id, snapshot)
+        staging = os.path.join(folder, ".restore-tmp")
+        if os.path.exists(staging):
+            shutil.rmtree(staging)
+
+        def write(rel, entry):
+            dest = os.path.join(staging, *rel.split("/"))
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            with open(dest, "wb") as f:
+                for sha256 in entry["blocks"]:
+                    with open(object_path(sha256), "rb") as obj:
+                        f.write(zlib.decompress(obj.read()))
+            os.utime(dest, ns=(entry["mtime_ns"], entry["mtime_ns"]))
+
+        futures = [self._executor().submit(write, rel, entry) for rel, entry in manifest["files"].items()]
+        for future in futures:
+            future.result()
+
+        for top in manifest["dirs"]:
+            live = os.path.join(folder, top)
+            if os.path.exists(live):
+                old = live + ".pre-restore"
+                if os.path.exists(old):
+                    shutil.rmtree(old)
+                os.replace(live, old)
+            restored = os.path.join(staging, top)
+            if os.path.exists(restored):
+                os.replace(restored, live)
+        shutil.rmtree(staging, ignore_errors=True)
+        self.log(f"✅ {name} 已還原至 {snapshot}（原世界保留為 *.pre-restore）")
+
+    def prune(self, keep_last=10, keep_days=7):
+        """保留每台伺服器最新 keep_last 份，以及 keep_days 天內每天最後一份；再清除沒有被引用的區塊"""
+        with self._state:
+            while self._active or self._pruning:
+                self._state.wait()
+            self._pruning = True
+        try:
+            return self._prune(keep_last, keep_days)
+        finally:
+            with self._state:
+                self._pruning = False
+                self._state.notify_all()
+
+    def _prune(self, keep_last, keep_days):
+        removed = 0
+        cutoff = time.strftime("%Y%m%d", time.localtime(time.time() - keep_days * 86400))
+        if not os.path.isdir(BACKUP_DIR):
+            return 0, 0
+        server_ids = [d for d in os.listdir(BACKUP_DIR)
+                      if d != "objects" and os.path.isdir(os.path.join(BACKUP_DIR, d))]
+        referenced = set()
+        for server_id in server_ids:
+            snapshots = self.list_snapshots(server_id)
+            keep = set(snapshots[-keep_last:]) if keep_last else set()
+            daily = {}
+            for snapshot in snapshots:
+                day = snapshot[:8]
+                if day >= cutoff:
+                    daily[day] = snapshot
+            keep.update(daily.values())
+            for snapshot in snapshots:
+                if snapshot in keep:
+                    for entry in self.load_manifest(server_id, snapshot)["files"].values():
+                        referenced.update(entry["blocks"])
+                else:
+                    os.remove(os.path.join(self._server_dir(server_id), snapshot + ".json"))
+                    removed += 1
+
+        freed = 0
+        if os.path.isdir(OBJECTS_DIR):
+            for prefix in os.listdir(OBJECTS_DIR):
+                for sha256 in os.listdir(os.path.join(OBJECTS_DIR, prefix)):
+                    if sha256 not in referenced:
+                        path = os.path.join(OBJECTS_DIR, prefix, sha256)
+                        freed += os.path.getsize(path)
+                        os.remove(path)
+        self.log(f"已清除 {removed} 份舊備份，釋放 {freed / (1024 * 1024):.1f} MB")
+        return removed, freed
@@ -1,5 +1,6 @@
 import json
 import os
+import secrets
 import sys
 
 if getattr(sys, 'frozen', False):
@@ -8,6 +9,8 @@ else:
     base_dir = os.path.dirname(os.path.abspath(__file__))
 
 CONFIG_PATH = os.path.join(base_dir, "config.json")
+# 設定時取代 config.json 的 base_dir（效能測試用來隔離伺服器與快取）
+BASE_DIR_ENV = "CRAFTCONTROL_BASE_DIR"
 
 def load_config():
     if not os.path.exists(CONFIG_PATH):
@@ -27,3 +30,124 @@ def set_paper_count(n):
     config = load_config()
     config["paper_count"] = n
     save_config(config)
+
+def get_provision_workers():
+    config = load_config()
+    return config.get("provision_workers", 4)
+
+def get_start_concurrency():
+    # 同時暖機的伺服器數量上限
+    config = load_config()
+    return config.get("start_concurrency", 2)
+
+def get_telemetry_interval():
+    # 程序資源取樣間隔（秒）
+    config = load_config()
+    return config.get("telemetry_interval", 1.0)
+
+def get_memory_weights():
+    # {伺服器名稱: 權重}，未列出的 Paper 為 4、BungeeCord 為 1
+    config = load_config()
+    return config.get("memory_weights", {})
+
+def get_memory_headroom_mb():
+    # 保留給系統的記憶體（MB），未設定時為實體記憶體的 15%（至少 1GB）
+    config = load_config()
+    return config.get("memory_headroom_mb", None)
+
+def get_backend_base_port():
+    # 第一台 Paper 的 port，之後依序遞增（略過 proxy_port）
+    config = load_config()
+    return config.get("backend_base_port", 25566)
+
+def get_proxy_port():
+    config = load_config()
+    return config.get("proxy_port", 25577)
+
+def get_backend_host():
+    # 後端 Paper 監聽的位址，預設只接受本機 BungeeCord 連線
+    config = load_config()
+    return config.get("backend_host", "127.0.0.1")
+
+def get_online_mode():
+    # BungeeCord 是否進行正版驗證
+    config = load_config()
+    return config.get("online_mode", True)
+
+def get_auto_restart():
+    # 伺服器當機或卡死時是否自動重新啟動
+    config = load_config()
+    return config.get("auto_restart", True)
+
+def get_hang_timeout():
+    # 沒有 console 輸出也沒有回應 ping 多久（秒）視為卡死
+    config = load_config()
+    return config.get("hang_timeout", 120)
+
+def get_console_metrics_interval():
+    # 定期對 Paper 送出 tps / mspt 的間隔（秒），0 表示不查詢
+    config = load_config()
+    return config.get("console_metrics_interval", 60)
+
+def get_upgrade_batch_size():
+    # 滾動更新時同時重新啟動的後端數量
+    config = load_config()
+    return config.get("upgrade_batch_size", 1)
+
+def get_rcon_password():
+    # 設定後會為每台 Paper 開啟 RCON，廣播指令時優先使用
+    config = load_config()
+    return config.get("rcon_password", None)
+
+def get_elastic_settings():
+    # 閒置休眠設定；enabled 為 False 時伺服器不會被自動停止
+    config = load_config()
+    settings = {
+        "enabled": False,
+        "idle_minutes": 15,
+        "min_running": 1,
+        "max_running": None,
+        "always_on": [],
+        "wake_timeout": 120,
+    }
+    settings.update(config.get("elastic", {}))
+    return settings
+
+def get_backup_settings():
+    # io_workers：所有伺服器備份時共用的同時讀寫檔案數上限
+    config = load_config()
+    settings = {"io_workers": 2, "keep_last": 10, "keep_days": 7}
+    settings.update(config.get("backup", {}))
+    return settings
+
+def get_api_port():
+    config = load_config()
+    return config.get("api_port", None)
+
+def get_api_token():
+    # daemon API 需帶 Authorization: Bearer <token>；未設定時第一次使用會自動產生並寫入
+    # config.json（同一台主機上的 craftctl 會讀到同一個 token），設為 "" 可關閉驗證
+    config = load_config()
+    token = config.get("api_token")
+    if token is None:
+        token = secrets.token_urlsafe(24)
+        config["api_token"] = token
+        save_config(config)
+    return token
+
+def get_nodes():
+    # 多主機：[{"name": "host-a", "host": "10.0.0.2", "port": 8766}, ...]
+    config = load_config()
+    return config.get("nodes", [])
+
+def get_node_token():
+    # node agent 與控制端共用的驗證 token
+    config = load_config()
+    return config.get("node_token", None)
+
+def get_base_dir():
+    # 伺服器與快取所在的根目錄，預設為執行檔所在資料夾
+    if os.environ.get(BASE_DIR_ENV):
+        return os.environ[BASE_DIR_ENV]
+    config = load_config()
+    return config.get("base_dir") or os.path.dirname(sys.executable)
@@ -0,0 +1,214 @@
+import os
+import queue
+import socket
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from gui.server_properties import read_properties
+
+# RCON 封包類型（Source RCON 協定，Minecraft 沿用）
+RCON_AUTH = 3
+RCON_EXEC = 2
+RCON_RESPONSE = 0
+# 同一台伺服器最多保留的 RCON 連線數
+RCON_POOL_SIZE = 2
+# 透過 stdin 送出指令後，console 安靜多久視為回應結束（秒）
+STDIN_SETTLE = 0.3
+# 同時進行的 RCON 呼叫上限
+MAX_CONCURRENT_RCON = 64
+
+
+class RconError(Exception):
+    pass
+
+
+class RconClient:
+    """單一 RCON 連線；同一條連線上的指令依序執行"""
+
+    def __init__(self, host, port, password, timeout=5.0):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._next_id = 0
+        if self._request(RCON_AUTH, password)[0] == -1:
+            self.close()
+            raise RconError("RCON 密碼錯誤")
+
+    def _recv_exact(self, n):
+        data = bytearray()
+        while len(data) < n:
+            chunk = self.sock.recv(n - len(data))
+            if not chunk:
+                raise ConnectionError("RCON 連線已中斷")
+            data.extend(chunk)
+        return bytes(data)
+
+    def _request(self, packet_type, body):
+        self._next_id += 1
+        payload = struct.pack("<ii", self._next_id, packet_type) + body.encode("utf-8") + b"\x00\x00"
+        self.sock.sendall(struct.pack("<i", len(payload)) + payload)
+        while True:
+            length = struct.unpack("<i", self._recv_exact(4))[0]
+            data = self._recv_exact(length)
+            request_id, response_type = struct.unpack("<ii", data[:8])
+            # 驗證時伺服器可能先回一個空的 RESPONSE_VALUE，略過它
+            if packet_type == RCON_AUTH and response_type == RCON_RESPONSE:
+                continue
+            return request_id, data[8:-2].decode("utf-8", errors="replace")
+
+    def command(self, command):
+        return self._request(RCON_EXEC, command)[1]
+
+    def close(self):
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class RconPool:
+    """每台伺服器保留少量常駐 RCON 連線，避免每個指令都重新連線與驗證"""
+
+    def __init__(self, size=RCON_POOL_SIZE, timeout=5.0):
+        self.size = size
+        self.timeout = timeout
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def _queue(self, key):
+        with self._lock:
+            return self._idle.setdefault(key, queue.LifoQueue(self.size))
+
+    def command(self, host, port, password, command):
+        key = (host, port, password)
+        idle = self._queue(key)
+        for attempt in range(2):
+            try:
+                client = idle.get_nowait()
+            except queue.Empty:
+                client = RconClient(host, port, password, self.timeout)
+            try:
+                response = client.command(command)
+            except (OSError, ConnectionError, struct.error):
+                # 常駐連線可能因伺服器重啟而失效，換一條新連線重試一次
+                client.close()
+                if attempt:
+                    raise
+                continue
+            try:
+                idle.put_nowait(client)
+            except queue.Full:
+                client.close()
+            return response
+
+    def close(self):
+        with self._lock:
+            queues, self._idle = list(self._idle.values()), {}
+        for idle in queues:
+            while not idle.empty():
+                idle.get_nowait().close()
+
+
+def rcon_settings(folder):
+    """從 server.properties 讀出 (port, password)；未啟用 RCON 時回傳 None"""
+    props = read_properties(os.path.join(folder, "server.properties"))
+    if props.get("enable-rcon") != "true" or not props.get("rcon.password"):
+        return None
+    try:
+        return int(props.get("rcon.port", 25575)), props["rcon.password"]
+    except ValueError:
+        return None
+
+
+class _Collector:
+    def __init__(self, names):
+        self.lines = {name: [] for name in names}
+        self.last_line = {}
+
+
+class ConsoleHub:
+    """同時對多台伺服器送出指令並收集回應
+
+    via="rcon" 走常駐的 RCON 連線，回應與指令一一對應；via="stdin" 寫入受管理
+    程序的標準輸入，回應為之後 console 安靜下來前的輸出；via="auto" 有設定 RCON
+    的伺服器優先使用 RCON。所有伺服器同時送出，總耗時約為最慢的一次往返。
+    """
+
+    def __init__(self, server_folders, send_stdin, host="127.0.0.1"):
+        self.server_folders = server_folders
+        self.send_stdin = send_stdin
+        self.host = host
+        self.pool = RconPool()
+        self._executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_RCON, thread_name_prefix="rcon")
+        self._collectors = set()
+        self._lock = threading.Lock()
+
+    def on_output(self, server_name, line):
+        # 由 console 讀取執行緒呼叫，把輸出分給正在等待回應的廣播
+        with self._lock:
+            collectors = list(self._collectors)
+        now = time.monotonic()
+        for collector in collectors:
+            if server_name in collector.lines:
+                collector.lines[server_name].append(line)
+                collector.last_line[server_name] = now
+
+    def _rcon(self, name, settings, command):
+        port, password = settings
+        try:
+            return {"ok": True, "via": "rcon", "response": self.pool.command(self.host, port, password, command)}
+        except (OSError, ConnectionError, RconError, struct.error) as e:
+            return {"ok": False, "via": "rcon", "response": f"RCON 失敗：{e}"}
+
+    def broadcast(self, names, command, via="auto", timeout=3.0):
+        """回傳 {name: {"ok", "via", "response"}}"""
+        results, rcon_futures, stdin_names = {}, {}, []
+        for name in names:
+            settings = rcon_settings(self.server_folders[name]) if via in ("auto", "rcon") else None
+            if settings is not None:
+                rcon_futures[name] = self._executor.submit(self._rcon, name, settings, command)
+            elif via == "rcon":
+                results[name] = {"ok": False, "via": "rcon", "response": "未啟用 RCON"}
+            else:
+                stdin_names.append(name)
+
+        if stdin_names:
+            results.update(self._broadcast_stdin(stdin_names, command, timeout))
+        for name, future in rcon_futures.items():
+            try:
+                results[name] = future.result(timeout)
+            except Exception as e:
+                results[name] = {"ok": False, "via": "rcon", "response": f"逾時或錯誤：{e}"}
+        return results
+
+    def _broadcast_stdin(self, names, command, timeout):
+        collector = _Collector(names)
+        with self._lock:
+            self._collectors.add(collector)
+        results = {}
+        try:
+            # 先全部寫入（寫 pipe 不會等待伺服器），再一起等待回應
+            for name in names:
+                ok, msg = self.send_stdin(name, command)
+                if not ok:
+                    results[name] = {"ok": False, "via": "stdin", "response": msg}
+            waiting = [name for name in names if name not in results]
+            deadline = time.monotonic() + timeout
+            while waiting and time.monotonic() < deadline:
+                time.sleep(0.05)
+                now = time.monotonic()
+                waiting = [name for name in waiting
+                           if now - collector.last_line.get(name, now) < STDIN_SETTLE
+                           or name not in collector.last_line]
+        finally:
+            with self._lock:
+                self._collectors.discard(collector)
+        for name in names:
+            if name not in results:
+                results[name] = {"ok": True, "via": "stdin", "response": "\n".join(collector.lines[name])}
+        return results
+
+    def close(self):
+        self.pool.close()
+        self._executor.shutdown(wait=False)
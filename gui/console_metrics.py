@@ -0,0 +1,244 @@
+import re
+import threading
+import time
+from collections import deque
+
+# 保留的事件數量（所有伺服器合計）
+MAX_EVENTS = 500
+# 定期送出的查詢指令（Paper 才有 mspt）
+POLL_COMMANDS = ("tps", "mspt")
+
+_LAG = re.compile(r"Running (\d+)ms or (\d+) ticks behind")
+_DONE = re.compile(r"Done \((\d+(?:\.\d+)?)s\)!")
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+# Minecraft 顏色碼（§a、§7…）與 ANSI 色碼本身含數字，取數值前必須先移除
+_FORMATTING = re.compile(r"§.|\x1b\[[0-9;]*[A-Za-z]")
+_STALL = re.compile(r"has not responded for (\d+) seconds")
+# -Xlog:gc 的輸出：... GC(12) Pause Young (Normal) (G1 Evacuation Pause) 100M->50M(1024M) 12.345ms
+_GC_PAUSE = re.compile(r"GC\(\d+\) (Pause [A-Za-z ]+?)(?: \(.*\))? \S+->\S+ (\d+(?:\.\d+)?)ms")
+
+EVENT_FIELDS = ("time", "server", "type", "value", "detail")
+
+
+class _ServerMetrics:
+    __slots__ = ("startup_seconds", "lag_spikes", "ticks_behind", "ms_behind", "last_lag", "stalls",
+                 "gc_pauses", "gc_pause_ms", "gc_pause_max_ms", "tps", "mspt", "updated", "expect_mspt")
+
+    def __init__(self):
+        self.startup_seconds = None
+        self.lag_spikes = 0
+        self.ticks_behind = 0
+        self.ms_behind = 0
+        self.last_lag = None
+        self.stalls = 0
+        self.gc_pauses = 0
+        self.gc_pause_ms = 0.0
+        self.gc_pause_max_ms = 0.0
+        self.tps = None
+        self.mspt = None
+        self.updated = None
+        self.expect_mspt = False
+
+    def snapshot(self):
+        return {
+            "startup_seconds": self.startup_seconds,
+            "lag_spikes": self.lag_spikes,
+            "ticks_behind": self.ticks_behind,
+            "ms_behind": self.ms_behind,
+            "last_lag": self.last_lag,
+            "stalls": self.stalls,
+            "gc_pauses": self.gc_pauses,
+            "gc_pause_ms": round(self.gc_pause_ms, 3),
+            "gc_pause_max_ms": self.gc_pause_max_ms,
+            "tps": self.tps,
+            "mspt": self.mspt,
+            "updated": self.updated,
+        }
+
+
+class ConsoleMetrics:
+    """從 console 輸出解析效能訊號
+
+    on_output 由每台伺服器的 console 讀取執行緒對每一行呼叫：先以幾個子字串
+    比對過濾，絕大多數的行不會進入 regex，也不需要取得鎖。解析出的事件
+    （lag、啟動完成、Paper watchdog、GC 暫停、tps / mspt）記在各伺服器的計數
+    與共用的事件佇列中。poll() 透過 send_fn 送出 tps / mspt 取得目前數值。
+    """
+
+    def __init__(self, send_fn=None, interval=60.0, log=print):
+        self.send_fn = send_fn
+        self.interval = interval
+        self.log = log
+        self.servers = {}
+        self.events = deque(maxlen=MAX_EVENTS)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def _metrics(self, name):
+        metrics = self.servers.get(name)
+        if metrics is None:
+            metrics = self.servers.setdefault(name, _ServerMetrics())
+        return metrics
+
+    def _event(self, name, kind, value, detail=""):
+        self.events.append({"time": time.time(), "server": name, "type": kind, "value": value, "detail": detail})
+
+    def on_output(self, server_name, line):
+        metrics = self.servers.get(server_name)
+        if metrics is not None and metrics.expect_mspt:
+            # mspt 的數值在標題的下一行：◴ 1.2/0.8/3.4, 1.1/0.7/5.0, 1.3/0.7/9.1
+            metrics.expect_mspt = False
+            self._parse_mspt(server_name, line)
+            return
+        if "keep up" in line:
+            self._parse_lag(server_name, line)
+        elif "Done (" in line:
+            self._parse_done(server_name, line)
+        elif "TPS from last" in line:
+            self._parse_tps(server_name, line)
+        elif "Server tick times" in line:
+            self._metrics(server_name).expect_mspt = True
+        elif "has not responded" in line:
+            self._parse_stall(server_name, line)
+        elif "Pause " in line and "GC(" in line:
+            self._parse_gc(server_name, line)
+
+    def parse_response(self, server_name, text):
+        """解析 RCON 回應（不會出現在 console 輸出中）"""
+        for line in text.splitlines():
+            self.on_output(server_name, line)
+
+    def _parse_lag(self, name, line):
+        match = _LAG.search(line)
+        if not match:
+            return
+        ms, ticks = int(match.group(1)), int(match.group(2))
+        with self._lock:
+            metrics = self._metrics(name)
+            metrics.lag_spikes += 1
+            metrics.ms_behind += ms
+            metrics.ticks_behind += ticks
+            metrics.last_lag = time.time()
+            self._event(name, "lag", ms, f"{ticks} ticks behind")
+
+    def _parse_done(self, name, line):
+        match = _DONE.search(line)
+        if not match:
+            return
+        seconds = float(match.group(1))
+        with self._lock:
+            metrics = self._metrics(name)
+            metrics.startup_seconds = seconds
+            # 新的一次啟動：舊的 tps / mspt 已不代表目前狀態
+            metrics.tps = metrics.mspt = None
+            self._event(name, "startup", seconds)
+
+    def _parse_tps(self, name, line):
+        # 「TPS from last 1m, 5m, 15m: *20.0, 19.8, 19.9」；數值前可能有 * 或顏色碼
+        line = _FORMATTING.sub("", line)
+        values = [float(v) for v in _NUMBER.findall(line.split(":")[-1])][-3:]
+        if len(values) != 3:
+            return
+        with self._lock:
+            metrics = self._metrics(name)
+            metrics.tps = values
+            metrics.updated = time.time()
+
+    def _parse_mspt(self, name, line):
+        # 取 5s 區間的 avg/min/max；console 行首的 [12:34:56 INFO]: 不算
+        line = _FORMATTING.sub("", line)
+        if line.startswith("["):
+            line = line.split("]: ", 1)[-1]
+        values = [float(v) for v in _NUMBER.findall(line)]
+        if len(values) < 3:
+            return
+        with self._lock:
+            metrics = self._metrics(name)
+            metrics.mspt = values[:3]
+            metrics.updated = time.time()
+
+    def _parse_stall(self, name, line):
+        match = _STALL.search(line)
+        if not match:
+            return
+        with self._lock:
+            self._metrics(name).stalls += 1
+            self._event(name, "stall", int(match.group(1)))
+
+    def _parse_gc(self, name, line):
+        match = _GC_PAUSE.search(line)
+        if not match:
+            return
+        ms = float(match.group(2))
+        with self._lock:
+            metrics = self._metrics(name)
+            metrics.gc_pauses += 1
+            metrics.gc_pause_ms += ms
+            metrics.gc_pause_max_ms = max(metrics.gc_pause_max_ms, ms)
+            self._event(name, "gc", ms, match.group(1))
+
+    def get(self, name):
+        with self._lock:
+            metrics = self.servers.get(name)
+            return metrics.snapshot() if metrics else None
+
+    def recent_events(self, name=None, limit=100):
+        with self._lock:
+            events = [e for e in self.events if name is None or e["server"] == name]
+        return events[-limit:]
+
+    # === 定期查詢 tps / mspt ===
+    def start(self, get_targets):
+        """get_targets() 回傳目前要查詢的伺服器名稱"""
+        if not self.interval or self.send_fn is None:
+            return
+        threading.Thread(target=self._run, args=(get_targets,), daemon=True, name="console-metrics").start()
+
+    def stop(self):
+        self._stop.set()
+
+    def poll(self, names):
+        if not names:
+            return
+        for command in POLL_COMMANDS:
+            self.send_fn(names, command)
+
+    def _run(self, get_targets):
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll(get_targets())
+            except Exception as e:
+                self.log(f"查詢 tps / mspt 失敗：{e}")
+
+    # === 匯出 ===
+    def export_prometheus(self):
+        gauges = (
+            ("startup_seconds", lambda m: m.startup_seconds),
+            ("lag_spikes_total", lambda m: m.lag_spikes),
+            ("ticks_behind_total", lambda m: m.ticks_behind),
+            ("gc_pauses_total", lambda m: m.gc_pauses),
+            ("gc_pause_ms_total", lambda m: m.gc_pause_ms),
+            ("tps_1m", lambda m: m.tps[0] if m.tps else None),
+            ("mspt_avg", lambda m: m.mspt[0] if m.mspt else None),
+        )
+        lines = []
+        with self._lock:
+            servers = sorted(self.servers.items())
+            for metric, getter in gauges:
+                kind = "counter" if metric.endswith("_total") else "gauge"
+                lines.append(f"# TYPE craftcontrol_{metric} {kind}")
+                for name, metrics in servers:
+                    value = getter(metrics)
+                    if value is not None:
+                        label = name.replace("\\", "\\\\").replace('"', '\\"')
+                        lines.append(f'craftcontrol_{metric}{{server="{label}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def export_events_csv(self, names=None):
+        lines = [",".join(EVENT_FIELDS)]
+        for event in self.recent_events(limit=MAX_EVENTS):
+            if names and event["server"] not in names:
+                continue
+            detail = event["detail"].replace('"', '""')
+            lines.append(f'{event["time"]:.3f},{event["server"]},{event["type"]},{event["value"]},"{detail}"')
+        return "\n".join(lines) + "\n"
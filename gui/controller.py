@@ -1,32 +1,187 @@
 import subprocess
+import glob
 import os
 import platform
+import signal
 import socket
+import threading
+import time
+from collections import deque
 
 IS_WINDOWS = platform.system() == "Windows"
 
+# 每台伺服器保留的最近 console 行數
+CONSOLE_BUFFER_LINES = 500
+
+# console 中代表伺服器已可接受連線的字樣（Paper / BungeeCord）
+READY_MARKERS = ("Done (", "Listening on /")
+
+# 由 CraftControl 啟動時設定，啟動腳本據此略過結束前的 pause，讓結束代碼直接回傳
+MANAGED_ENV = "CRAFTCONTROL_MANAGED"
+
 # 紀錄正在執行的伺服器程序
 server_processes = {}
+# 每台伺服器的附加資訊：啟動時間、最近的 console 輸出
+server_info = {}
+_lock = threading.Lock()
+
+# console 輸出監聽者 callback(server_name, line)，在背景讀取執行緒中呼叫
+_output_listeners = []
+# 程序結束監聽者 callback(server_name, returncode)
+_exit_listeners = []
+
+def add_output_listener(callback):
+    _output_listeners.append(callback)
+
+def add_exit_listener(callback):
+    _exit_listeners.append(callback)
+
+def _reader(server_name, proc):
+    """背景讀取伺服器 console 輸出，直到程序結束"""
+    info = server_info[server_name]
+    for line in proc.stdout:
+        line = line.rstrip("\r\n")
+        info["output"].append(line)
+        info["last_output"] = time.monotonic()
+        if not info["ready"].is_set() and any(marker in line for marker in READY_MARKERS):
+            info["ready"].set()
+        for callback in _output_listeners:
+            try:
+                callback(server_name, line)
+            except Exception:
+                pass
+    returncode = proc.wait()
+    with _lock:
+        if server_processes.get(server_name) is proc:
+            del server_processes[server_name]
+    for callback in _exit_listeners:
+        try:
+            callback(server_name, returncode)
+        except Exception:
+            pass
 
 def start_server(server_name, script_path):
+    with _lock:
+        proc = server_processes.get(server_name)
+        if proc is not None and proc.poll() is None:
+            return False, f"{server_name} 已在運行中"
+    env = dict(os.environ, **{MANAGED_ENV: "1"})
     try:
-        proc = subprocess.Popen(
-            script_path,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            shell=True,
-            cwd=os.path.dirname(script_path),
-            encoding="utf-8"
-        )
-        output, _ = proc.communicate(timeout=10)
-        # output 會包含所有 console log
-        if "Failed to load eula.txt" in output:
-            return False, output
-        return True, output
+        if IS_WINDOWS:
+            proc = subprocess.Popen(
+                script_path,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                shell=True,
+                cwd=os.path.dirname(script_path),
+                encoding="utf-8",
+                errors="replace",
+                bufsize=1,
+                env=env,
+                creationflags=subprocess.CREATE_NEW_PROCESS_GROUP
+            )
+        else:
+            # 獨立 process group，停止時可連同 java 子程序一起結束
+            proc = subprocess.Popen(
+                [script_path],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                cwd=os.path.dirname(script_path),
+                encoding="utf-8",
+                errors="replace",
+                bufsize=1,
+                env=env,
+                start_new_session=True
+            )
     except Exception as e:
         return False, str(e)
 
-def stop_server(server_name, stop_cmd="stop"):
+    with _lock:
+        server_processes[server_name] = proc
+        server_info[server_name] = {
+            "script_path": script_path,
+            "started_at": time.time(),
+            "last_output": time.monotonic(),
+            "output": deque(maxlen=CONSOLE_BUFFER_LINES),
+            "ready": threading.Event(),
+            # 由 stop_server 設定，用來區分正常停止與當機
+            "stopping": False,
+        }
+    threading.Thread(target=_reader, args=(server_name, proc), daemon=True,
+                     name=f"console-{server_name}").start()
+    return True, f"已啟動伺服器：{server_name}"
+
+def send_command(server_name, command):
+    """寫入一行指令到伺服器標準輸入"""
+    proc = server_processes.get(server_name)
+    if proc is None or proc.poll() is not None or not proc.stdin:
+        return False, f"{server_name} 未啟動"
+    try:
+        proc.stdin.write(command + "\n")
+        proc.stdin.flush()
+        return True, f"已傳送指令到 {server_name}：{command}"
+    except (OSError, ValueError) as e:
+        return False, f"傳送指令失敗：{e}"
+
+def get_console_output(server_name, lines=None):
+    info = server_info.get(server_name)
+    if not info:
+        return []
+    output = list(info["output"])
+    return output[-lines:] if lines else output
+
+def get_server_pid(server_name):
+    proc = server_processes.get(server_name)
+    return proc.pid if proc is not None and proc.poll() is None else None
+
+def get_server_uptime(server_name):
+    if get_server_pid(server_name) is None:
+        return None
+    return time.time() - server_info[server_name]["started_at"]
+
+def is_server_ready(server_name):
+    info = server_info.get(server_name)
+    return get_server_pid(server_name) is not None and info["ready"].is_set()
+
+def wait_until_ready(server_name, timeout=None, port=None, host="127.0.0.1"):
+    """等待 console 出現啟動完成字樣或 host:port 開始監聽；程序結束或逾時回傳 False"""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        info = server_info.get(server_name)
+        if info is None or get_server_pid(server_name) is None:
+            return False
+        if info["ready"].wait(0.5):
+            return True
+        if port is not None and is_port_open(port, host):
+            info["ready"].set()
+            return True
+        if deadline is not None and time.monotonic() >= deadline:
+            return False
+
+def _terminate(proc):
+    if IS_WINDOWS:
+        proc.terminate()
+        return
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+    except (ProcessLookupError, PermissionError):
+        proc.terminate()
+
+def _kill(proc):
+    if IS_WINDOWS:
+        proc.kill()
+        return
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        proc.kill()
+
+def stop_server(server_name, stop_cmd="stop", timeout=5):
+    info = server_info.get(server_name)
+    if info is not None:
+        info["stopping"] = True
     proc = server_processes.get(server_name)
     if not proc:
         return False, f"{server_name} 未啟動"
@@ -34,37 +189,231 @@ def stop_server(server_name, stop_cmd="stop"):
         # 傳送指令到伺服器標準輸入
         if proc.poll() is None and proc.stdin:
             try:
-                proc.stdin.write((stop_cmd + "\n").encode())
+                proc.stdin.write(stop_cmd + "\n")
                 proc.stdin.flush()
                 # 多送幾次 Enter，確保 pause 被觸發
                 for _ in range(3):
-                    proc.stdin.write(b"\n")
+                    proc.stdin.write("\n")
                     proc.stdin.flush()
-            except Exception as e:
-                proc.terminate()
+            except (OSError, ValueError):
+                _terminate(proc)
         else:
-            proc.terminate()
+            _terminate(proc)
         try:
-            proc.wait(timeout=5)
+            proc.wait(timeout=timeout)
         except subprocess.TimeoutExpired:
-            proc.terminate()
+            _terminate(proc)
             proc.wait(timeout=5)
-        del server_processes[server_name]
+        with _lock:
+            if server_processes.get(server_name) is proc:
+                del server_processes[server_name]
         return True, f"已停止伺服器：{server_name}"
     except Exception as e:
         return False, f"停止錯誤：{e}"
 
-def is_port_open(port):
-    """檢查指定 port 是否有程式在監聽"""
+def is_port_open(port, host="127.0.0.1"):
+    """檢查 host 上指定的 port 是否有程式在監聽"""
     with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
         sock.settimeout(1)
-        result = sock.connect_ex(('127.0.0.1', port))
+        result = sock.connect_ex((host, port))
         return result == 0
 
-def is_server_running(server_name, port=None):
+def is_server_running(server_name, port=None, host="127.0.0.1"):
     proc = server_processes.get(server_name)
     running = proc is not None and proc.poll() is None
     if port is not None:
         # 若指定 port，則以 port 狀態為主
-        return running and is_port_open(port)
+        return running and is_port_open(port, host)
     return running
+
+
+class Watchdog:
+    """監看受管理的伺服器：非預期結束或卡死時自動重新啟動
+
+    - 當機：程序結束、結束代碼非 0，且不是由 stop_server 停止
+    - 卡死：已就緒的伺服器在 hang_timeout 秒內既沒有 console 輸出，也沒有回應
+      is_responsive(name)（通常是 Server List Ping）
+    重啟間隔以 backoff_base 起跳、每次失敗加倍（上限 backoff_max）；在
+    crash_loop_window 秒內失敗 crash_loop_limit 次即放棄，避免無限重啟。
+    每次失敗會把最近的 console 與 hs_err_pid*.log 寫成當機報告。
+    """
+
+    def __init__(self, is_responsive=None, restart_fn=None, log=print, report_dir=None, interval=2.0,
+                 hang_timeout=120, backoff_base=5, backoff_max=300, crash_loop_limit=5,
+                 crash_loop_window=600, report_lines=200):
+        self.is_responsive = is_responsive or (lambda name: False)
+        self.restart_fn = restart_fn or (lambda name: start_server(name, server_info[name]["script_path"]))
+        self.log = log
+        self.report_dir = report_dir
+        self.interval = interval
+        self.hang_timeout = hang_timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.crash_loop_limit = crash_loop_limit
+        self.crash_loop_window = crash_loop_window
+        self.report_lines = report_lines
+        self.enabled = True
+        self._records = {}
+        self._pending = {}
+        self._last_alive = {}
+        self._record_lock = threading.Lock()
+        self._stop = threading.Event()
+        add_exit_listener(self._on_exit)
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True, name="watchdog").start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _record(self, name):
+        record = self._records.get(name)
+        if record is None:
+            record = self._records[name] = {
+                "restarts": 0, "crashes": 0, "hangs": 0, "run_seconds": 0.0,
+                "failures": deque(), "last_failure": None, "last_report": None, "gave_up": False,
+            }
+        return record
+
+    def stats(self, name):
+        """重啟次數、當機 / 卡死次數與 MTBF（秒；尚未失敗過時為 None）"""
+        with self._record_lock:
+            record = self._record(name)
+            run_seconds = record["run_seconds"] + (get_server_uptime(name) or 0)
+            failures = record["crashes"] + record["hangs"]
+            return {
+                "restarts": record["restarts"],
+                "crashes": record["crashes"],
+                "hangs": record["hangs"],
+                "mtbf_seconds": run_seconds / failures if failures else None,
+                "last_failure": record["last_failure"],
+                "last_report": record["last_report"],
+                "restart_pending": name in self._pending,
+                "gave_up": record["gave_up"],
+            }
+
+    def reset(self, name):
+        # 手動啟動時清除放棄狀態，重新給予重啟額度
+        with self._record_lock:
+            record = self._record(name)
+            record["gave_up"] = False
+            record["failures"].clear()
+
+    def _on_exit(self, name, returncode):
+        info = server_info.get(name)
+        if info is None:
+            return
+        with self._record_lock:
+            self._record(name)["run_seconds"] += time.time() - info["started_at"]
+        if info["stopping"] or info.get("hung"):
+            return
+        if returncode == 0:
+            self.log(f"{name} 已結束（結束代碼 0），不自動重啟")
+            return
+        self._failed(name, "crash", f"程序非預期結束（結束代碼 {returncode}）")
+
+    def _failed(self, name, kind, reason):
+        now = time.time()
+        report = self._write_report(name, reason)
+        with self._record_lock:
+            record = self._record(name)
+            record["crashes" if kind == "crash" else "hangs"] += 1
+            record["last_failure"] = now
+            record["last_report"] = report
+            failures = record["failures"]
+            failures.append(now)
+            while failures and now - failures[0] > self.crash_loop_window:
+                failures.popleft()
+            if not self.enabled:
+                return
+            if len(failures) >= self.crash_loop_limit:
+                record["gave_up"] = True
+                self.log(f"❌ {name} 在 {self.crash_loop_window // 60} 分鐘內失敗 {len(failures)} 次，"
+                         f"判定為當機循環，停止自動重啟")
+                return
+            delay = min(self.backoff_base * 2 ** (len(failures) - 1), self.backoff_max)
+            self._pending[name] = time.monotonic() + delay
+        self.log(f"⚠️ {name} {reason}，{delay} 秒後自動重啟（報告：{report or '無'}）")
+
+    def _write_report(self, name, reason):
+        info = server_info.get(name)
+        if info is None or not self.report_dir:
+            return None
+        folder = os.path.dirname(info["script_path"])
+        started_at = info["started_at"]
+        lines = [
+            f"伺服器：{name}",
+            f"時間：{time.strftime('%Y-%m-%d %H:%M:%S')}",
+            f"原因：{reason}",
+            f"運行時間：{time.time() - started_at:.0f} 秒",
+            "",
+            f"=== 最近 {self.report_lines} 行 console ===",
+        ]
+        lines += list(info["output"])[-self.report_lines:]
+        # JVM 崩潰時會在工作目錄留下 hs_err_pid<pid>.log，只收本次啟動後產生的
+        for path in sorted(glob.glob(os.path.join(folder, "hs_err_pid*.log"))):
+            try:
+                if os.path.getmtime(path) < started_at:
+                    continue
+                with open(path, "r", encoding="utf-8", errors="replace") as f:
+                    lines += ["", f"=== {os.path.basename(path)} ===", f.read()]
+            except OSError:
+                continue
+        os.makedirs(self.report_dir, exist_ok=True)
+        safe_name = name.replace(" ", "_")
+        report = os.path.join(self.report_dir, f"{safe_name}-{time.strftime('%Y%m%d-%H%M%S')}.txt")
+        with open(report, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        return report
+
+    def _check_hangs(self):
+        now = time.monotonic()
+        for name in list(server_processes):
+            info = server_info.get(name)
+            if info is None or info["stopping"] or not is_server_ready(name):
+                continue
+            if self.is_responsive(name):
+                self._last_alive[name] = now
+                info["hung"] = False
+                continue
+            last_alive = max(info["last_output"], self._last_alive.get(name, 0))
+            if now - last_alive < self.hang_timeout:
+                info["hung"] = False
+                continue
+            proc = server_processes.get(name)
+            # 自動重啟關閉時只警告一次，恢復回應後才會再次判定
+            if proc is None or (info.get("hung") and not self.enabled):
+                continue
+            info["hung"] = True
+            reason = f"已 {self.hang_timeout} 秒沒有輸出也沒有回應"
+            self._failed(name, "hang", reason)
+            if not self.enabled:
+                self.log(f"⚠️ {name} {reason}，自動重啟已關閉，不強制結束")
+                continue
+            # 卡住的 JVM 可能不理會 SIGTERM，直接強制結束
+            _kill(proc)
+
+    def _restart_due(self):
+        now = time.monotonic()
+        with self._record_lock:
+            due = [name for name, at in self._pending.items() if at <= now]
+            for name in due:
+                del self._pending[name]
+        for name in due:
+            info = server_info.get(name)
+            if (info is not None and info["stopping"]) or is_server_running(name):
+                continue
+            success, msg = self.restart_fn(name)
+            if success:
+                with self._record_lock:
+                    self._record(name)["restarts"] += 1
+            else:
+                self.log(f"❌ {name} 自動重啟失敗：{msg}")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self._check_hangs()
+                self._restart_due()
+            except Exception as e:
+                self.log(f"監看程式錯誤：{e}")
@@ -0,0 +1,162 @@
+import hashlib
+import os
+import threading
+import time
+
+# requests 載入約需 100ms，延後到第一次連網時才 import，避免拖慢啟動
+
+CHUNK_SIZE = 256 * 1024
+PART_SUFFIX = ".part"
+# 與 .part 並存，記錄下載開始時回應的 ETag / Last-Modified，續傳時作為 If-Range
+VALIDATOR_SUFFIX = ".validator"
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class DownloadError(Exception):
+    pass
+
+
+class ChecksumError(DownloadError):
+    pass
+
+
+def get_session():
+    """共用的 requests.Session，讓所有下載與 API 請求重複使用 TCP/TLS 連線"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=32)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers["User-Agent"] = "CraftControl"
+            _session = session
+    return _session
+
+def _hash_existing(path, h):
+    # 續傳前先把已下載的部分算進 hash，之後只需串流剩餘的位元組
+    size = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+            size += len(chunk)
+    return size
+
+def _validator_path(part_path):
+    return part_path + VALIDATOR_SUFFIX
+
+def _response_validator(r):
+    """強 ETag 優先，否則 Last-Modified；弱 ETag 不能用於 If-Range"""
+    etag = r.headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return r.headers.get("Last-Modified")
+
+def _read_validator(part_path):
+    try:
+        with open(_validator_path(part_path), "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+def _write_validator(part_path, validator):
+    if validator:
+        with open(_validator_path(part_path), "w", encoding="utf-8") as f:
+            f.write(validator)
+    else:
+        _discard(_validator_path(part_path))
+
+def _discard(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def _discard_part(part_path):
+    _discard(part_path)
+    _discard(_validator_path(part_path))
+
+def _content_range_start(r):
+    # Content-Range: bytes <start>-<end>/<total>
+    value = r.headers.get("Content-Range", "")
+    try:
+        return int(value.split()[1].split("-")[0])
+    except (IndexError, ValueError):
+        return None
+
+def _download_once(url, part_path, progress, timeout, verified):
+    """verified 表示完成後會以 SHA-256 校驗；沒有校驗值時只在能確認是同一份檔案
+    （If-Range 與儲存的 ETag / Last-Modified）時才續傳，否則從頭下載"""
+    validator = _read_validator(part_path)
+    if os.path.exists(part_path) and not validator and not verified:
+        # 無法確認 .part 與目前的檔案是同一份（例如 lastSuccessfulBuild 已換成新 build）
+        _discard_part(part_path)
+    h = hashlib.sha256()
+    offset = _hash_existing(part_path, h) if os.path.exists(part_path) else 0
+    # 關閉壓縮，確保 Range 位移與寫入磁碟的位元組一致
+    headers = {"Accept-Encoding": "identity"}
+    if offset:
+        headers["Range"] = f"bytes={offset}-"
+        if validator:
+            # 檔案已變更時伺服器會改回傳完整的 200，而不是接上新檔案的後半段
+            headers["If-Range"] = validator
+
+    with get_session().get(url, headers=headers, stream=True, timeout=timeout) as r:
+        if r.status_code == 416:
+            # 範圍無效：有校驗值時交給 SHA-256 判斷是否已完整，否則無從確認，重新下載
+            if verified:
+                return h.hexdigest()
+            _discard_part(part_path)
+            raise DownloadError("續傳範圍無效，捨棄未完成的檔案後重新下載")
+        r.raise_for_status()
+        if offset and r.status_code == 206:
+            received = _response_validator(r)
+            if _content_range_start(r) != offset or (validator and received and received != validator):
+                _discard_part(part_path)
+                raise DownloadError("伺服器上的檔案已變更，捨棄未完成的檔案後重新下載")
+        else:
+            # 全新下載，或伺服器不支援 Range / 檔案已變更（If-Range 不符時回傳 200）
+            h = hashlib.sha256()
+            offset = 0
+            _write_validator(part_path, _response_validator(r))
+        length = r.headers.get("Content-Length")
+        total = offset + int(length) if length else None
+
+        done = offset
+        with open(part_path, "ab" if offset else "wb") as f:
+            for chunk in r.iter_content(CHUNK_SIZE):
+                f.write(chunk)
+                h.update(chunk)
+                done += len(chunk)
+                if progress:
+                    progress(done, total)
+            f.flush()
+            os.fsync(f.fileno())
+        if total is not None and done < total:
+            raise DownloadError(f"連線中斷：只收到 {done}/{total} bytes")
+    return h.hexdigest()
+
+def download_file(url, dest, sha256=None, retries=5, backoff=1.0, timeout=30, progress=None):
+    """串流下載到 dest.part，支援續傳、重試與 SHA-256 驗證，完成後才原子性改名為 dest"""
+    import requests
+    part_path = dest + PART_SUFFIX
+    os.makedirs(os.path.dirname(os.path.abspath(dest)), exist_ok=True)
+    for attempt in range(retries):
+        try:
+            digest = _download_once(url, part_path, progress, timeout, bool(sha256))
+            break
+        except (requests.RequestException, DownloadError, OSError) as e:
+            if attempt == retries - 1:
+                raise DownloadError(f"下載失敗（已重試 {retries} 次）：{e}") from e
+            time.sleep(backoff * (2 ** attempt))
+
+    if sha256 and digest != sha256.lower():
+        _discard_part(part_path)
+        raise ChecksumError(f"校驗失敗：預期 {sha256}，實際 {digest}")
+    os.replace(part_path, dest)
+    _discard(_validator_path(part_path))
+    return digest
@@ -0,0 +1,223 @@
+import json
+import threading
+import time
+
+from gui.status_poller import _pack_string, _pack_varint, _packet, _read_varint, _varint_from
+
+# asyncio 只在背景執行緒中使用，延後 import 以縮短 GUI 啟動時間
+
+SLEEPING_MOTD = "💤 伺服器休眠中，連線即可喚醒"
+PIPE_CHUNK = 64 * 1024
+
+
+async def _read_packet(reader):
+    length = await _read_varint(reader)
+    data = await reader.readexactly(length)
+    return _pack_varint(length) + data, data
+
+def _parse_handshake(data):
+    """回傳 (protocol, next_state)"""
+    packet_id, pos = _varint_from(data, 0)
+    if packet_id != 0x00:
+        raise ValueError(f"非預期的封包 {packet_id}")
+    protocol, pos = _varint_from(data, pos)
+    address_len, pos = _varint_from(data, pos)
+    pos += address_len + 2
+    next_state, _ = _varint_from(data, pos)
+    return protocol, next_state
+
+async def _pipe(reader, writer):
+    try:
+        while True:
+            data = await reader.read(PIPE_CHUNK)
+            if not data:
+                break
+            writer.write(data)
+            await writer.drain()
+    except (OSError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+class ElasticManager:
+    """閒置自動休眠與連線喚醒
+
+    沒有玩家超過 idle_timeout 秒的後端會以 stop_fn 正常停止，並由 CraftControl
+    暫時接手監聽它的 port：狀態查詢回覆「休眠中」，登入連線則喚醒伺服器、
+    保留這條連線直到伺服器就緒，再把已收到的 handshake 轉送過去並雙向轉發。
+    至少保留 min_running 台後端運行；max_running 限制同時運行的後端數量，
+    額滿時會先讓閒置最久的伺服器休眠來騰出空間。
+    """
+
+    def __init__(self, get_status, get_port, start_fn, stop_fn, wait_ready, host="127.0.0.1",
+                 idle_timeout=900, min_running=1, max_running=None, always_on=(), wake_timeout=120,
+                 interval=5.0, log=print):
+        self.get_status = get_status
+        self.get_port = get_port
+        self.start_fn = start_fn
+        self.stop_fn = stop_fn
+        self.wait_ready = wait_ready
+        self.host = host
+        self.idle_timeout = idle_timeout
+        self.min_running = min_running
+        self.max_running = max_running
+        self.always_on = set(always_on)
+        self.wake_timeout = wake_timeout
+        self.interval = interval
+        self.log = log
+        self._idle_since = {}
+        self._listeners = {}
+        self._waking = {}
+        self._loop = None
+        self._ready = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True, name="elastic").start()
+        self._ready.wait(5)
+
+    def is_sleeping(self, name):
+        return name in self._listeners
+
+    def sleeping(self):
+        return sorted(self._listeners)
+
+    def release(self, name, timeout=5):
+        """停止代為監聽（手動啟動或停止伺服器前呼叫），可從任何執行緒呼叫"""
+        if self._loop is None or name not in self._listeners:
+            return
+        import asyncio
+        asyncio.run_coroutine_threadsafe(self._release(name), self._loop).result(timeout)
+
+    async def _release(self, name):
+        server = self._listeners.pop(name, None)
+        if server is not None:
+            # 不等 wait_closed()：仍在等待喚醒的連線要繼續保留
+            server.close()
+
+    def _run(self):
+        import asyncio
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._ready.set()
+        self._loop.run_until_complete(self._idle_loop())
+
+    async def _idle_loop(self):
+        import asyncio
+        while True:
+            try:
+                await self._check_idle()
+            except Exception as e:
+                self.log(f"閒置檢查錯誤：{e}")
+            await asyncio.sleep(self.interval)
+
+    def _backends(self, status):
+        return {name: s for name, s in status.items() if s["kind"] == "paper"}
+
+    async def _check_idle(self):
+        now = time.monotonic()
+        backends = self._backends(self.get_status())
+        running = [name for name, s in backends.items() if s["running"]]
+        for name, s in backends.items():
+            if not s["running"] or not s["online"] or s["players"] > 0 or name in self.always_on:
+                self._idle_since.pop(name, None)
+            else:
+                self._idle_since.setdefault(name, now)
+
+        expired = sorted((since, name) for name, since in self._idle_since.items()
+                         if now - since >= self.idle_timeout)
+        for since, name in expired:
+            if len(running) <= self.min_running:
+                break
+            running.remove(name)
+            await self.sleep(name, f"已閒置 {(now - since) / 60:.0f} 分鐘")
+
+    async def sleep(self, name, reason):
+        import asyncio
+        self._idle_since.pop(name, None)
+        loop = asyncio.get_running_loop()
+        success, msg = await loop.run_in_executor(None, self.stop_fn, name)
+        if not success:
+            self.log(f"❌ {name} 無法休眠：{msg}")
+            return False
+        port = self.get_port(name)
+        try:
+            self._listeners[name] = await asyncio.start_server(
+                lambda r, w: self._handle(name, r, w), self.host, port)
+        except OSError as e:
+            self.log(f"⚠️ {name} 已停止，但無法監聽 port {port} 以便喚醒：{e}")
+            return True
+        self.log(f"💤 {name} {reason}，進入休眠（port {port} 有連線時自動喚醒）")
+        return True
+
+    async def _make_room(self):
+        """同時運行數已達 max_running 時，讓閒置最久的伺服器休眠；無法騰出空間回傳 False"""
+        if self.max_running is None:
+            return True
+        backends = self._backends(self.get_status())
+        if sum(1 for s in backends.values() if s["running"]) < self.max_running:
+            return True
+        idle = sorted((since, name) for name, since in self._idle_since.items())
+        if not idle:
+            return False
+        return await self.sleep(idle[0][1], "為了騰出空間給其他伺服器")
+
+    async def _wake(self, name):
+        """喚醒伺服器並等待就緒；同時有多條連線時只會啟動一次"""
+        import asyncio
+        task = self._waking.get(name)
+        if task is None:
+            task = self._waking[name] = asyncio.ensure_future(self._do_wake(name))
+            task.add_done_callback(lambda _: self._waking.pop(name, None))
+        return await asyncio.shield(task)
+
+    async def _do_wake(self, name):
+        import asyncio
+        if not await self._make_room():
+            return False, "已達同時運行上限"
+        await self._release(name)
+        loop = asyncio.get_running_loop()
+        self.log(f"⏰ 有玩家連線，喚醒 {name}...")
+        success, msg = await loop.run_in_executor(None, self.start_fn, name)
+        if not success:
+            return False, msg
+        if not await loop.run_in_executor(None, self.wait_ready, name, self.wake_timeout):
+            return False, f"未在 {self.wake_timeout} 秒內就緒"
+        return True, "已就緒"
+
+    async def _handle(self, name, reader, writer):
+        import asyncio
+        try:
+            raw, data = await asyncio.wait_for(_read_packet(reader), 10)
+            protocol, next_state = _parse_handshake(data)
+            if next_state == 1:
+                await self._reply_status(reader, writer, protocol)
+                return
+            success, msg = await self._wake(name)
+            if not success:
+                self.log(f"❌ {name} 喚醒失敗：{msg}")
+                reason = json.dumps({"text": f"伺服器喚醒失敗：{msg}"}, ensure_ascii=False)
+                writer.write(_packet(0x00, _pack_string(reason)))
+                await writer.drain()
+                return
+            # 伺服器已就緒：把已讀取的 handshake 交給它，其餘資料直接雙向轉發
+            upstream_reader, upstream_writer = await asyncio.open_connection(self.host, self.get_port(name))
+            upstream_writer.write(raw)
+            await asyncio.gather(_pipe(reader, upstream_writer), _pipe(upstream_reader, writer))
+        except (OSError, ConnectionError, ValueError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+            pass
+        finally:
+            writer.close()
+
+    async def _reply_status(self, reader, writer, protocol):
+        status = {
+            "version": {"name": "CraftControl", "protocol": protocol},
+            "players": {"max": 0, "online": 0},
+            "description": {"text": SLEEPING_MOTD},
+        }
+        await _read_packet(reader)
+        writer.write(_packet(0x00, _pack_string(json.dumps(status, ensure_ascii=False))))
+        await writer.drain()
+        _, ping = await _read_packet(reader)
+        writer.write(_packet(0x01, ping[1:9]))
+        await writer.drain()
@@ -0,0 +1,348 @@
+import os
+
+from gui.backup import BackupManager
+from gui.config_manager import (get_auto_restart, get_backend_base_port, get_backend_host, get_backup_settings,
+                                 get_base_dir, get_console_metrics_interval, get_elastic_settings, get_hang_timeout,
+                                 get_memory_headroom_mb, get_memory_weights, get_node_token, get_nodes,
+                                 get_online_mode, get_provision_workers, get_proxy_port, get_rcon_password,
+                                 get_start_concurrency, get_telemetry_interval, get_upgrade_batch_size)
+from gui.controller import (Watchdog, add_output_listener, get_console_output, get_server_pid, get_server_uptime,
+                            is_server_ready, is_server_running, send_command, start_server, stop_server,
+                            wait_until_ready)
+from gui.console import ConsoleHub
+from gui.console_metrics import ConsoleMetrics
+from gui.downloader import PART_SUFFIX
+from gui.elastic import ElasticManager
+from gui.fleet import Fleet
+from gui.log_index import LogIndex
+from gui.memory_planner import (check_plan, default_headroom_mb, host_total_memory_mb, plan_memory,
+                                 planned_usage_mb, read_heap_mb)
+from gui.provisioner import default_heap_mb, jar_name, provision_fleet, server_kind, write_start_script
+from gui.scheduler import start_fleet, stop_command, stop_fleet
+from gui.server_properties import configure_fleet, get_server_port
+from gui.status_poller import StatusPoller
+from gui.telemetry import TelemetrySampler
+from gui.upgrader import rolling_upgrade
+
+IS_WINDOWS = os.name == "nt"
+
+
+# === 根據 paper count 建立 SERVER_PATHS 字典 ===
+def build_server_paths(paper_count, base_dir=None):
+    base_dir = base_dir or get_base_dir()
+    script = "start.bat" if IS_WINDOWS else "start.sh"
+    paths = {
+        "BungeeCord": os.path.join(base_dir, "servers", "bungee", script)
+    }
+    for i in range(1, paper_count + 1):
+        paths[f"Paper {i}"] = os.path.join(base_dir, "servers", f"paper{i}", script)
+    return paths
+
+
+def discover_paper_count(base_dir=None):
+    """servers/ 底下已存在的 paper<k> 資料夾中最大的 k（node agent 新增的伺服器重啟後仍會載入）"""
+    servers_dir = os.path.join(base_dir or get_base_dir(), "servers")
+    if not os.path.isdir(servers_dir):
+        return 0
+    numbers = [int(d[5:]) for d in os.listdir(servers_dir) if d.startswith("paper") and d[5:].isdigit()]
+    return max(numbers, default=0)
+
+
+class Engine:
+    """不依賴 Tkinter 的核心：伺服器清單、補齊檔案、啟動停止與狀態輪詢
+
+    GUI 與 headless daemon 都只透過這個物件操作伺服器。log_pipeline 需提供
+    push(msg, source=None)。
+    """
+
+    def __init__(self, server_paths, log_pipeline, poll_interval=3.0, poll_timeout=1.0):
+        self.server_paths = server_paths
+        self.log_pipeline = log_pipeline
+        # 同一台主機執行多個 node agent 時，每個 agent 需使用不同的 port 範圍
+        self.backend_base_port = get_backend_base_port()
+        self.proxy_port = get_proxy_port()
+        # 後端監聽所有介面時從本機連線；輪詢、就緒檢查與 RCON 都連到這個位址
+        backend_host = get_backend_host()
+        self.connect_host = backend_host if backend_host not in ("", "0.0.0.0") else "127.0.0.1"
+        self.poller = StatusPoller(self.status_targets, interval=poll_interval, timeout=poll_timeout,
+                                   host=self.connect_host)
+        self.telemetry = TelemetrySampler(self.server_pids, interval=get_telemetry_interval())
+        self.watchdog = Watchdog(self._is_responsive, self._auto_restart, log=self.log,
+                                 report_dir=os.path.join(get_base_dir(), "crash-reports"),
+                                 hang_timeout=get_hang_timeout())
+        self.watchdog.enabled = get_auto_restart()
+        elastic = get_elastic_settings()
+        self.elastic = ElasticManager(
+            self.status, self._port, self.start, self.stop,
+            lambda name, timeout: wait_until_ready(name, timeout, self._port(name), self.connect_host),
+            host=backend_host, idle_timeout=elastic["idle_minutes"] * 60,
+            min_running=elastic["min_running"], max_running=elastic["max_running"],
+            always_on=elastic["always_on"], wake_timeout=elastic["wake_timeout"], log=self.log)
+        self.elastic_enabled = elastic["enabled"]
+        self.backups = BackupManager(send_command, is_server_running, log=self.log,
+                                     io_workers=get_backup_settings()["io_workers"])
+        self.console_hub = ConsoleHub({name: os.path.dirname(path) for name, path in server_paths.items()},
+                                      send_command, host=self.connect_host)
+        self.console_metrics = ConsoleMetrics(self._poll_console, interval=get_console_metrics_interval(), log=self.log)
+        self.log_index = LogIndex({name: os.path.dirname(path) for name, path in server_paths.items()})
+        # 設定了其他主機的 node agent 時，由 fleet 合併成同一個清單
+        self.fleet = Fleet(get_nodes(), get_node_token(), log=self.log) if get_nodes() else None
+        add_output_listener(self._on_output)
+        add_output_listener(self.backups.on_output)
+        add_output_listener(self.console_hub.on_output)
+        add_output_listener(self.console_metrics.on_output)
+
+    def log(self, msg):
+        self.log_pipeline.push(msg)
+
+    def _on_output(self, server_name, line):
+        self.log_pipeline.push(line, source=server_name)
+
+    def start_polling(self):
+        self.poller.start()
+        self.telemetry.start()
+        self.watchdog.start()
+        if self.elastic_enabled:
+            self.elastic.start()
+        self.console_metrics.start(self._metrics_targets)
+
+    def shutdown(self):
+        """程式結束前呼叫：寫回尚未存檔的狀態（伺服器不會被停止）"""
+        self.log_index.close()
+
+    # === 資料夾與檔案 ===
+    def ensure_server_dirs(self):
+        for script_path in self.server_paths.values():
+            os.makedirs(os.path.dirname(script_path), exist_ok=True)
+
+    def check_server_files(self):
+        """檢查缺失並寫入日誌，回傳 {name: [問題描述]}"""
+        self.log("開始檢查伺服器資料夾檔案...")
+        problems = {}
+        for name, script_path in self.server_paths.items():
+            jar = jar_name(server_kind(name))
+            jar_path = os.path.join(os.path.dirname(script_path), jar)
+            issues = []
+            if not os.path.exists(jar_path):
+                issues.append(f"缺少 {jar}")
+            if not os.path.exists(script_path):
+                issues.append(f"缺少啟動腳本 ({script_path})")
+            # 未完成的下載只會以 .part 存在，不會被當成有效的 jar
+            if os.path.exists(jar_path + PART_SUFFIX):
+                issues.append("有未完成的下載，將於修復時續傳")
+            for issue in issues:
+                self.log(f"⚠️ {name} {issue}")
+            if issues:
+                problems[name] = issues
+        return problems
+
+    def configure_network(self):
+        """分配每台伺服器的 port，寫入 server.properties、spigot.yml 與 BungeeCord config.yml"""
+        ports, changed = configure_fleet(self.server_paths, self.backend_base_port, self.proxy_port,
+                                         get_backend_host(), get_online_mode(), get_rcon_password())
+        if changed:
+            self.log(f"已更新 {changed} 個伺服器設定檔（port 與 BungeeCord 轉發，重新啟動後生效）")
+        return ports
+
+    def provision(self, version, names=None, progress=None, write_scripts=True):
+        """補齊指定（預設全部）伺服器，回傳 {name: 錯誤訊息}"""
+        paths = self._select(names)
+        failures = provision_fleet(paths, version, max_workers=get_provision_workers(),
+                                   progress=progress, log=self.log, write_scripts=write_scripts)
+        self.configure_network()
+        return failures
+
+    def add_paper_server(self, version):
+        """在本機新增下一台 Paper（資料夾 paper<k>），補齊檔案並分配 port，回傳名稱"""
+        number = max((int(name.split()[-1]) for name in self.server_paths if server_kind(name) == "paper"),
+                     default=0) + 1
+        name = f"Paper {number}"
+        # 與其他伺服器放在同一個 servers/ 底下，使用同樣的啟動腳本檔名
+        bungee_path = self.server_paths["BungeeCord"]
+        script_path = os.path.join(os.path.dirname(os.path.dirname(bungee_path)), f"paper{number}",
+                                   os.path.basename(bungee_path))
+        self.server_paths[name] = script_path
+        self.console_hub.server_folders[name] = os.path.dirname(script_path)
+        self.log_index.server_folders[name] = os.path.dirname(script_path)
+        failures = self.provision(version, [name])
+        if failures:
+            raise RuntimeError(failures[name])
+        self.configure_network()
+        return name
+
+    def _select(self, names):
+        if names is None:
+            return dict(self.server_paths)
+        unknown = [name for name in names if name not in self.server_paths]
+        if unknown:
+            raise KeyError(f"未知的伺服器：{', '.join(unknown)}")
+        return {name: self.server_paths[name] for name in names}
+
+    # === 啟動與停止 ===
+    def start(self, name):
+        # 手動啟動時重新給予自動重啟的額度，並交還休眠時代為監聽的 port
+        self.watchdog.reset(name)
+        self.elastic.release(name)
+        success, msg = start_server(name, self.server_paths[name])
+        self.log(msg)
+        return success, msg
+
+    def _auto_restart(self, name):
+        success, msg = start_server(name, self.server_paths[name])
+        self.log(f"🔁 自動重啟：{msg}")
+        return success, msg
+
+    def _is_responsive(self, name):
+        return self.poller.latest.get(name, {}).get("online", False)
+
+    def stop(self, name):
+        self.elastic.release(name)
+        success, msg = stop_server(name, stop_command(name))
+        self.log(msg)
+        return success, msg
+
+    def start_all(self, names=None):
+        self.log("開始依序啟動所有伺服器...")
+        failures = start_fleet(self._select(names), concurrency=get_start_concurrency(), ports=self.status_targets(),
+                               log=self.log, start_fn=self.start, host=self.connect_host)
+        if failures:
+            self.log(f"❌ 有 {len(failures)} 台伺服器未能啟動：{', '.join(failures)}")
+        return failures
+
+    def stop_all(self, names=None):
+        names = list(self._select(names))
+        # 休眠中的伺服器沒有在運行，stop_fleet 會略過，需另外交還代為監聽的 port
+        for name in names:
+            self.elastic.release(name)
+        return stop_fleet(names, log=self.log, stop_fn=self.stop)
+
+    def send_command(self, name, command):
+        return send_command(name, command)
+
+    def broadcast(self, command, names=None, via="auto", timeout=3.0):
+        """同時送出指令到指定（預設全部）伺服器，回傳 {name: {"ok", "via", "response"}}"""
+        results = self.console_hub.broadcast(list(self._select(names)), command, via, timeout)
+        succeeded = sum(1 for r in results.values() if r["ok"])
+        self.log(f"已廣播指令「{command}」：{succeeded}/{len(results)} 台成功")
+        return results
+
+    def _metrics_targets(self):
+        return [name for name in self.server_paths
+                if server_kind(name) == "paper" and is_server_ready(name) and not self.elastic.is_sleeping(name)]
+
+    def _poll_console(self, names, command):
+        # stdin 的回應會經由 console 輸出自動解析，只有 RCON 回應需要另外交給解析器
+        for name, result in self.console_hub.broadcast(names, command, timeout=2.0).items():
+            if result["ok"] and result["via"] == "rcon":
+                self.console_metrics.parse_response(name, result["response"])
+
+    def performance(self, name, events=50):
+        """從 console 解析出的效能數據：啟動時間、lag 次數、GC 暫停、tps / mspt 與最近事件"""
+        return {"metrics": self.console_metrics.get(name), "events": self.console_metrics.recent_events(name, events)}
+
+    def console(self, name, lines=100):
+        return get_console_output(name, lines)
+
+    def search_logs(self, pattern, names=None, since=None, until=None, levels=None, limit=200):
+        """在指定（預設全部）伺服器的 latest.log 與封存日誌中搜尋 regex，回傳依時間排序的符合行"""
+        servers = list(self._select(names)) if names else None
+        return self.log_index.search(pattern, servers, since, until, levels, limit)
+
+    def upgrade(self, version, names=None, batch_size=None):
+        """滾動更新 Paper 後端到 version 的最新 build，回傳 {name: 結果}"""
+        return rolling_upgrade(self._select(names), version, self.start, self.stop, ports=self.status_targets(),
+                               batch_size=batch_size or get_upgrade_batch_size(), notify_fn=send_command,
+                               log=self.log, host=self.connect_host)
+
+    # === 備份 ===
+    def backup(self, names=None):
+        """同時備份指定（預設全部）Paper 伺服器的世界，回傳 {name: 錯誤訊息}"""
+        servers = {name: os.path.dirname(path) for name, path in self._select(names).items()
+                   if server_kind(name) == "paper"}
+        self.log(f"開始備份 {len(servers)} 台伺服器...")
+        return self.backups.backup_all(servers)
+
+    def list_backups(self, name):
+        return self.backups.list_snapshots(os.path.basename(os.path.dirname(self.server_paths[name])))
+
+    def restore(self, name, snapshot):
+        self.backups.restore(name, os.path.dirname(self.server_paths[name]), snapshot)
+
+    def prune_backups(self):
+        settings = get_backup_settings()
+        return self.backups.prune(settings["keep_last"], settings["keep_days"])
+
+    # === 記憶體分配 ===
+    def current_heaps(self):
+        """各伺服器啟動腳本目前的 -Xmx（MB）"""
+        return {name: read_heap_mb(path) or default_heap_mb(server_kind(name))
+                for name, path in self.server_paths.items()}
+
+    def plan_memory(self):
+        """回傳 (plan, warnings)"""
+        servers = {name: server_kind(name) for name in self.server_paths}
+        return plan_memory(servers, get_memory_weights(), headroom_mb=get_memory_headroom_mb())
+
+    def check_heaps(self, heaps):
+        return check_plan(heaps, headroom_mb=get_memory_headroom_mb())
+
+    def apply_memory_plan(self, plan, force=False):
+        """依計畫重寫啟動腳本；超過實體記憶體時拒絕（除非 force）。回傳 (success, warnings)"""
+        warnings = self.check_heaps(plan)
+        if planned_usage_mb(plan) > host_total_memory_mb() and not force:
+            return False, warnings
+        for name, heap_mb in plan.items():
+            script_path = self.server_paths[name]
+            if os.path.isdir(os.path.dirname(script_path)):
+                write_start_script(script_path, server_kind(name), heap_mb)
+        self.log(f"已依記憶體計畫更新 {len(plan)} 個啟動腳本（重新啟動後生效）")
+        return True, warnings
+
+    def memory_summary(self):
+        total = host_total_memory_mb()
+        headroom = get_memory_headroom_mb()
+        return {"total_mb": total, "headroom_mb": default_headroom_mb(total) if headroom is None else headroom}
+
+    # === 狀態 ===
+    def _port(self, name):
+        return get_server_port(name, self.server_paths[name])
+
+    def status_targets(self):
+        # 每台伺服器實際的 port（讀自 server.properties / config.yml，檔案沒變時直接用快取）
+        return {name: get_server_port(name, path) for name, path in self.server_paths.items()}
+
+    def server_pids(self):
+        return {name: get_server_pid(name) for name in self.server_paths}
+
+    def server_status(self, name):
+        result = self.poller.latest.get(name, {})
+        usage = self.telemetry.current(name) or {}
+        return {
+            "name": name,
+            "kind": server_kind(name),
+            "folder": os.path.dirname(self.server_paths[name]),
+            "running": is_server_running(name),
+            "sleeping": self.elastic.is_sleeping(name),
+            "ready": is_server_ready(name),
+            "pid": get_server_pid(name),
+            "uptime": get_server_uptime(name),
+            "port": result.get("port"),
+            "online": result.get("online", False),
+            "players": result.get("players", 0),
+            "max_players": result.get("max_players", 0),
+            "motd": result.get("motd", ""),
+            "latency_ms": result.get("latency_ms"),
+            "cpu_percent": usage.get("cpu_percent"),
+            "rss_bytes": usage.get("rss_bytes"),
+            "threads": usage.get("threads"),
+            "open_fds": usage.get("open_fds"),
+            "restarts": self.watchdog.stats(name)["restarts"],
+            "tps": (self.console_metrics.get(name) or {}).get("tps"),
+        }
+
+    def status(self):
+        return {name: self.server_status(name) for name in self.server_paths}
+
+    def health(self, name):
+        """自動重啟紀錄：重啟次數、當機 / 卡死次數與 MTBF"""
+        return self.watchdog.stats(name)
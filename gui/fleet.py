@@ -0,0 +1,205 @@
+import itertools
+import queue
+import socket
+import struct
+import threading
+import zlib
+from concurrent.futures import Future
+
+from gui.memory_planner import footprint_mb
+from gui.node_agent import (DEFAULT_NODE_PORT, PROTOCOL_VERSION, NodeError, auth_digest, batch_writer, recv_frame,
+                            send_frame)
+from gui.provisioner import default_heap_mb
+
+# 跨主機的伺服器名稱：<node>/<name>
+SEPARATOR = "/"
+
+
+class NodeClient:
+    """與一台 node agent 的常駐連線
+
+    call() 立即回傳 Future；同一時間排隊的請求由送出執行緒合併成一個封包，
+    回應依 id 對應，順序不必與請求相同。連線中斷時所有等待中的請求都以
+    NodeError 結束，下一次 call() 會自動重新連線。
+    """
+
+    def __init__(self, name, host, port=DEFAULT_NODE_PORT, token=None, timeout=5.0):
+        self.name = name
+        self.host = host
+        self.port = port
+        self.token = token
+        self.timeout = timeout
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._sock = None
+        self._outbox = None
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            hello = recv_frame(sock, authenticated=False)
+            if hello.get("protocol") != PROTOCOL_VERSION:
+                raise NodeError(f"{self.name} 的協定版本不相容：{hello.get('protocol')}")
+            send_frame(sock, {"auth": auth_digest(self.token or "", hello["nonce"])})
+            if not recv_frame(sock, authenticated=False).get("ok"):
+                raise NodeError(f"{self.name} 驗證失敗，請確認 node_token")
+            sock.settimeout(None)
+        except Exception:
+            sock.close()
+            raise
+        outbox = queue.Queue()
+        threading.Thread(target=batch_writer, args=(sock, outbox, lambda e: self._disconnect(sock, e)),
+                         daemon=True, name=f"node-send-{self.name}").start()
+        threading.Thread(target=self._reader, args=(sock,), daemon=True, name=f"node-recv-{self.name}").start()
+        self._sock, self._outbox = sock, outbox
+
+    def _reader(self, sock):
+        try:
+            while True:
+                for response in recv_frame(sock):
+                    with self._lock:
+                        future = self._pending.pop(response.get("id"), None)
+                    if future is None:
+                        continue
+                    if "error" in response:
+                        future.set_exception(NodeError(f"{self.name}：{response['error']}"))
+                    else:
+                        future.set_result(response.get("result"))
+        except (OSError, ConnectionError, ValueError, NodeError, struct.error, zlib.error) as e:
+            self._disconnect(sock, e)
+
+    def _disconnect(self, sock, error):
+        with self._lock:
+            if self._sock is not sock:
+                return
+            self._sock, outbox = None, self._outbox
+            pending, self._pending = self._pending, {}
+        outbox.put(None)
+        sock.close()
+        for future in pending.values():
+            future.set_exception(NodeError(f"與 {self.name} 的連線中斷：{error}"))
+
+    def call(self, method, **params):
+        future = Future()
+        request_id = next(self._ids)
+        with self._lock:
+            if self._sock is None:
+                try:
+                    self._connect()
+                except (OSError, ValueError, KeyError, NodeError, struct.error) as e:
+                    future.set_exception(NodeError(f"無法連線到 {self.name}（{self.host}:{self.port}）：{e}"))
+                    return future
+            self._pending[request_id] = future
+            self._outbox.put({"id": request_id, "method": method, "params": params})
+        return future
+
+    def request(self, method, timeout=30, **params):
+        return self.call(method, **params).result(timeout)
+
+    def close(self):
+        with self._lock:
+            sock = self._sock
+        if sock is not None:
+            self._disconnect(sock, "已關閉")
+
+
+def split_name(full_name):
+    """<node>/<name> -> (node, name)"""
+    node, sep, name = full_name.partition(SEPARATOR)
+    if not sep or not name:
+        raise KeyError(f"伺服器名稱需為 <node>{SEPARATOR}<name>：{full_name}")
+    return node, name
+
+
+class Fleet:
+    """把多台主機上的 node agent 合併成一個伺服器清單
+
+    查詢會同時送給所有 node，整體耗時約為最慢的一台；伺服器以 <node>/<name>
+    表示。新增伺服器時放在剩餘記憶體（扣除保留空間與已設定的 heap）最多的 node。
+    """
+
+    def __init__(self, nodes, token=None, timeout=5.0, log=print):
+        self.clients = {node["name"]: NodeClient(node["name"], node["host"], node.get("port", DEFAULT_NODE_PORT),
+                                                 token, timeout)
+                        for node in nodes}
+        self.log = log
+
+    def _client(self, node):
+        client = self.clients.get(node)
+        if client is None:
+            raise KeyError(f"未知的 node：{node}")
+        return client
+
+    def _gather(self, method, timeout=10, **params):
+        """對所有 node 同時呼叫，回傳 ({node: 結果}, {node: 錯誤訊息})"""
+        futures = {node: client.call(method, **params) for node, client in self.clients.items()}
+        results, errors = {}, {}
+        for node, future in futures.items():
+            try:
+                results[node] = future.result(timeout)
+            except Exception as e:
+                errors[node] = str(e) or type(e).__name__
+        return results, errors
+
+    def status(self):
+        """{<node>/<name>: 狀態}；無法連線的 node 不會出現在清單中"""
+        results, _ = self._gather("status")
+        servers = {}
+        for node, status in results.items():
+            for name, s in status.items():
+                servers[f"{node}{SEPARATOR}{name}"] = dict(s, node=node)
+        return servers
+
+    def nodes(self):
+        """各 node 的連線狀態、伺服器數量與記憶體"""
+        memory, errors = self._gather("memory")
+        info, _ = self._gather("info")
+        result = {}
+        for node, client in self.clients.items():
+            entry = {"host": client.host, "port": client.port, "online": node in memory}
+            if node in memory:
+                entry.update(memory[node], servers=len(info.get(node, {}).get("servers", [])))
+            else:
+                entry["error"] = errors.get(node)
+            result[node] = entry
+        return result
+
+    def place(self, version, timeout=600):
+        """在剩餘記憶體最多的 node 新增一台 Paper，回傳 <node>/<name>"""
+        memory, errors = self._gather("memory")
+        if not memory:
+            raise NodeError(f"沒有可連線的 node：{errors}")
+        node = max(memory, key=lambda n: (memory[n]["free_mb"], memory[n]["available_mb"] or 0))
+        needed = footprint_mb(default_heap_mb("paper"))
+        if memory[node]["free_mb"] < needed:
+            raise NodeError(f"所有 node 的剩餘記憶體都不足 {needed} MB（最多為 {node}：{memory[node]['free_mb']} MB）")
+        self.log(f"在 {node} 新增 Paper（剩餘 {memory[node]['free_mb']} MB）...")
+        name = self._client(node).request("add_server", timeout=timeout, version=version)
+        full_name = f"{node}{SEPARATOR}{name}"
+        self.log(f"✅ 已新增 {full_name}")
+        return full_name
+
+    def call(self, full_name, method, timeout=60, **params):
+        """對 <node>/<name> 執行 start / stop / command / console 等操作"""
+        node, name = split_name(full_name)
+        return self._client(node).request(method, timeout=timeout, name=name, **params)
+
+    def batch(self, full_names, method, timeout=60, **params):
+        """對多台伺服器執行同一個操作；同一個 node 的請求會合併在同一個封包中送出"""
+        futures = {}
+        for full_name in full_names:
+            node, name = split_name(full_name)
+            futures[full_name] = self._client(node).call(method, name=name, **params)
+        results = {}
+        for full_name, future in futures.items():
+            try:
+                results[full_name] = future.result(timeout)
+            except Exception as e:
+                results[full_name] = [False, str(e)]
+        return results
+
+    def close(self):
+        for client in self.clients.values():
+            client.close()
@@ -0,0 +1,421 @@
+import base64
+import gzip
+import json
+import mmap
+import os
+import re
+import shutil
+import threading
+import time
+import zlib
+from datetime import date, datetime, timedelta
+
+from gui.config_manager import get_base_dir
+
+INDEX_DIR = os.path.join(get_base_dir(), "cache", "log-index")
+
+# 每個索引區塊涵蓋的原始位元組數；查詢時以區塊為單位略過不相關的內容
+BLOCK_SIZE = 64 * 1024
+# 每個區塊的關鍵字 bloom filter 大小（bits）與雜湊次數
+BLOOM_BITS = 8192
+BLOOM_HASHES = 3
+LEVELS = ("TRACE", "DEBUG", "INFO", "WARN", "ERROR", "FATAL")
+# 相同查詢結果的快取數量
+QUERY_CACHE_SIZE = 32
+# 索引寫回磁碟的最短間隔（秒）；latest.log 持續成長時不必每次查詢都存檔
+SAVE_INTERVAL = 60
+
+# Paper：[12:34:56 INFO]: ...；原版：[12:34:56] [Server thread/INFO]: ...
+_LINE_HEAD = re.compile(rb"\[(\d\d):(\d\d):(\d\d)(?: (\w+))?\](?: \[[^\]\n]*/(\w+)\])?")
+_LINE_HEADS = re.compile(rb"^" + _LINE_HEAD.pattern, re.MULTILINE)
+_TOKEN = re.compile(rb"[a-z0-9_]{3,32}")
+_ARCHIVE_NAME = re.compile(r"^(\d{4})-(\d\d)-(\d\d)-\d+\.log(\.gz)?$")
+_REGEX_META = re.compile(r"\\.|[.*+?()\[\]{}|^$]")
+
+
+def _bloom_positions(token):
+    h1 = zlib.crc32(token)
+    h2 = zlib.adler32(token) | 1
+    return [(h1 + i * h2) % BLOOM_BITS for i in range(BLOOM_HASHES)]
+
+def _bloom_has(bits, token):
+    return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in _bloom_positions(token))
+
+def required_tokens(pattern):
+    """從 regex 取出一定會出現在符合行中的完整關鍵字，用來查 bloom filter
+
+    只取 pattern 中沒有特殊字元的片段裡、兩側都是非文字字元的字詞；pattern 含 |
+    時無法保證任何字詞一定出現，回傳空集合。
+    """
+    if "|" in pattern:
+        return set()
+    tokens = set()
+    for segment in _REGEX_META.split(pattern.lower()):
+        words = list(re.finditer(r"[a-z0-9_]+", segment))
+        for match in words:
+            # 片段開頭或結尾的字詞可能與 pattern 其他部分相連，不一定是完整的字
+            if match.start() == 0 or match.end() == len(segment):
+                continue
+            if 3 <= len(match.group()) <= 32:
+                tokens.add(match.group().encode())
+    return tokens
+
+
+class _Block:
+    __slots__ = ("start", "end", "t_min", "t_max", "levels", "bloom")
+
+    def __init__(self, start, end=None, t_min=None, t_max=None, levels=0, bloom=None):
+        self.start = start
+        self.end = start if end is None else end
+        self.t_min = t_min
+        self.t_max = t_max
+        self.levels = levels
+        self.bloom = bloom if bloom is not None else bytearray(BLOOM_BITS // 8)
+
+    def to_json(self):
+        return [self.start, self.end, self.t_min, self.t_max, self.levels,
+                base64.b64encode(zlib.compress(bytes(self.bloom))).decode()]
+
+    @classmethod
+    def from_json(cls, data):
+        start, end, t_min, t_max, levels, bloom = data
+        return cls(start, end, t_min, t_max, levels, bytearray(zlib.decompress(base64.b64decode(bloom))))
+
+
+class _FileIndex:
+    """單一日誌檔的索引：已索引到的 offset 與區塊清單"""
+
+    def __init__(self, source, data_path, day, identity=None):
+        self.source = source
+        self.data_path = data_path
+        self.day = day
+        self.identity = identity
+        self.offset = 0
+        self.blocks = []
+        # 跨行延續的狀態：前一行的時間（用於沒有時間的續行與跨午夜）與等級
+        self.last_time = None
+        self.last_level = 0
+
+    def to_json(self):
+        return {"source": self.source, "data_path": self.data_path, "day": self.day.isoformat(),
+                "identity": self.identity, "offset": self.offset, "last_time": self.last_time,
+                "last_level": self.last_level, "blocks": [b.to_json() for b in self.blocks]}
+
+    @classmethod
+    def from_json(cls, data):
+        index = cls(data["source"], data["data_path"], date.fromisoformat(data["day"]), data["identity"])
+        index.offset = data["offset"]
+        index.last_time = data["last_time"]
+        index.last_level = data["last_level"]
+        index.blocks = [_Block.from_json(b) for b in data["blocks"]]
+        return index
+
+    def _moment(self, h, m, s):
+        moment = datetime.combine(self.day, datetime.min.time()).timestamp() + int(h) * 3600 + int(m) * 60 + int(s)
+        # 時間倒退代表跨過午夜
+        if self.last_time is not None and moment < self.last_time - 3600:
+            self.day += timedelta(days=1)
+            moment += 86400
+        self.last_time = moment
+        return moment
+
+    def extend(self, data, pos=0, stop=None):
+        """索引 data[pos:stop] 的新資料（只含完整的行），data[pos] 對應檔案中的 self.offset
+
+        data 可以是 bytes 或整個檔案的 mmap，每次只取出一個區塊大小的片段。
+        """
+        stop = len(data) if stop is None else stop
+        base = self.offset - pos
+        block = self.blocks[-1] if self.blocks and self.blocks[-1].end - self.blocks[-1].start < BLOCK_SIZE else None
+        while pos < stop:
+            if block is None:
+                block = _Block(base + pos)
+                self.blocks.append(block)
+            room = BLOCK_SIZE - (block.end - block.start)
+            cut = data.find(b"\n", pos + max(room, 1) - 1, stop)
+            cut = stop if cut == -1 else cut + 1
+            chunk = data[pos:cut]
+            # 日誌依時間順序寫入，只需換算第一與最後一個時間戳；等級用 findall 一次取出
+            heads = _LINE_HEADS.findall(chunk)
+            times = [self.last_time] if self.last_time is not None and not chunk.startswith(b"[") else []
+            if heads:
+                times.append(self._moment(*heads[0][:3]))
+                if len(heads) > 1:
+                    times.append(self._moment(*heads[-1][:3]))
+                for level_name in {head[4] or head[3] or b"INFO" for head in heads}:
+                    block.levels |= _level_bit(level_name)
+                self.last_level = _level_bit(heads[-1][4] or heads[-1][3] or b"INFO")
+            elif self.last_level:
+                block.levels |= self.last_level
+            if times:
+                block.t_min = min(times) if block.t_min is None else min(block.t_min, *times)
+                block.t_max = max(times) if block.t_max is None else max(block.t_max, *times)
+            # 只把新資料的關鍵字加進 bloom，不需要重讀區塊中已索引的部分
+            bloom = block.bloom
+            for token in set(_TOKEN.findall(chunk.lower())):
+                for bit in _bloom_positions(token):
+                    bloom[bit >> 3] |= 1 << (bit & 7)
+            block.end = base + cut
+            pos = cut
+            block = None
+        self.offset = base + stop
+
+
+def _level_bit(level_name):
+    name = level_name.decode("ascii", errors="replace").upper()
+    return 1 << LEVELS.index(name) if name in LEVELS else 0
+
+def _line_meta(data, line_start, block, day):
+    """找出某一行的 (epoch 秒, level bit)；續行（例如 stack trace）往前找最近有時間戳的行"""
+    pos = line_start
+    while True:
+        match = _LINE_HEAD.match(data, pos)
+        if match:
+            break
+        if pos == 0:
+            return block.t_min, 0
+        pos = data.rfind(b"\n", 0, pos - 1) + 1
+    h, m, s = int(match.group(1)), int(match.group(2)), int(match.group(3))
+    moment = datetime.combine(day, datetime.min.time()).timestamp() + h * 3600 + m * 60 + s
+    if block.t_min is not None and moment < block.t_min - 3600:
+        moment += 86400
+    return moment, _level_bit(match.group(5) or match.group(4) or b"INFO")
+
+
+class LogIndex:
+    """所有伺服器 logs/ 的增量索引與跨伺服器查詢
+
+    latest.log 從上次索引到的 offset 往後讀（輪替後從頭開始）；封存的 .log.gz
+    只解壓一次到索引目錄。查詢時依時間範圍、等級與 regex 中必定出現的關鍵字
+    （bloom filter）略過不相關的區塊，只以 mmap 讀取候選區塊。index.json 在第一次
+    update / search 時才載入（GUI 中由背景執行緒觸發），不會拖慢啟動。
+    """
+
+    def __init__(self, server_folders, index_dir=INDEX_DIR):
+        self.server_folders = server_folders
+        self.index_dir = index_dir
+        self.files = {}
+        self.generation = 0
+        self._last_save = 0.0
+        self._query_cache = {}
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._dirty = False
+
+    def _index_path(self):
+        return os.path.join(self.index_dir, "index.json")
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self._loaded = True
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self._index_path(), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        for key, value in data.get("files", {}).items():
+            try:
+                self.files[key] = _FileIndex.from_json(value)
+            except (KeyError, ValueError, zlib.error):
+                continue
+
+    def save(self):
+        with self._lock:
+            if not self._loaded:
+                # 還沒載入就存檔會覆蓋掉磁碟上的索引
+                return
+            self._save()
+
+    def close(self):
+        """結束前寫回尚未存檔的索引，下次啟動不必重讀已索引的內容"""
+        with self._lock:
+            if self._dirty:
+                self.save()
+
+    def _save(self):
+        self._dirty = False
+        self._last_save = time.monotonic()
+        os.makedirs(self.index_dir, exist_ok=True)
+        tmp_path = self._index_path() + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"files": {key: index.to_json() for key, index in self.files.items()}}, f)
+        os.replace(tmp_path, self._index_path())
+
+    def _archive(self, server, path, name):
+        """把封存的 .log.gz 解壓到索引目錄（只做一次），回傳可 mmap 的路徑"""
+        target = os.path.join(self.index_dir, "archives", server.replace(" ", "_"), name[:-3])
+        if not os.path.exists(target):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with gzip.open(path, "rb") as src, open(target + ".tmp", "wb") as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+            os.replace(target + ".tmp", target)
+        return target
+
+    def update(self):
+        """索引所有新的日誌內容，回傳新索引的位元組數"""
+        with self._lock:
+            self._ensure_loaded()
+            added = 0
+            for server, folder in self.server_folders.items():
+                logs_dir = os.path.join(folder, "logs")
+                if not os.path.isdir(logs_dir):
+                    continue
+                for name in sorted(os.listdir(logs_dir)):
+                    path = os.path.join(logs_dir, name)
+                    if name == "latest.log":
+                        added += self._update_live(server, path)
+                    elif _ARCHIVE_NAME.match(name):
+                        added += self._update_archive(server, path, name)
+            if added:
+                self.generation += 1
+                self._query_cache.clear()
+                self._dirty = True
+                if time.monotonic() - self._last_save >= SAVE_INTERVAL:
+                    self._save()
+            return added
+
+    def _update_archive(self, server, path, name):
+        key = f"{server}/{name}"
+        if key in self.files:
+            return 0
+        y, m, d = (int(g) for g in _ARCHIVE_NAME.match(name).groups()[:3])
+        data_path = self._archive(server, path, name) if name.endswith(".gz") else path
+        index = _FileIndex(key, data_path, date(y, m, d))
+        with open(data_path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size:
+                # 與查詢相同以 mmap 讀取，不必把整個解壓後的檔案讀進記憶體
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    index.extend(mm, 0, size)
+        self.files[key] = index
+        return size
+
+    def _update_live(self, server, path):
+        key = f"{server}/latest.log"
+        try:
+            st = os.stat(path)
+            with open(path, "rb") as f:
+                head = f.read(256)
+        except OSError:
+            return 0
+        # 以 inode 與檔頭判斷是否已輪替成新檔案
+        identity = f"{st.st_ino}:{zlib.crc32(head)}" if len(head) == 256 else None
+        index = self.files.get(key)
+        if index is None or st.st_size < index.offset or (index.identity and identity != index.identity):
+            first_day = datetime.fromtimestamp(st.st_mtime).date()
+            index = self.files[key] = _FileIndex(key, path, first_day, identity)
+        index.identity = index.identity or identity
+        if st.st_size == index.offset:
+            return 0
+        start = index.offset
+        try:
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                # 最後一行可能還沒寫完，留到下次再索引
+                end = mm.rfind(b"\n", start) + 1
+                if end <= start:
+                    return 0
+                if start == 0 and index.blocks == []:
+                    # 新的 latest.log：若第一行的時間晚於檔案修改時間，代表檔案是前一天開始寫的
+                    match = _LINE_HEAD.match(mm)
+                    mtime = datetime.fromtimestamp(st.st_mtime)
+                    first = int(match.group(1)) * 3600 + int(match.group(2)) * 60 if match else 0
+                    if first > mtime.hour * 3600 + mtime.minute * 60 + 60:
+                        index.day = mtime.date() - timedelta(days=1)
+                index.extend(mm, start, end)
+        except (OSError, ValueError):
+            # 檔案在 stat 之後被輪替或清空
+            return 0
+        return end - start
+
+    def search(self, pattern, servers=None, start=None, end=None, levels=None, limit=200, ignore_case=True):
+        """回傳符合的行 [{server, file, offset, time, level, line}]，依時間排序（最新的在後）"""
+        with self._lock:
+            self.update()
+            return self._search(pattern, servers, start, end, levels, limit, ignore_case)
+
+    def _search(self, pattern, servers, start, end, levels, limit, ignore_case):
+        level_mask = 0
+        for level in levels or ():
+            level_mask |= 1 << LEVELS.index(level.upper())
+        key = (pattern, tuple(servers or ()), start, end, level_mask, limit, ignore_case, self.generation)
+        cached = self._query_cache.get(key)
+        if cached is not None:
+            return cached
+
+        regex = re.compile(pattern.encode("utf-8"), re.MULTILINE | (re.IGNORECASE if ignore_case else 0))
+        tokens = required_tokens(pattern) if ignore_case else set()
+        results = []
+        for file_key, index in list(self.files.items()):
+            server = file_key.rsplit("/", 1)[0]
+            if servers and server not in servers:
+                continue
+            candidates = [b for b in index.blocks
+                          if (start is None or b.t_max is None or b.t_max >= start)
+                          and (end is None or b.t_min is None or b.t_min <= end)
+                          and (not level_mask or b.levels & level_mask)
+                          and all(_bloom_has(b.bloom, token) for token in tokens)]
+            if candidates:
+                results.extend(self._scan(server, index, candidates, regex, start, end, level_mask))
+        results.sort(key=lambda r: (r["time"] or 0, r["server"], r["offset"]))
+        results = results[-limit:] if limit else results
+        if len(self._query_cache) >= QUERY_CACHE_SIZE:
+            self._query_cache.pop(next(iter(self._query_cache)))
+        self._query_cache[key] = results
+        return results
+
+    def _scan(self, server, index, blocks, regex, start, end, level_mask):
+        results = []
+        try:
+            f = open(index.data_path, "rb")
+        except OSError:
+            return results
+        with f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return results
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for block in blocks:
+                    if block.end > size:
+                        continue
+                    data = mm[block.start:block.end]
+                    day = datetime.fromtimestamp(block.t_min).date() if block.t_min else index.day
+                    last_line = -1
+                    # regex 直接在整個區塊上執行，只有命中的行才解析時間與等級
+                    for match in regex.finditer(data):
+                        line_start = data.rfind(b"\n", 0, match.start()) + 1
+                        if line_start == last_line:
+                            continue
+                        last_line = line_start
+                        line_end = data.find(b"\n", match.start())
+                        line_end = len(data) if line_end == -1 else line_end
+                        if match.end() > line_end:
+                            # 跨行的符合（例如 pattern 含 \s）不算
+                            continue
+                        moment, level = _line_meta(data, line_start, block, day)
+                        if ((start is not None and moment is not None and moment < start)
+                                or (end is not None and moment is not None and moment > end)
+                                or (level_mask and not level & level_mask)):
+                            continue
+                        results.append({
+                            "server": server,
+                            "file": index.source.rsplit("/", 1)[1],
+                            "offset": block.start + line_start,
+                            "time": moment,
+                            "level": LEVELS[level.bit_length() - 1] if level else None,
+                            "line": data[line_start:line_end].decode("utf-8", errors="replace"),
+                        })
+        return results
+
+
+def parse_time(text):
+    """解析查詢時間：ISO 格式（2024-05-01 12:00）或相對時間（30m、2h、7d）"""
+    if not text:
+        return None
+    match = re.fullmatch(r"(\d+)([smhd])", text.strip())
+    if match:
+        seconds = int(match.group(1)) * {"s": 1, "m": 60, "h": 3600, "d": 86400}[match.group(2)]
+        return time.time() - seconds
+    return datetime.fromisoformat(text.strip()).timestamp()
@@ -0,0 +1,134 @@
+import logging
+import logging.handlers
+import os
+import threading
+import time
+from collections import deque
+
+
+def _timestamp(t):
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(t)) + f",{int(t % 1 * 1000):03d}"
+
+def _format_batch(batch):
+    """[(時間, 行)] -> 與 logging 預設 asctime 相同格式的多行文字；同一秒內共用日期字串"""
+    out = []
+    last_second = None
+    for t, line in batch:
+        second = int(t)
+        if second != last_second:
+            last_second = second
+            prefix = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(second))
+        out.append(f"{prefix},{int(t % 1 * 1000):03d} {line}")
+    return "\n".join(out)
+
+
+class LogPipeline:
+    """執行緒安全的日誌管線
+
+    任何執行緒都可以呼叫 push()；UI 端由單一 pump 以固定間隔批次取出並寫入
+    Text 元件（只保留最近 max_lines 行），完整內容則由背景執行緒整批寫入輪替的日誌檔。
+    寫檔緩衝區最多 max_pending 行，磁碟跟不上時多出的 console 輸出會被略過並計入
+    dropped，之後在日誌檔中註記略過的行數。
+    """
+
+    def __init__(self, log_path, max_lines=1000, interval_ms=100,
+                 max_bytes=5 * 1024 * 1024, backup_count=5, echo=False, max_pending=20000):
+        self.max_lines = max_lines
+        self.interval_ms = interval_ms
+        self.echo = echo
+        # 超過保留行數的部分反正會被裁掉，緩衝區本身也只留 max_lines 筆；
+        # 沒有 UI 的 headless 模式下也不會無限成長
+        self._buffer = deque(maxlen=max_lines)
+        self._root = None
+        self._widget = None
+        self._status_var = None
+        self._line_count = 0
+
+        os.makedirs(os.path.dirname(log_path), exist_ok=True)
+        self._file_handler = logging.handlers.RotatingFileHandler(
+            log_path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+        self._file_handler.setFormatter(logging.Formatter("%(message)s"))
+        # 寫檔交給背景執行緒，呼叫端不會卡在磁碟 I/O；緩衝區只存 (時間, 行)，
+        # 時間戳記由寫檔執行緒格式化，每批只產生一筆 LogRecord
+        self.max_pending = max_pending
+        self.dropped = 0
+        self._pending = []
+        self._unreported_drops = 0
+        self._closed = False
+        self._file_cond = threading.Condition(threading.Lock())
+        self._writer = threading.Thread(target=self._write_loop, daemon=True, name="log-writer")
+        self._writer.start()
+
+    def push(self, msg, source=None):
+        """source 為伺服器名稱時代表 console 輸出，不會更新狀態列"""
+        line = f"[{source}] {msg}" if source else msg
+        self._buffer.append((source, line))
+        with self._file_cond:
+            # 管理訊息很少，一律保留；只有 console 輸出會被略過
+            if source is None or len(self._pending) < self.max_pending:
+                self._pending.append((time.time(), line))
+                if len(self._pending) == 1:
+                    self._file_cond.notify()
+            else:
+                self.dropped += 1
+                self._unreported_drops += 1
+        if self.echo and source is None:
+            print(line, flush=True)
+
+    def _write_loop(self):
+        while True:
+            with self._file_cond:
+                while not self._pending and not self._closed:
+                    self._file_cond.wait()
+                batch, self._pending = self._pending, []
+                drops, self._unreported_drops = self._unreported_drops, 0
+                if not batch and self._closed:
+                    return
+            text = _format_batch(batch)
+            if drops:
+                text += f"\n{_timestamp(time.time())} ⚠️ 日誌寫入跟不上，已略過 {drops} 行"
+            self._file_handler.handle(logging.makeLogRecord({"msg": text}))
+
+    def attach(self, root, widget, status_var=None):
+        self._root = root
+        self._widget = widget
+        self._status_var = status_var
+        self._line_count = int(widget.index("end-1c").split(".")[0]) - 1
+        root.after(self.interval_ms, self._pump)
+
+    def close(self):
+        with self._file_cond:
+            self._closed = True
+            self._file_cond.notify()
+        self._writer.join()
+        self._file_handler.close()
+
+    def _drain(self):
+        lines = []
+        last_status = None
+        while True:
+            try:
+                source, line = self._buffer.popleft()
+            except IndexError:
+                break
+            lines.append(line)
+            if source is None:
+                last_status = line
+        return lines, last_status
+
+    def _pump(self):
+        try:
+            lines, last_status = self._drain()
+            if lines:
+                self._widget.insert("end", "\n".join(lines) + "\n")
+                self._line_count += len(lines)
+                excess = self._line_count - self.max_lines
+                if excess > 0:
+                    self._widget.delete("1.0", f"{excess + 1}.0")
+                    self._line_count -= excess
+                self._widget.see("end")
+            if last_status is not None and self._status_var is not None:
+                self._status_var.set(last_status)
+        finally:
+            self._root.after(self.interval_ms, self._pump)
+
@@ -0,0 +1,138 @@
+import os
+import re
+
+# 每個 JVM 除了 heap 以外還需要的記憶體（metaspace、code cache、執行緒堆疊、direct buffer）
+JVM_OVERHEAD_RATIO = 0.2
+JVM_OVERHEAD_MB = 128
+
+MIN_HEAP_MB = {"paper": 1024, "bungee": 256}
+# 超過約 31G 會失去 compressed oops，反而更浪費
+MAX_HEAP_MB = 31 * 1024
+HEAP_STEP_MB = 128
+
+DEFAULT_WEIGHTS = {"paper": 4, "bungee": 1}
+
+
+def _windows_memory_status():
+    import ctypes
+
+    class MEMORYSTATUSEX(ctypes.Structure):
+        _fields_ = [("dwLength", ctypes.c_ulong), ("dwMemoryLoad", ctypes.c_ulong),
+                    ("ullTotalPhys", ctypes.c_ulonglong), ("ullAvailPhys", ctypes.c_ulonglong),
+                    ("ullTotalPageFile", ctypes.c_ulonglong), ("ullAvailPageFile", ctypes.c_ulonglong),
+                    ("ullTotalVirtual", ctypes.c_ulonglong), ("ullAvailVirtual", ctypes.c_ulonglong),
+                    ("ullAvailExtendedVirtual", ctypes.c_ulonglong)]
+
+    status = MEMORYSTATUSEX()
+    status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+    ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status))
+    return status
+
+def host_total_memory_mb():
+    """讀取實體記憶體總量（MB）"""
+    if os.name == "nt":
+        return _windows_memory_status().ullTotalPhys // (1024 * 1024)
+    if os.path.exists("/proc/meminfo"):
+        with open("/proc/meminfo", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("MemTotal:"):
+                    return int(line.split()[1]) // 1024
+    return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // (1024 * 1024)
+
+def host_available_memory_mb():
+    """目前可用的記憶體（MB，Linux 為 MemAvailable）；無法取得時回傳 None"""
+    if os.name == "nt":
+        return _windows_memory_status().ullAvailPhys // (1024 * 1024)
+    if os.path.exists("/proc/meminfo"):
+        with open("/proc/meminfo", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    return None
+
+def default_headroom_mb(total_mb):
+    # 保留給作業系統、檔案快取與 CraftControl 本身：15%，至少 1GB
+    return max(1024, int(total_mb * 0.15))
+
+def footprint_mb(heap_mb):
+    """估計一個 JVM 的實際常駐記憶體"""
+    return int(heap_mb * (1 + JVM_OVERHEAD_RATIO)) + JVM_OVERHEAD_MB
+
+def plan_memory(servers, weights=None, total_mb=None, headroom_mb=None):
+    """依權重把可用記憶體分配給每台伺服器的 heap
+
+    servers 為 {name: kind}；回傳 (plan, warnings)，plan 為 {name: heap MB}。
+    可用量不足以給每台最低 heap 時，仍回傳最低值並在 warnings 說明超額多少。
+    """
+    weights = weights or {}
+    total_mb = total_mb or host_total_memory_mb()
+    headroom_mb = default_headroom_mb(total_mb) if headroom_mb is None else headroom_mb
+    budget = total_mb - headroom_mb - JVM_OVERHEAD_MB * len(servers)
+    server_weights = {name: weights.get(name, DEFAULT_WEIGHTS[kind]) for name, kind in servers.items()}
+    total_weight = sum(server_weights.values()) or 1
+
+    plan = {}
+    for name, kind in servers.items():
+        share = budget * server_weights[name] / total_weight / (1 + JVM_OVERHEAD_RATIO)
+        heap = int(share // HEAP_STEP_MB * HEAP_STEP_MB)
+        plan[name] = min(max(heap, MIN_HEAP_MB[kind]), MAX_HEAP_MB)
+
+    return plan, check_plan(plan, total_mb, headroom_mb)
+
+def planned_usage_mb(plan):
+    return sum(footprint_mb(heap) for heap in plan.values())
+
+def check_plan(plan, total_mb=None, headroom_mb=None):
+    """回傳計畫的警告訊息；空 list 代表安全"""
+    total_mb = total_mb or host_total_memory_mb()
+    headroom_mb = default_headroom_mb(total_mb) if headroom_mb is None else headroom_mb
+    used = planned_usage_mb(plan)
+    warnings = []
+    if used > total_mb:
+        warnings.append(f"預估用量 {used} MB 超過實體記憶體 {total_mb} MB，可能觸發 OOM killer")
+    elif used > total_mb - headroom_mb:
+        warnings.append(f"預估用量 {used} MB 已侵佔保留空間（實體 {total_mb} MB，保留 {headroom_mb} MB）")
+    return warnings
+
+def jvm_flags(kind, heap_mb):
+    """依 heap 大小產生 JVM 參數：-Xms 等於 -Xmx、AlwaysPreTouch 與 Aikar 的 G1 參數"""
+    flags = [f"-Xms{heap_mb}M", f"-Xmx{heap_mb}M", "-XX:+UseG1GC", "-XX:+ParallelRefProcEnabled",
+             "-XX:+AlwaysPreTouch", "-XX:+DisableExplicitGC"]
+    if kind != "paper":
+        return flags + ["-XX:MaxGCPauseMillis=100"]
+
+    if heap_mb >= 12 * 1024:
+        new_size, max_new_size, region, reserve, ihop = 40, 50, "16M", 15, 20
+    elif heap_mb >= 4 * 1024:
+        new_size, max_new_size, region, reserve, ihop = 30, 40, "8M", 20, 15
+    else:
+        new_size, max_new_size, region, reserve, ihop = 30, 40, "4M", 20, 15
+    return flags + [
+        "-XX:MaxGCPauseMillis=200",
+        "-XX:+UnlockExperimentalVMOptions",
+        f"-XX:G1NewSizePercent={new_size}",
+        f"-XX:G1MaxNewSizePercent={max_new_size}",
+        f"-XX:G1HeapRegionSize={region}",
+        f"-XX:G1ReservePercent={reserve}",
+        "-XX:G1HeapWastePercent=5",
+        "-XX:G1MixedGCCountTarget=4",
+        f"-XX:InitiatingHeapOccupancyPercent={ihop}",
+        "-XX:G1MixedGCLiveThresholdPercent=90",
+        "-XX:G1RSetUpdatingPauseTimePercent=5",
+        "-XX:SurvivorRatio=32",
+        "-XX:+PerfDisableSharedMem",
+        "-XX:MaxTenuringThreshold=1",
+        "-Dusing.aikars.flags=https://mcflags.emc.gs",
+        "-Daikars.new.flags=true",
+    ]
+
+def read_heap_mb(script_path):
+    """從啟動腳本讀出目前的 -Xmx（MB）；找不到時回傳 None"""
+    if not os.path.exists(script_path):
+        return None
+    with open(script_path, "r", encoding="utf-8", errors="replace") as f:
+        match = re.search(r"-Xmx(\d+)([MmGg])", f.read())
+    if not match:
+        return None
+    value = int(match.group(1))
+    return value * 1024 if match.group(2).lower() == "g" else value
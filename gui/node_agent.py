@@ -0,0 +1,216 @@
+import hashlib
+import hmac
+import json
+import os
+import queue
+import socket
+import struct
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from gui.memory_planner import host_available_memory_mb, planned_usage_mb
+
+DEFAULT_NODE_PORT = 8766
+PROTOCOL_VERSION = 1
+
+# 封包格式：4 bytes 長度 + 1 byte 旗標 + JSON（超過 COMPRESS_MIN 時以 zlib 壓縮）
+_HEADER = struct.Struct(">IB")
+FLAG_ZLIB = 1
+COMPRESS_MIN = 1024
+MAX_FRAME = 16 * 1024 * 1024
+# 一個封包最多合併的請求 / 回應數
+MAX_BATCH = 256
+AUTH_TIMEOUT = 10
+# 驗證階段的封包（hello / nonce 回應）都只有幾十 bytes
+AUTH_MAX_FRAME = 4096
+
+
+class NodeError(Exception):
+    pass
+
+
+def send_frame(sock, obj):
+    data = json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    flags = 0
+    if len(data) >= COMPRESS_MIN:
+        data = zlib.compress(data, 1)
+        flags = FLAG_ZLIB
+    sock.sendall(_HEADER.pack(len(data), flags) + data)
+
+def _recv_exact(sock, n):
+    data = bytearray()
+    while len(data) < n:
+        chunk = sock.recv(min(n - len(data), 1024 * 1024))
+        if not chunk:
+            raise ConnectionError("連線已中斷")
+        data.extend(chunk)
+    return bytes(data)
+
+def recv_frame(sock, authenticated=True):
+    """讀取一個封包；解壓縮後同樣不得超過 MAX_FRAME。驗證完成前只接受不超過
+    AUTH_MAX_FRAME 的未壓縮封包，避免未驗證的連線耗盡記憶體"""
+    length, flags = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    limit = MAX_FRAME if authenticated else AUTH_MAX_FRAME
+    if length > limit:
+        raise NodeError(f"封包過大：{length} bytes")
+    if flags & FLAG_ZLIB and not authenticated:
+        raise NodeError("驗證完成前不接受壓縮封包")
+    data = _recv_exact(sock, length)
+    if flags & FLAG_ZLIB:
+        decompressor = zlib.decompressobj()
+        data = decompressor.decompress(data, MAX_FRAME)
+        if decompressor.unconsumed_tail or not decompressor.eof:
+            raise NodeError(f"解壓縮後封包過大或不完整（上限 {MAX_FRAME} bytes）")
+    return json.loads(data.decode("utf-8"))
+
+def auth_digest(token, nonce):
+    return hmac.new(token.encode("utf-8"), nonce.encode("ascii"), hashlib.sha256).hexdigest()
+
+def batch_writer(sock, outbox, on_error):
+    """把 outbox 中已排隊的訊息合併成一個封包送出；收到 None 時結束"""
+    while True:
+        item = outbox.get()
+        if item is None:
+            return
+        batch = [item]
+        while len(batch) < MAX_BATCH:
+            try:
+                item = outbox.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                outbox.put(None)
+                break
+            batch.append(item)
+        try:
+            send_frame(sock, batch)
+        except (OSError, ValueError) as e:
+            on_error(e)
+            return
+
+
+class NodeAgent:
+    """在每台主機上執行，透過驗證過的 TCP 連線把本機的 Engine 提供給控制端
+
+    連線建立後先以 HMAC-SHA256（共用 token）回應 nonce 完成驗證。之後每個封包
+    是一組請求 [{id, method, params}]，各請求在執行緒池中同時處理，完成的回應
+    [{id, result | error}] 會合併成封包送回，因此同一條連線上可以同時進行多個
+    請求，慢的請求（例如補齊檔案）不會卡住其他請求。
+    """
+
+    def __init__(self, engine, name, host="0.0.0.0", port=DEFAULT_NODE_PORT, token=None, workers=16):
+        if not token:
+            raise ValueError("node agent 必須設定 token")
+        self.engine = engine
+        self.name = name
+        self.host = host
+        self.port = port
+        self.token = token
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="node")
+        self._sock = None
+        self._stop = threading.Event()
+        # 同時新增兩台時避免取得同一個編號
+        self._add_lock = threading.Lock()
+        self.methods = {
+            "info": self.info,
+            "status": lambda: engine.status(),
+            "memory": self.memory,
+            "start": lambda name: engine.start(name),
+            "stop": lambda name: engine.stop(name),
+            "start_all": lambda names=None: engine.start_all(names),
+            "stop_all": lambda names=None: engine.stop_all(names),
+            "command": lambda name, command: engine.send_command(name, command),
+            "broadcast": lambda command, names=None, via="auto": engine.broadcast(command, names, via),
+            "console": lambda name, lines=100: engine.console(name, lines),
+            "telemetry": lambda name, window=60: {"current": engine.telemetry.current(name),
+                                                  "stats": engine.telemetry.stats(name, window)},
+            "provision": lambda version, names=None: engine.provision(version, names),
+            "add_server": self.add_server,
+        }
+
+    def add_server(self, version):
+        with self._add_lock:
+            return self.engine.add_paper_server(version)
+
+    def info(self):
+        return {"node": self.name, "protocol": PROTOCOL_VERSION, "servers": list(self.engine.server_paths)}
+
+    def memory(self):
+        """placement 用：free_mb 為扣除保留空間與所有已設定伺服器（不論是否運行）後剩餘的量"""
+        summary = self.engine.memory_summary()
+        committed = planned_usage_mb(self.engine.current_heaps())
+        return {
+            "total_mb": summary["total_mb"],
+            "headroom_mb": summary["headroom_mb"],
+            "committed_mb": committed,
+            "available_mb": host_available_memory_mb(),
+            "free_mb": summary["total_mb"] - summary["headroom_mb"] - committed,
+        }
+
+    def start(self):
+        """在背景執行緒接受連線，回傳實際監聽的 port"""
+        self._sock = socket.create_server((self.host, self.port))
+        self.port = self._sock.getsockname()[1]
+        threading.Thread(target=self._accept_loop, daemon=True, name="node-agent").start()
+        return self.port
+
+    def _accept_loop(self):
+        while not self._stop.is_set():
+            try:
+                conn, addr = self._sock.accept()
+            except OSError:
+                break
+            threading.Thread(target=self._handle, args=(conn, addr), daemon=True,
+                             name=f"node-conn-{addr[0]}:{addr[1]}").start()
+
+    def shutdown(self):
+        self._stop.set()
+        if self._sock is not None:
+            self._sock.close()
+        self._pool.shutdown(wait=False)
+
+    def _authenticate(self, conn):
+        nonce = os.urandom(16).hex()
+        conn.settimeout(AUTH_TIMEOUT)
+        send_frame(conn, {"node": self.name, "protocol": PROTOCOL_VERSION, "nonce": nonce})
+        reply = recv_frame(conn, authenticated=False)
+        ok = isinstance(reply, dict) and hmac.compare_digest(str(reply.get("auth", "")),
+                                                             auth_digest(self.token, nonce))
+        send_frame(conn, {"ok": ok})
+        conn.settimeout(None)
+        return ok
+
+    def _handle(self, conn, addr):
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        outbox = queue.Queue()
+        try:
+            if not self._authenticate(conn):
+                self.engine.log(f"⚠️ 拒絕未通過驗證的連線：{addr[0]}")
+                return
+            threading.Thread(target=batch_writer, args=(conn, outbox, lambda e: conn.close()),
+                             daemon=True).start()
+            while True:
+                for request in recv_frame(conn):
+                    self._pool.submit(self._dispatch, request, outbox)
+        except (OSError, ConnectionError, ValueError, NodeError, struct.error, zlib.error):
+            pass
+        finally:
+            outbox.put(None)
+            conn.close()
+
+    def _dispatch(self, request, outbox):
+        request_id = request.get("id")
+        method = self.methods.get(request.get("method"))
+        if method is None:
+            outbox.put({"id": request_id, "error": f"未知的方法：{request.get('method')}"})
+            return
+        params = request.get("params") or {}
+        if "name" in params and params["name"] not in self.engine.server_paths:
+            outbox.put({"id": request_id, "error": f"找不到伺服器：{params['name']}"})
+            return
+        try:
+            outbox.put({"id": request_id, "result": method(**params)})
+        except Exception as e:
+            outbox.put({"id": request_id, "error": str(e) or type(e).__name__})
+
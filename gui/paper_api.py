@@ -0,0 +1,128 @@
+import json
+import os
+import threading
+import time
+
+from gui.config_manager import get_base_dir
+from gui.downloader import get_session
+
+# 環境變數可改指向本機替身（見 benchmarks/）
+PAPER_API = os.environ.get("CRAFTCONTROL_PAPER_API", "https://api.papermc.io/v2/projects/paper")
+BUNGEE_URL = os.environ.get(
+    "CRAFTCONTROL_BUNGEE_URL",
+    "https://ci.md-5.net/job/BungeeCord/lastSuccessfulBuild/artifact/bootstrap/target/BungeeCord.jar")
+
+# 本機 metadata 快取：版本清單、build 清單、下載檔名與 checksum
+CACHE_PATH = os.path.join(get_base_dir(), "cache", "paper_meta.json")
+
+VERSIONS_TTL = 60 * 60
+BUILDS_TTL = 10 * 60
+# 單一 build 的內容不會再改變
+BUILD_INFO_TTL = None
+
+_cache = None
+_cache_lock = threading.Lock()
+_refreshing = set()
+
+
+def _load_cache():
+    global _cache
+    if _cache is None:
+        try:
+            with open(CACHE_PATH, "r", encoding="utf-8") as f:
+                _cache = json.load(f)
+        except (OSError, ValueError):
+            _cache = {}
+    return _cache
+
+def _save_cache():
+    os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+    tmp_path = CACHE_PATH + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(_cache, f)
+    os.replace(tmp_path, CACHE_PATH)
+
+def _revalidate(url):
+    """帶 ETag / If-Modified-Since 重新驗證，回傳最新資料；304 時沿用快取"""
+    with _cache_lock:
+        entry = dict(_load_cache().get(url) or {})
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+
+    r = get_session().get(url, headers=headers, timeout=15)
+    if r.status_code == 304 and "data" in entry:
+        entry["fetched_at"] = time.time()
+    else:
+        r.raise_for_status()
+        entry = {
+            "data": r.json(),
+            "etag": r.headers.get("ETag"),
+            "last_modified": r.headers.get("Last-Modified"),
+            "fetched_at": time.time(),
+        }
+    with _cache_lock:
+        _load_cache()[url] = entry
+        _save_cache()
+    return entry["data"]
+
+def _background_refresh(url, on_update):
+    def task():
+        try:
+            with _cache_lock:
+                old = (_load_cache().get(url) or {}).get("data")
+            data = _revalidate(url)
+            if on_update and data != old:
+                on_update(data)
+        except Exception:
+            pass
+        finally:
+            with _cache_lock:
+                _refreshing.discard(url)
+
+    with _cache_lock:
+        if url in _refreshing:
+            return
+        _refreshing.add(url)
+    threading.Thread(target=task, daemon=True).start()
+
+def get_json(url, ttl, on_update=None, fresh=False):
+    """讀取 API 並快取
+
+    快取未過期直接回傳；過期則先回傳舊資料並在背景重新驗證（stale-while-revalidate），
+    有新資料時呼叫 on_update(data)。完全沒有快取才會同步連網。fresh=True 時一律同步
+    重新驗證（有 ETag 時通常只是一個 304），連網失敗直接拋出例外，不會退回舊資料。
+    """
+    with _cache_lock:
+        entry = _load_cache().get(url)
+    if entry is None or fresh:
+        return _revalidate(url)
+    if ttl is None or time.time() - entry["fetched_at"] < ttl:
+        return entry["data"]
+    _background_refresh(url, on_update)
+    return entry["data"]
+
+def get_versions(on_update=None):
+    callback = (lambda data: on_update(data.get("versions", []))) if on_update else None
+    return get_json(PAPER_API, VERSIONS_TTL, callback).get("versions", [])
+
+def get_builds(version, fresh=False):
+    return get_json(f"{PAPER_API}/versions/{version}", BUILDS_TTL, fresh=fresh)["builds"]
+
+def get_build_download(version, build):
+    """回傳 (檔名, sha256, 下載網址)"""
+    data = get_json(f"{PAPER_API}/versions/{version}/builds/{build}", BUILD_INFO_TTL)
+    app = data["downloads"]["application"]
+    url = f"{PAPER_API}/versions/{version}/builds/{build}/downloads/{app['name']}"
+    return app["name"], app["sha256"], url
+
+def get_latest_download(version, fresh=False):
+    """回傳指定版本最新 build 的 (build, 檔名, sha256, 下載網址)
+
+    fresh=True 時 build 清單一定向 API 重新確認，用於必須拿到真正最新 build 的場合（滾動更新）
+    """
+    latest = get_builds(version, fresh)[-1]
+    name, sha256, url = get_build_download(version, latest)
+    return latest, name, sha256, url
@@ -0,0 +1,153 @@
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from gui.artifact_store import fetch_artifact, materialize
+from gui.downloader import download_file
+from gui.memory_planner import jvm_flags
+from gui.paper_api import get_latest_download, BUNGEE_URL
+
+IS_WINDOWS = os.name == "nt"
+
+# 下載進度最短回報間隔（秒），避免大量 callback 拖慢 UI
+PROGRESS_INTERVAL = 0.5
+# 記錄每個伺服器目前安裝的 Paper build，滾動更新時用來比對
+BUILD_INFO_FILE = ".craftcontrol-build.json"
+
+
+def server_kind(name):
+    return "paper" if "paper" in name.lower() else "bungee"
+
+def jar_name(kind):
+    return "paper.jar" if kind == "paper" else "BungeeCord.jar"
+
+def write_start_script(script_path, kind="paper", heap_mb=None):
+    jar = jar_name(kind)
+    args = " nogui" if kind == "paper" else ""
+    flags = " ".join(jvm_flags(kind, heap_mb or default_heap_mb(kind)))
+    if IS_WINDOWS:
+        folder_abs = os.path.abspath(os.path.dirname(script_path))
+        content = f"""@echo off
+cd /d "{folder_abs}"
+java {flags} -jar {jar}{args}
+set EXIT_CODE=%ERRORLEVEL%
+if not defined CRAFTCONTROL_MANAGED pause
+exit /b %EXIT_CODE%
+"""
+    else:
+        content = f"""#!/bin/bash
+java {flags} -jar {jar}{args}
+EXIT_CODE=$?
+# 由 CraftControl 啟動時不等待 Enter，讓監看程式能立即得知結束代碼
+[ -n "$CRAFTCONTROL_MANAGED" ] || read -p "Press Enter to exit..."
+exit $EXIT_CODE
+"""
+    with open(script_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    if not IS_WINDOWS:
+        os.chmod(script_path, 0o755)
+
+def read_build_info(folder):
+    """讀取 CraftControl 記錄的 paper.jar 版本 {"version", "build", "sha256"}；沒有紀錄時回傳 None"""
+    path = os.path.join(folder, BUILD_INFO_FILE)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def write_build_info(folder, version, build, sha256):
+    with open(os.path.join(folder, BUILD_INFO_FILE), "w", encoding="utf-8") as f:
+        json.dump({"version": version, "build": build, "sha256": sha256}, f)
+
+def default_heap_mb(kind):
+    return 2048 if kind == "paper" else 512
+
+
+class _Throughput:
+    """累計下載位元組並以固定間隔回報 MB/s"""
+
+    def __init__(self, name, progress):
+        self.name = name
+        self.progress = progress
+        self.start = time.monotonic()
+        self.last_report = 0.0
+
+    def __call__(self, done, total):
+        now = time.monotonic()
+        if now - self.last_report < PROGRESS_INTERVAL and done != total:
+            return
+        self.last_report = now
+        elapsed = max(now - self.start, 1e-6)
+        mbps = done / elapsed / (1024 * 1024)
+        if total:
+            detail = f"下載中 {done / total:.0%} ({mbps:.1f} MB/s)"
+        else:
+            detail = f"下載中 {done / (1024 * 1024):.1f} MB ({mbps:.1f} MB/s)"
+        self.progress(self.name, "downloading", detail)
+
+
+def _needs_work(name, script_path, write_scripts):
+    folder = os.path.dirname(script_path)
+    missing_jar = not os.path.exists(os.path.join(folder, jar_name(server_kind(name))))
+    missing_script = write_scripts and not os.path.exists(script_path)
+    return missing_jar or missing_script
+
+def provision_fleet(server_paths, version, max_workers=4, progress=None, log=print, write_scripts=True):
+    """以有上限的執行緒池平行補齊每個伺服器的資料夾、啟動腳本與 jar
+
+    progress(name, state, detail) 會在背景執行緒被呼叫；state 為
+    "start" / "downloading" / "done" / "failed"。回傳 {name: 錯誤訊息}。
+    """
+    progress = progress or (lambda name, state, detail: None)
+    pending = {name: path for name, path in server_paths.items()
+               if _needs_work(name, path, write_scripts)}
+    if not pending:
+        return {}
+
+    # Paper API 只查詢一次，所有 worker 共用同一個 artifact
+    paper_build = None
+    if any(server_kind(name) == "paper" for name in pending):
+        paper_build = get_latest_download(version)
+        log(f"使用 Paper {version} Build {paper_build[0]}")
+
+    def provision_one(name, script_path):
+        kind = server_kind(name)
+        progress(name, "start", "準備中")
+        folder = os.path.dirname(script_path)
+        os.makedirs(folder, exist_ok=True)
+
+        if write_scripts and not os.path.exists(script_path):
+            write_start_script(script_path, kind)
+            log(f"✅ 已補上啟動腳本：{name}")
+
+        jar_path = os.path.join(folder, jar_name(kind))
+        if os.path.exists(jar_path):
+            return
+        if kind == "paper":
+            _, _, sha256, jar_url = paper_build
+            # 同一個 sha256 只有第一個 worker 會真的下載，其餘等待後直接連結
+            fetch_artifact(jar_url, sha256, progress=_Throughput(name, progress))
+            method = materialize(sha256, jar_path)
+            write_build_info(folder, version, paper_build[0], sha256)
+            log(f"✅ 已補上 paper.jar：{name} ({method})")
+        else:
+            # BungeeCord 沒有公開 checksum，直接串流下載
+            download_file(BUNGEE_URL, jar_path, progress=_Throughput(name, progress))
+            log(f"✅ 已補上 BungeeCord.jar：{name}")
+
+    failures = {}
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="provision") as pool:
+        futures = {pool.submit(provision_one, name, path): name for name, path in pending.items()}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                future.result()
+                progress(name, "done", "完成")
+            except Exception as e:
+                failures[name] = str(e)
+                progress(name, "failed", str(e))
+    return failures
@@ -0,0 +1,74 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from gui.controller import is_server_running, start_server, stop_server, wait_until_ready
+from gui.provisioner import server_kind
+
+
+def stop_command(server_name):
+    return "end" if server_kind(server_name) == "bungee" else "stop"
+
+def split_tiers(server_names):
+    """依相依順序分組：後端 Paper 在前，BungeeCord 代理在後"""
+    backends = [name for name in server_names if server_kind(name) == "paper"]
+    proxies = [name for name in server_names if server_kind(name) == "bungee"]
+    return backends, proxies
+
+def start_fleet(server_paths, concurrency=2, ready_timeout=180, ports=None, log=print, start_fn=None,
+                host="127.0.0.1"):
+    """分批啟動：同時暖機的伺服器不超過 concurrency 台，一台就緒才放行下一台
+
+    就緒以 console 字樣或 host 上的 port 開始監聽為準。
+    後端全部處理完後才啟動 BungeeCord。回傳 {name: 錯誤訊息}。
+    """
+    ports = ports or {}
+    start_fn = start_fn or (lambda name: start_server(name, server_paths[name]))
+    failures = {}
+    begin = time.monotonic()
+
+    def start_and_wait(name):
+        if is_server_running(name):
+            return
+        success, msg = start_fn(name)
+        if not success:
+            failures[name] = msg
+            log(f"❌ {name} 啟動失敗：{msg}")
+            return
+        t0 = time.monotonic()
+        if wait_until_ready(name, timeout=ready_timeout, port=ports.get(name), host=host):
+            log(f"✅ {name} 已就緒（{time.monotonic() - t0:.1f}s）")
+        else:
+            failures[name] = "未在時限內就緒或程序已結束"
+            log(f"❌ {name} 未在 {ready_timeout}s 內就緒")
+
+    backends, proxies = split_tiers(server_paths)
+    for tier in (backends, proxies):
+        if not tier:
+            continue
+        # worker 數即同時暖機上限，每個 worker 等到伺服器就緒才接下一台
+        with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="start") as pool:
+            list(pool.map(start_and_wait, tier))
+
+    log(f"全部啟動流程完成，共耗時 {time.monotonic() - begin:.1f}s")
+    return failures
+
+def stop_fleet(server_names, concurrency=8, log=print, stop_fn=None):
+    """反向停止：先停 BungeeCord 代理，再平行停止所有後端。回傳 {name: 錯誤訊息}"""
+    stop_fn = stop_fn or (lambda name: stop_server(name, stop_command(name)))
+    failures = {}
+
+    def stop_one(name):
+        if not is_server_running(name):
+            return
+        success, msg = stop_fn(name)
+        log(msg)
+        if not success:
+            failures[name] = msg
+
+    backends, proxies = split_tiers(server_names)
+    for name in proxies:
+        stop_one(name)
+    if backends:
+        with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="stop") as pool:
+            list(pool.map(stop_one, backends))
+    return failures
@@ -0,0 +1,264 @@
+import os
+import re
+import threading
+
+DEFAULT_PAPER_PORT = 25565
+DEFAULT_BUNGEE_PORT = 25577
+DEFAULT_BACKEND_BASE_PORT = 25566
+# RCON port 為遊戲 port 加上這個位移
+RCON_PORT_OFFSET = 10000
+
+# {路徑: ((mtime_ns, size), 原始文字, 解析結果)}；檔案沒變就不重新讀取
+_cache = {}
+_cache_lock = threading.Lock()
+
+_BUNGEE_TEMPLATE = """listeners:
+- query_port: {port}
+  motd: '&1CraftControl'
+  query_enabled: false
+  priorities:
+  - lobby
+  host: 0.0.0.0:{port}
+  max_players: 100
+  force_default_server: true
+ip_forward: true
+online_mode: true
+"""
+_TOP_LEVEL_KEY = re.compile(r"^[A-Za-z_][\w-]*:")
+
+
+def _stat_key(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+def _read_cached(path, parse=None):
+    """讀取文字檔（與 parse 後的結果），以 mtime + size 快取；檔案不存在時回傳 (None, None)"""
+    key = _stat_key(path)
+    if key is None:
+        return None, None
+    with _cache_lock:
+        cached = _cache.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1], cached[2]
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        text = f.read()
+    parsed = parse(text) if parse else None
+    with _cache_lock:
+        _cache[path] = (key, text, parsed)
+    return text, parsed
+
+def _uses_crlf(path):
+    # _read_cached 以一般文字模式讀取，看不到原本的換行字元
+    try:
+        with open(path, "rb") as f:
+            return b"\r\n" in f.read(4096)
+    except OSError:
+        return False
+
+def _write_if_changed(path, text, parse=None, newline="\n"):
+    """內容有變才寫入（先寫暫存檔再替換），回傳是否有寫入"""
+    current, _ = _read_cached(path)
+    if current == text:
+        return False
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8", newline=newline) as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+    with _cache_lock:
+        _cache[path] = (_stat_key(path), text, parse(text) if parse else None)
+    return True
+
+def _parse_properties(text):
+    props = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith(("#", "!")) or "=" not in line:
+            continue
+        key, value = line.split("=", 1)
+        props[key.strip()] = value.strip()
+    return props
+
+def read_properties(path):
+    """讀取 server.properties 為 dict，檔案不存在時回傳空 dict"""
+    _, props = _read_cached(path, _parse_properties)
+    return dict(props or {})
+
+def update_properties(path, updates):
+    """只改寫 updates 中有變動的鍵，其餘行（含註解與順序）保持原樣；回傳是否有寫入"""
+    text, props = _read_cached(path, _parse_properties)
+    updates = {key: str(value) for key, value in updates.items()}
+    if props is not None and all(props.get(k) == v for k, v in updates.items()):
+        return False
+
+    lines = text.splitlines() if text else ["#Minecraft server properties"]
+    remaining = dict(updates)
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if not stripped or stripped.startswith(("#", "!")) or "=" not in stripped:
+            continue
+        key = stripped.split("=", 1)[0].strip()
+        if key in remaining:
+            lines[i] = f"{key}={remaining.pop(key)}"
+    lines.extend(f"{key}={value}" for key, value in remaining.items())
+    return _write_if_changed(path, "\n".join(lines) + "\n", _parse_properties)
+
+def _replace_block(text, key, block):
+    """以 block 取代最上層的 key 區段（含其縮排子項目），不存在則附加在最後"""
+    lines = text.splitlines()
+    new_lines = block.splitlines()
+    for start, line in enumerate(lines):
+        if line.startswith(f"{key}:"):
+            end = start + 1
+            while end < len(lines) and not _TOP_LEVEL_KEY.match(lines[end]):
+                end += 1
+            # 區段結尾的空行與最上層註解屬於下一個 key，保留下來
+            while end > start + 1 and (not lines[end - 1].strip() or lines[end - 1].startswith("#")):
+                end -= 1
+            lines[start:end] = new_lines
+            break
+    else:
+        lines.extend(new_lines)
+    return "\n".join(lines) + "\n"
+
+def _replace_listener_field(text, field, new_lines):
+    """取代第一個 listener 中的欄位（例如 host、priorities 清單）"""
+    lines = text.splitlines()
+    in_listeners = False
+    for i, line in enumerate(lines):
+        if line.startswith("listeners:"):
+            in_listeners = True
+            continue
+        if in_listeners and _TOP_LEVEL_KEY.match(line):
+            break
+        if in_listeners and line.lstrip("- ").startswith(f"{field}:"):
+            indent = line[:len(line) - len(line.lstrip("- "))]
+            end = i + 1
+            # 清單型欄位的子項目以 "  -" 開頭
+            while end < len(lines) and lines[end].startswith(" " * len(indent) + "-"):
+                end += 1
+            lines[i:end] = [indent + new_lines[0]] + [" " * len(indent) + l for l in new_lines[1:]]
+            break
+    return "\n".join(lines) + "\n"
+
+def _read_bungee_port(config_path):
+    # 只取 listeners 第一個 host 欄位，例如 "host: 0.0.0.0:25577"
+    text, _ = _read_cached(config_path)
+    if text is None:
+        return None
+    for line in text.splitlines():
+        stripped = line.strip().lstrip("- ")
+        if stripped.startswith("host:"):
+            address = stripped.split(":", 1)[1].strip().strip("'\"")
+            try:
+                return int(address.rsplit(":", 1)[1])
+            except (IndexError, ValueError):
+                return None
+    return None
+
+def get_server_port(server_name, script_path):
+    folder = os.path.dirname(script_path)
+    if "bungee" in server_name.lower():
+        return _read_bungee_port(os.path.join(folder, "config.yml")) or DEFAULT_BUNGEE_PORT
+    props = read_properties(os.path.join(folder, "server.properties"))
+    try:
+        return int(props.get("server-port", DEFAULT_PAPER_PORT))
+    except ValueError:
+        return DEFAULT_PAPER_PORT
+
+def allocate_ports(server_names, base_port=DEFAULT_BACKEND_BASE_PORT, proxy_port=DEFAULT_BUNGEE_PORT):
+    """依名稱順序為每台後端分配不重複的 port，略過 proxy 使用的 port；BungeeCord 固定為 proxy_port"""
+    ports = {}
+    next_port = base_port
+    for name in server_names:
+        if "bungee" in name.lower():
+            ports[name] = proxy_port
+            continue
+        while next_port == proxy_port:
+            next_port += 1
+        ports[name] = next_port
+        next_port += 1
+    return ports
+
+def bungee_server_id(script_path):
+    # BungeeCord 內部使用的伺服器名稱，取資料夾名稱（例如 paper1）
+    return os.path.basename(os.path.dirname(script_path))
+
+def enable_bungee_forwarding(spigot_path):
+    """在 spigot.yml 開啟 bungeecord 轉發；檔案不存在時寫入最小設定，其餘預設值由 Paper 補齊"""
+    text, _ = _read_cached(spigot_path)
+    if text is None:
+        return _write_if_changed(spigot_path, "settings:\n  bungeecord: true\n")
+    new_text, count = re.subn(r"(?m)^([ \t]+bungeecord:)[ \t]*\S+", r"\1 true", text)
+    if not count:
+        if re.search(r"(?m)^settings:", text):
+            new_text = re.sub(r"(?m)^settings:[ \t]*$", "settings:\n  bungeecord: true", text, count=1)
+        else:
+            new_text = text.rstrip("\n") + "\nsettings:\n  bungeecord: true\n"
+    return _write_if_changed(spigot_path, new_text)
+
+def write_bungee_config(config_path, backends, proxy_port=DEFAULT_BUNGEE_PORT, online_mode=True):
+    """產生 BungeeCord config.yml 的 servers 區段與 listener 設定
+
+    backends 為 {伺服器 id: (host, port)}，第一台為玩家預設進入的伺服器。
+    只改寫 CraftControl 管理的欄位，其他手動設定保持不變；回傳是否有寫入。
+    """
+    original, _ = _read_cached(config_path)
+    text = _BUNGEE_TEMPLATE.format(port=proxy_port) if original is None else original
+
+    servers = ["servers:"]
+    for server_id, (host, port) in backends.items():
+        servers += [f"  {server_id}:", f"    motd: '{server_id}'",
+                    f"    address: {host}:{port}", "    restricted: false"]
+    text = _replace_block(text, "servers", "\n".join(servers))
+    if backends:
+        # 玩家進入時預設連到第一台後端
+        text = _replace_listener_field(text, "priorities", ["priorities:", f"- {next(iter(backends))}"])
+    text = _replace_listener_field(text, "host", [f"host: 0.0.0.0:{proxy_port}"])
+    text = _replace_listener_field(text, "query_port", [f"query_port: {proxy_port}"])
+    text = _replace_block(text, "ip_forward", "ip_forward: true")
+    text = _replace_block(text, "online_mode", f"online_mode: {'true' if online_mode else 'false'}")
+    if text == original:
+        return False
+    # 在 Windows 上手動編輯過的檔案可能是 CRLF，寫回時維持原本的換行
+    return _write_if_changed(config_path, text, newline="\r\n" if _uses_crlf(config_path) else "\n")
+
+def configure_fleet(server_paths, base_port=DEFAULT_BACKEND_BASE_PORT, proxy_port=DEFAULT_BUNGEE_PORT,
+                    backend_host="127.0.0.1", online_mode=True, rcon_password=None):
+    """為整個伺服器群分配 port 並寫入各自的設定檔
+
+    後端 Paper 關閉 online-mode、開啟 bungeecord 轉發，並只監聽 backend_host，
+    避免玩家繞過 proxy 直接連線；正版驗證由 BungeeCord 負責。有 rcon_password
+    時同時開啟 RCON（port 為遊戲 port + RCON_PORT_OFFSET）。
+    回傳 ({name: port}, 有寫入的檔案數)。
+    """
+    ports = allocate_ports(server_paths, base_port, proxy_port)
+    changed = 0
+    backends = {}
+    proxy_config = None
+    for name, script_path in server_paths.items():
+        folder = os.path.dirname(script_path)
+        if not os.path.isdir(folder):
+            continue
+        if "bungee" in name.lower():
+            proxy_config = os.path.join(folder, "config.yml")
+            continue
+        backends[bungee_server_id(script_path)] = (backend_host, ports[name])
+        updates = {
+            "server-port": ports[name],
+            "server-ip": backend_host,
+            "online-mode": "false",
+        }
+        if rcon_password:
+            updates.update({
+                "enable-rcon": "true",
+                "rcon.port": ports[name] + RCON_PORT_OFFSET,
+                "rcon.password": rcon_password,
+            })
+        changed += update_properties(os.path.join(folder, "server.properties"), updates)
+        changed += enable_bungee_forwarding(os.path.join(folder, "spigot.yml"))
+    if proxy_config:
+        changed += write_bungee_config(proxy_config, backends, proxy_port, online_mode)
+    return ports, changed
@@ -0,0 +1,118 @@
+import re
+import tkinter as tk
+from tkinter import ttk
+
+COLUMNS = (
+    ("status", "狀態", 110),
+    ("players", "玩家", 70),
+    ("port", "Port", 70),
+    ("ram", "RAM", 80),
+    ("cpu", "CPU", 70),
+    ("tps", "TPS", 60),
+    ("uptime", "運行時間", 90),
+)
+
+STATUS_COLORS = {
+    "online": "green",
+    "starting": "orange",
+    "offline": "red",
+    "sleeping": "steel blue",
+    "unknown": "gray",
+}
+
+
+def _sort_key(value):
+    # 以開頭的數字排序（如 "3/20"、"512 MB"、"12.5%"），沒有數字的以字串排序
+    match = re.match(r"\d+(\.\d+)?", str(value))
+    if match:
+        return (0, float(match.group()))
+    return (1, str(value))
+
+
+class ServerTable(ttk.Frame):
+    """單一 Treeview 的伺服器清單
+
+    Treeview 只繪製可見的列；update_row() 只在該列內容改變時才重新設定，
+    所以每次更新的成本與「有變化的列數」成正比，而不是伺服器總數。
+    """
+
+    def __init__(self, parent, server_names, height=12):
+        super().__init__(parent)
+        self._order = list(server_names)
+        self._values = {}
+        self._hidden = set()
+        self._sort_column = None
+        self._sort_reverse = False
+
+        filter_bar = ttk.Frame(self)
+        filter_bar.pack(fill=tk.X, pady=(0, 3))
+        ttk.Label(filter_bar, text="篩選：").pack(side=tk.LEFT)
+        self.filter_var = tk.StringVar()
+        self.filter_var.trace_add("write", lambda *args: self.apply_filter())
+        ttk.Entry(filter_bar, textvariable=self.filter_var, width=20).pack(side=tk.LEFT)
+
+        body = ttk.Frame(self)
+        body.pack(fill=tk.BOTH, expand=True)
+        self.tree = ttk.Treeview(body, columns=[c[0] for c in COLUMNS], height=height, selectmode="extended")
+        self.tree.heading("#0", text="伺服器", command=lambda: self.sort_by("#0"))
+        self.tree.column("#0", width=130, anchor="w")
+        for key, title, width in COLUMNS:
+            self.tree.heading(key, text=title, command=lambda k=key: self.sort_by(k))
+            self.tree.column(key, width=width, anchor="center")
+        for state, color in STATUS_COLORS.items():
+            self.tree.tag_configure(state, foreground=color)
+        scrollbar = ttk.Scrollbar(body, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        empty = {key: "-" for key, _, _ in COLUMNS}
+        empty["status"] = "未知"
+        for name in self._order:
+            self.tree.insert("", tk.END, iid=name, text=name, tags=("unknown",),
+                             values=[empty[key] for key, _, _ in COLUMNS])
+            self._values[name] = (dict(empty), "unknown")
+
+    def update_row(self, name, values, state):
+        """values 為 {欄位: 顯示文字}；只有內容或狀態改變時才更新該列"""
+        previous, previous_state = self._values.get(name, ({}, None))
+        merged = dict(previous)
+        merged.update(values)
+        if merged == previous and state == previous_state:
+            return False
+        self._values[name] = (merged, state)
+        self.tree.item(name, values=[merged[key] for key, _, _ in COLUMNS], tags=(state,))
+        return True
+
+    def selected(self):
+        return list(self.tree.selection())
+
+    def bind_double_click(self, callback):
+        self.tree.bind("<Double-1>", lambda event: callback(self.tree.identify_row(event.y)))
+
+    def sort_by(self, column):
+        if self._sort_column == column:
+            self._sort_reverse = not self._sort_reverse
+        else:
+            self._sort_column, self._sort_reverse = column, False
+        if column == "#0":
+            # "Paper 10" 依編號排序，BungeeCord 排最前面
+            key = lambda name: _sort_key(name.rsplit(" ", 1)[-1]) if name[-1:].isdigit() else (-1, name)
+        else:
+            key = lambda name: _sort_key(self._values[name][0].get(column))
+        self._order.sort(key=key, reverse=self._sort_reverse)
+        self._reattach()
+
+    def apply_filter(self):
+        text = self.filter_var.get().strip().lower()
+        self._hidden = {
+            name for name in self._order
+            if text and text not in name.lower() and text not in self._values[name][0]["status"].lower()
+        }
+        self._reattach()
+
+    def _reattach(self):
+        for index, name in enumerate(name for name in self._order if name not in self._hidden):
+            self.tree.move(name, "", index)
+        for name in self._hidden:
+            self.tree.detach(name)
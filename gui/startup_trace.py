@@ -0,0 +1,45 @@
+import sys
+import time
+from contextlib import contextmanager
+
+# 啟動計時：記錄每個階段耗時與新載入的模組，搭配 --trace-startup 印出。
+# 需要逐模組的 import 明細時，可改用 python -X importtime main.py。
+
+_origin = time.perf_counter()
+_phases = []
+_open = {}
+enabled = "--trace-startup" in sys.argv
+
+
+def begin(name):
+    _open[name] = (time.perf_counter(), set(sys.modules))
+
+def end(name):
+    start, before = _open.pop(name)
+    elapsed = time.perf_counter() - start
+    new_modules = [m for m in sys.modules if m not in before]
+    _phases.append((name, elapsed, new_modules))
+
+@contextmanager
+def phase(name):
+    begin(name)
+    try:
+        yield
+    finally:
+        end(name)
+
+def mark(name):
+    """記錄從行程啟動到目前為止的時間點"""
+    _phases.append((name, None, time.perf_counter() - _origin))
+
+def report(file=None):
+    file = file or sys.stderr
+    print("=== CraftControl 啟動計時 ===", file=file)
+    for name, elapsed, extra in _phases:
+        if elapsed is None:
+            print(f"{name:<28} @ {extra * 1000:8.1f} ms", file=file)
+            continue
+        # 只列出頂層套件，避免子模組洗版
+        top_level = sorted({m.split(".")[0] for m in extra})
+        modules = f"  +{len(extra)} 模組 ({', '.join(top_level[:8])})" if extra else ""
+        print(f"{name:<28} {elapsed * 1000:10.1f} ms{modules}", file=file)
@@ -0,0 +1,170 @@
+import json
+import struct
+import threading
+import time
+
+# asyncio 只在背景輪詢執行緒中使用，延後 import 以縮短 GUI 啟動時間
+
+# Server List Ping 使用的協定版本；-1 代表「僅查詢狀態」，所有版本都接受
+SLP_PROTOCOL_VERSION = -1
+# 同時進行中的連線上限，避免一次開太多 socket
+MAX_CONCURRENT_PINGS = 256
+
+
+def _pack_varint(value):
+    value &= 0xFFFFFFFF
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+def _pack_string(text):
+    data = text.encode("utf-8")
+    return _pack_varint(len(data)) + data
+
+def _packet(packet_id, payload=b""):
+    body = _pack_varint(packet_id) + payload
+    return _pack_varint(len(body)) + body
+
+async def _read_varint(reader):
+    result = 0
+    for shift in range(0, 35, 7):
+        byte = (await reader.readexactly(1))[0]
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result
+    raise ValueError("VarInt 過長")
+
+def _varint_from(data, pos):
+    result = 0
+    for shift in range(0, 35, 7):
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+    raise ValueError("VarInt 過長")
+
+def _flatten_motd(description):
+    # MOTD 可能是純字串或 chat component
+    if isinstance(description, str):
+        return description
+    if isinstance(description, dict):
+        text = description.get("text", "")
+        for extra in description.get("extra", []):
+            text += _flatten_motd(extra)
+        return text
+    return ""
+
+async def _ping(host, port):
+    import asyncio
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        handshake = (_pack_varint(SLP_PROTOCOL_VERSION) + _pack_string(host)
+                     + struct.pack(">H", port) + _pack_varint(1))
+        writer.write(_packet(0x00, handshake) + _packet(0x00))
+        await writer.drain()
+
+        length = await _read_varint(reader)
+        data = await reader.readexactly(length)
+        packet_id, pos = _varint_from(data, 0)
+        if packet_id != 0x00:
+            raise ValueError(f"非預期的封包 {packet_id}")
+        str_len, pos = _varint_from(data, pos)
+        status = json.loads(data[pos:pos + str_len].decode("utf-8"))
+
+        sent = time.perf_counter()
+        writer.write(_packet(0x01, struct.pack(">q", int(sent * 1000))))
+        await writer.drain()
+        length = await _read_varint(reader)
+        await reader.readexactly(length)
+        latency = (time.perf_counter() - sent) * 1000
+    finally:
+        writer.close()
+
+    players = status.get("players", {})
+    return {
+        "online": True,
+        "players": players.get("online", 0),
+        "max_players": players.get("max", 0),
+        "motd": _flatten_motd(status.get("description", "")),
+        "latency_ms": round(latency, 1),
+    }
+
+async def ping(host, port, timeout=1.0):
+    """以 Server List Ping 查詢伺服器狀態；連線失敗時 online 為 False"""
+    import asyncio
+    try:
+        return await asyncio.wait_for(_ping(host, port), timeout)
+    except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+        return {"online": False, "players": 0, "max_players": 0, "motd": "", "latency_ms": None}
+
+async def ping_all(targets, host="127.0.0.1", timeout=1.0):
+    """同時查詢 {name: port}，整輪耗時約為一個 timeout"""
+    import asyncio
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_PINGS)
+
+    async def one(name, port):
+        async with semaphore:
+            result = await ping(host, port, timeout)
+        result["port"] = port
+        return name, result
+
+    results = await asyncio.gather(*(one(name, port) for name, port in targets.items()))
+    return dict(results)
+
+
+class StatusPoller:
+    """在背景執行緒以 asyncio 輪詢所有伺服器，只把有變化的結果交給 drain()"""
+
+    def __init__(self, get_targets, interval=3.0, timeout=1.0, host="127.0.0.1"):
+        self.get_targets = get_targets
+        self.interval = interval
+        self.timeout = timeout
+        self.host = host
+        self.latest = {}
+        # 尚未被 drain() 取走的變化；以名稱為鍵，所以大小不會超過伺服器數量
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True, name="status-poller")
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def poll_once(self):
+        import asyncio
+        results = asyncio.run(ping_all(self.get_targets(), self.host, self.timeout))
+        for name, result in results.items():
+            # latency 每次都會變動，不列入差異比較
+            previous = self.latest.get(name)
+            comparable = {k: v for k, v in result.items() if k != "latency_ms"}
+            if previous is None or {k: v for k, v in previous.items() if k != "latency_ms"} != comparable:
+                with self._pending_lock:
+                    self._pending[name] = result
+            self.latest[name] = result
+        return results
+
+    def drain(self):
+        """由 UI 執行緒呼叫，取出自上次以來有變化的結果"""
+        with self._pending_lock:
+            changed, self._pending = self._pending, {}
+        return changed
+
+    def _run(self):
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                self.poll_once()
+            except Exception:
+                pass
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
@@ -0,0 +1,193 @@
+import os
+import threading
+import time
+from array import array
+
+# 目前只支援 Linux /proc；其他平台取樣結果為空
+HAS_PROC = os.path.isdir("/proc/self")
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+METRICS = ("cpu_percent", "rss_bytes", "threads", "open_fds")
+
+
+def _format(value):
+    return f"{value:.2f}" if isinstance(value, float) else str(value)
+
+def _read_stat(pid):
+    """回傳 (utime + stime 的 ticks, 執行緒數, RSS bytes)"""
+    with open(f"/proc/{pid}/stat", "rb") as f:
+        data = f.read()
+    # comm 欄位可能含空白或括號，從最後一個 ')' 之後開始切
+    fields = data[data.rindex(b")") + 2:].split()
+    ticks = int(fields[11]) + int(fields[12])
+    return ticks, int(fields[17]), int(fields[21]) * PAGE_SIZE
+
+def _children(pid):
+    children = []
+    try:
+        for tid in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{tid}/children", "rb") as f:
+                children.extend(int(c) for c in f.read().split())
+    except OSError:
+        pass
+    return children
+
+def process_tree(pid):
+    """pid 及其所有子孫（啟動腳本底下的 java）"""
+    pids, stack = [], [pid]
+    while stack:
+        current = stack.pop()
+        pids.append(current)
+        stack.extend(_children(current))
+    return pids
+
+def sample_tree(pid):
+    """回傳 (cpu ticks, threads, rss bytes, open fds) 的總和；程序不存在時回傳 None"""
+    ticks = threads = rss = fds = 0
+    found = False
+    for p in process_tree(pid):
+        try:
+            t, n, r = _read_stat(p)
+            ticks, threads, rss = ticks + t, threads + n, rss + r
+            fds += len(os.listdir(f"/proc/{p}/fd"))
+            found = True
+        except (OSError, ValueError, IndexError):
+            continue
+    return (ticks, threads, rss, fds) if found else None
+
+
+class RingSeries:
+    """固定長度、以 array 儲存的時間序列，不會隨時間成長"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.timestamps = array("d", bytes(8 * capacity))
+        self.columns = {
+            "cpu_percent": array("f", bytes(4 * capacity)),
+            "rss_bytes": array("q", bytes(8 * capacity)),
+            "threads": array("l", bytes(array("l").itemsize * capacity)),
+            "open_fds": array("l", bytes(array("l").itemsize * capacity)),
+        }
+        self.count = 0
+        self.index = 0
+
+    def append(self, timestamp, values):
+        i = self.index
+        self.timestamps[i] = timestamp
+        for metric, value in values.items():
+            self.columns[metric][i] = value
+        self.index = (i + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def _ordered_indices(self, window=None):
+        n = self.count if window is None else min(window, self.count)
+        start = (self.index - n) % self.capacity
+        return [(start + k) % self.capacity for k in range(n)]
+
+    def latest(self):
+        if not self.count:
+            return None
+        i = (self.index - 1) % self.capacity
+        result = {metric: column[i] for metric, column in self.columns.items()}
+        result["timestamp"] = self.timestamps[i]
+        return result
+
+    def stats(self, metric, window=None):
+        """最近 window 筆（預設全部）的 min / avg / max"""
+        column = self.columns[metric]
+        values = [column[i] for i in self._ordered_indices(window)]
+        if not values:
+            return None
+        return {"min": min(values), "avg": sum(values) / len(values), "max": max(values)}
+
+    def rows(self):
+        for i in self._ordered_indices():
+            yield self.timestamps[i], {metric: column[i] for metric, column in self.columns.items()}
+
+
+class TelemetrySampler:
+    """定期取樣每台受監控伺服器的程序樹，寫入各自的 RingSeries
+
+    get_pids() 回傳 {name: pid 或 None}。每次取樣只讀 /proc 中少量檔案，
+    100 個程序每秒取樣的成本仍遠低於 1% CPU。
+    """
+
+    def __init__(self, get_pids, interval=1.0, capacity=3600):
+        self.get_pids = get_pids
+        self.interval = interval
+        self.capacity = capacity
+        self.series = {}
+        self._previous = {}
+        self._stop = threading.Event()
+
+    def start(self):
+        if not HAS_PROC:
+            return
+        threading.Thread(target=self._run, daemon=True, name="telemetry").start()
+
+    def stop(self):
+        self._stop.set()
+
+    def sample_once(self):
+        now = time.monotonic()
+        wall = time.time()
+        for name, pid in self.get_pids().items():
+            sample = sample_tree(pid) if pid else None
+            if sample is None:
+                self._previous.pop(name, None)
+                continue
+            ticks, threads, rss, fds = sample
+            previous = self._previous.get(name)
+            self._previous[name] = (pid, now, ticks)
+            if previous is None or previous[0] != pid:
+                continue
+            elapsed = now - previous[1]
+            cpu = (ticks - previous[2]) / CLOCK_TICKS / elapsed * 100 if elapsed > 0 else 0.0
+            series = self.series.get(name)
+            if series is None:
+                series = self.series[name] = RingSeries(self.capacity)
+            series.append(wall, {"cpu_percent": max(cpu, 0.0), "rss_bytes": rss,
+                                 "threads": threads, "open_fds": fds})
+
+    def current(self, name):
+        """最新一筆取樣；程序未執行時回傳 None"""
+        if name not in self._previous or name not in self.series:
+            return None
+        return self.series[name].latest()
+
+    def stats(self, name, window=None):
+        series = self.series.get(name)
+        if series is None:
+            return None
+        return {metric: series.stats(metric, window) for metric in METRICS}
+
+    def export_prometheus(self):
+        lines = []
+        for metric in METRICS:
+            lines.append(f"# TYPE craftcontrol_{metric} gauge")
+            for name in sorted(self._previous):
+                latest = self.current(name)
+                if latest is not None:
+                    label = name.replace("\\", "\\\\").replace('"', '\\"')
+                    lines.append(f'craftcontrol_{metric}{{server="{label}"}} {_format(latest[metric])}')
+        return "\n".join(lines) + "\n"
+
+    def export_csv(self, names=None):
+        lines = ["server,timestamp," + ",".join(METRICS)]
+        for name in names or sorted(self.series):
+            series = self.series.get(name)
+            if series is None:
+                continue
+            for timestamp, values in series.rows():
+                lines.append(f"{name},{timestamp:.3f}," + ",".join(_format(values[m]) for m in METRICS))
+        return "\n".join(lines) + "\n"
+
+    def _run(self):
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                self.sample_once()
+            except Exception:
+                pass
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
@@ -0,0 +1,125 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from gui.artifact_store import fetch_artifact, file_sha256, materialize
+from gui.controller import is_server_running, wait_until_ready
+from gui.paper_api import get_latest_download
+from gui.provisioner import jar_name, read_build_info, server_kind, write_build_info
+
+STAGED_SUFFIX = ".new"
+ROLLBACK_SUFFIX = ".old"
+# 重新啟動前給玩家的提示
+UPGRADE_NOTICE = "say 伺服器即將更新並重新啟動，將暫時把你傳送到其他伺服器"
+
+
+def installed_sha256(folder):
+    """目前 paper.jar 的 sha256：優先用紀錄，沒有紀錄時才計算"""
+    info = read_build_info(folder)
+    if info:
+        return info["sha256"]
+    jar_path = os.path.join(folder, jar_name("paper"))
+    return file_sha256(jar_path) if os.path.exists(jar_path) else None
+
+def _swap(folder, src_suffix, keep_suffix):
+    # paper.jar -> paper.jar<keep_suffix>，paper.jar<src_suffix> -> paper.jar
+    jar_path = os.path.join(folder, jar_name("paper"))
+    if os.path.exists(jar_path):
+        os.replace(jar_path, jar_path + keep_suffix)
+    os.replace(jar_path + src_suffix, jar_path)
+
+
+def rolling_upgrade(server_paths, version, start_fn, stop_fn, ports=None, batch_size=1, ready_timeout=180,
+                    notify_fn=None, log=print, host="127.0.0.1"):
+    """把 Paper 後端滾動更新到 version 的最新 build，BungeeCord 全程不停
+
+    先把新 jar 預先放到每個需要更新的資料夾（paper.jar.new），再以 batch_size 台為
+    一批：停止、換 jar、啟動並等待就緒後才處理下一批。新 build 無法就緒的伺服器
+    會換回舊 jar 重新啟動。未在運行的伺服器只換 jar。回傳 {name: 結果}，結果為
+    "upgraded" / "up-to-date" / "rolled-back" / 錯誤訊息。
+    """
+    ports = ports or {}
+    # 不能用可能過期的快取：否則會把所有伺服器誤判為已是最新
+    try:
+        build, _, sha256, url = get_latest_download(version, fresh=True)
+    except Exception as e:
+        raise RuntimeError(f"無法向 Paper API 確認 {version} 的最新 build：{e}") from e
+    log(f"檢查更新：Paper {version} 最新 Build {build}")
+
+    results, pending = {}, []
+    for name, script_path in server_paths.items():
+        if server_kind(name) != "paper":
+            continue
+        folder = os.path.dirname(script_path)
+        if installed_sha256(folder) == sha256:
+            results[name] = "up-to-date"
+            # 補上舊版本沒有的紀錄
+            if read_build_info(folder) is None:
+                write_build_info(folder, version, build, sha256)
+        else:
+            pending.append(name)
+    if not pending:
+        log("所有伺服器都已是最新 build")
+        return results
+
+    # 先下載一次並放進每個資料夾，重新啟動時只剩改名
+    fetch_artifact(url, sha256)
+    for name in pending:
+        jar_path = os.path.join(os.path.dirname(server_paths[name]), jar_name("paper"))
+        materialize(sha256, jar_path + STAGED_SUFFIX)
+    log(f"已預先放置新 jar：{len(pending)} 台待更新，每批 {batch_size} 台")
+
+    def upgrade_one(name):
+        folder = os.path.dirname(server_paths[name])
+        was_running = is_server_running(name)
+        if was_running:
+            if notify_fn:
+                notify_fn(name, UPGRADE_NOTICE)
+            success, msg = stop_fn(name)
+            if not success:
+                os.remove(os.path.join(folder, jar_name("paper") + STAGED_SUFFIX))
+                return msg
+        _swap(folder, STAGED_SUFFIX, ROLLBACK_SUFFIX)
+        if not was_running:
+            write_build_info(folder, version, build, sha256)
+            return "upgraded"
+
+        started = time.monotonic()
+        success, msg = start_fn(name)
+        if success and wait_until_ready(name, ready_timeout, ports.get(name), host):
+            write_build_info(folder, version, build, sha256)
+            log(f"✅ {name} 已更新至 Build {build}（{time.monotonic() - started:.1f}s 就緒）")
+            return "upgraded"
+
+        log(f"❌ {name} 新 build 無法就緒，換回舊 jar")
+        stop_fn(name)
+        if not os.path.exists(os.path.join(folder, jar_name("paper") + ROLLBACK_SUFFIX)):
+            return "新 build 無法就緒，且沒有舊 jar 可還原"
+        _swap(folder, ROLLBACK_SUFFIX, STAGED_SUFFIX)
+        os.remove(os.path.join(folder, jar_name("paper") + STAGED_SUFFIX))
+        success, msg = start_fn(name)
+        if not success or not wait_until_ready(name, ready_timeout, ports.get(name), host):
+            return f"已換回舊 jar，但仍無法就緒：{msg}"
+        return "rolled-back"
+
+    def safe_upgrade(name):
+        try:
+            return upgrade_one(name)
+        except Exception as e:
+            log(f"❌ {name} 更新失敗：{e}")
+            return str(e)
+
+    batch_size = max(1, batch_size)
+    with ThreadPoolExecutor(max_workers=batch_size, thread_name_prefix="upgrade") as pool:
+        for i in range(0, len(pending), batch_size):
+            batch = pending[i:i + batch_size]
+            log(f"更新第 {i // batch_size + 1} 批：{', '.join(batch)}")
+            for name, result in zip(batch, pool.map(safe_upgrade, batch)):
+                results[name] = result
+
+    not_upgraded = [name for name in pending if results[name] != "upgraded"]
+    if not_upgraded:
+        log(f"⚠️ 更新完成，但有 {len(not_upgraded)} 台未能更新：{', '.join(not_upgraded)}")
+    else:
+        log(f"✅ 已將 {len(pending)} 台伺服器更新至 Paper {version} Build {build}")
+    return results
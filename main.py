@@ -1,13 +1,22 @@
-import sys
-import tkinter as tk
-from tkinter import messagebox, simpledialog, ttk
-import os
-import requests
-import threading
-import webbrowser
-import subprocess
-from gui.controller import start_server, stop_server, is_server_running
-from gui.config_manager import get_paper_count, set_paper_count
+from gui import startup_trace
+from gui.startup_trace import phase
+
+with phase("import tkinter"):
+    import tkinter as tk
+    from tkinter import messagebox, simpledialog, ttk
+with phase("import gui"):
+    import os
+    import threading
+    import time
+    import subprocess
+    from gui.controller import is_server_running, add_output_listener, get_server_uptime
+    from gui.config_manager import get_paper_count, set_paper_count, get_base_dir
+    from gui.paper_api import get_versions
+    from gui.provisioner import write_start_script
+    from gui.engine import Engine, build_server_paths
+    from gui.log_index import parse_time
+    from gui.log_pipeline import LogPipeline
+    from gui.server_table import ServerTable
 
 APP_VERSION = "v1.0"
 IS_WINDOWS = os.name == "nt"
@@ -19,18 +28,21 @@ os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 # === GUI 變數先宣告 ===
 status_var = None
 log_box = None
-status_labels = {}
+slp_results = {}
+server_table = None
 paper_version_var = None
 paper_version_combo = None
 SERVER_PATHS = {}
 
 # === log 函式 - 請放前面，供其他函式調用 ===
 def log(msg):
-    if log_box:
-        log_box.insert(tk.END, msg + "\n")
-        log_box.see(tk.END)
-    if status_var:
-        status_var.set(msg)
+    # 可由任何執行緒呼叫，實際寫入 log_box 由 UI 端的 pump 批次處理
+    log_pipeline.push(msg)
+
+def open_url(url):
+    # webbrowser 只在點選時才載入
+    import webbrowser
+    webbrowser.open_new(url)
 
 # === 讀取 Paper Server 數量，若無設定跳出視窗詢問 ===
 def ask_paper_count():
@@ -43,58 +55,29 @@ def ask_paper_count():
         set_paper_count(count)
     return count
 
-# === 根據 paper count 建立 SERVER_PATHS 字典 ===
-def build_server_paths(paper_count):
-    base_dir = os.path.dirname(sys.executable)
-    paths = {
-        "BungeeCord": os.path.join(base_dir, "servers", "bungee", "start.bat") if IS_WINDOWS else os.path.join(base_dir, "servers", "bungee", "start.sh")
-    }
-    for i in range(1, paper_count + 1):
-        name = f"Paper {i}"
-        path = os.path.join(base_dir, "servers", f"paper{i}", "start.bat") if IS_WINDOWS else os.path.join(base_dir, "servers", f"paper{i}", "start.sh")
-        paths[name] = path
-    return paths
-
-# === 自動建立資料夾與啟動腳本 ===
-def ensure_server_dirs():
-    for name, script_path in SERVER_PATHS.items():
-        folder = os.path.dirname(script_path)
-        os.makedirs(folder, exist_ok=True)
-        # 啟動腳本會在自動修復時補，這裡先不寫入
-
-# === 檢查缺失，日誌顯示 ===
-def check_server_files():
-    log("開始檢查伺服器資料夾檔案...")
-    for name, script_path in SERVER_PATHS.items():
-        folder = os.path.dirname(script_path)
-        # 判斷是 Paper 或 Bungee
-        if "paper" in name.lower():
-            jar_path = os.path.join(folder, "paper.jar")
-            jar_exists = os.path.exists(jar_path)
-            script_exists = os.path.exists(script_path)
-            if not jar_exists:
-                log(f"⚠️ {name} 缺少 paper.jar")
-            if not script_exists:
-                log(f"⚠️ {name} 缺少啟動腳本 ({script_path})")
-        elif "bungee" in name.lower():
-            jar_path = os.path.join(folder, "BungeeCord.jar")
-            jar_exists = os.path.exists(jar_path)
-            script_exists = os.path.exists(script_path)
-            if not jar_exists:
-                log(f"⚠️ {name} 缺少 BungeeCord.jar")
-            if not script_exists:
-                log(f"⚠️ {name} 缺少啟動腳本 ({script_path})")
-
 # === 自動修復缺失項目(帶 Loading 視窗，非阻塞) ===
 def auto_repair_missing():
     loading_win = tk.Toplevel(root)
     loading_win.title("請稍候")
-    loading_win.geometry("300x100")
+    loading_win.geometry("360x130")
     loading_win.resizable(False, False)
-    tk.Label(loading_win, text="正在自動修復缺失項目，請稍候...").pack(expand=True, padx=20, pady=20)
+    tk.Label(loading_win, text="正在自動修復缺失項目，請稍候...").pack(padx=20, pady=(15, 5))
+    progress_bar = ttk.Progressbar(loading_win, mode="indeterminate", length=300)
+    progress_bar.pack(padx=20)
+    progress_bar.start(10)
+    detail_var = tk.StringVar(value="")
+    tk.Label(loading_win, textvariable=detail_var).pack(padx=20, pady=5)
     loading_win.transient(root)
     loading_win.grab_set()
 
+    finished = []
+
+    def on_progress(name, state, detail):
+        if state in ("done", "failed"):
+            finished.append(name)
+        text = f"{name}：{detail}（已完成 {len(finished)} 台）"
+        root.after(0, detail_var.set, text)
+
     def repair_task():
         try:
             version = paper_version_var.get().strip()
@@ -102,68 +85,13 @@ def auto_repair_missing():
                 log("無法修復：尚未選擇 Paper 版本")
                 return
 
-            # Paper API
-            paper_api = f"https://api.papermc.io/v2/projects/paper/versions/{version}"
-            builds = requests.get(paper_api).json()["builds"]
-            latest = builds[-1]
-
-            for name, script_path in SERVER_PATHS.items():
-                folder = os.path.dirname(script_path)
-                os.makedirs(folder, exist_ok=True)
-
-                # 補啟動腳本
-                if not os.path.exists(script_path):
-                    if IS_WINDOWS:
-                        with open(script_path, "w", encoding="utf-8") as f:
-                            folder_abs = os.path.abspath(os.path.dirname(script_path))
-                            if "paper" in name.lower():
-                                f.write(f"""@echo off
-cd /d "{folder_abs}"
-java -Xmx2G -jar paper.jar nogui
-pause
-""")
-                            else:  # Bungee
-                                f.write(f"""@echo off
-cd /d "{folder_abs}"
-java -Xmx512M -jar BungeeCord.jar
-pause
-""")
-                    else:
-                        with open(script_path, "w", encoding="utf-8") as f:
-                            if "paper" in name.lower():
-                                f.write(f"""#!/bin/bash
-java -Xmx2G -jar paper.jar nogui
-read -p "Press Enter to exit..."
-""")
-                            else:
-                                f.write(f"""#!/bin/bash
-java -Xmx512M -jar BungeeCord.jar
-read -p "Press Enter to exit..."
-""")
-                        os.chmod(script_path, 0o755)
-                    log(f"✅ 已補上啟動腳本：{name}")
-
-                # 補 jar 檔
-                if "paper" in name.lower():
-                    jar_path = os.path.join(folder, "paper.jar")
-                    if not os.path.exists(jar_path):
-                        jar_url = f"https://api.papermc.io/v2/projects/paper/versions/{version}/builds/{latest}/downloads/paper-{version}-{latest}.jar"
-                        r = requests.get(jar_url)
-                        r.raise_for_status()
-                        with open(jar_path, "wb") as f:
-                            f.write(r.content)
-                        log(f"✅ 已補上 paper.jar：{name}")
-                elif "bungee" in name.lower():
-                    jar_path = os.path.join(folder, "BungeeCord.jar")
-                    if not os.path.exists(jar_path):
-                        url = "https://ci.md-5.net/job/BungeeCord/lastSuccessfulBuild/artifact/bootstrap/target/BungeeCord.jar"
-                        r = requests.get(url)
-                        r.raise_for_status()
-                        with open(jar_path, "wb") as f:
-                            f.write(r.content)
-                        log(f"✅ 已補上 BungeeCord.jar：{name}")
-
-            log("✅ 所有伺服器資料夾修復完成")
+            failures = engine.provision(version, progress=on_progress)
+            if failures:
+                log(f"❌ 自動修復完成，但有 {len(failures)} 台失敗：")
+                for name, err in failures.items():
+                    log(f"  - {name}：{err}")
+            else:
+                log("✅ 所有伺服器資料夾修復完成")
         except Exception as e:
             log(f"❌ 自動修復失敗：{e}")
         finally:
@@ -171,12 +99,8 @@ read -p "Press Enter to exit..."
 
     threading.Thread(target=repair_task, daemon=True).start()
 
-# === 控制伺服器 ===
-def on_start(server_name):
-    success, msg = start_server(server_name, SERVER_PATHS[server_name])
-    print(SERVER_PATHS[server_name])
-    # log(msg)  # 移除這行，不輸出到 log_box
-    # 新增自動開啟 eula.txt 檔案
+def check_eula(server_name):
+    # 自動開啟尚未同意的 eula.txt 檔案
     folder = os.path.dirname(SERVER_PATHS[server_name])
     eula_path = os.path.join(folder, "eula.txt")
     need_open_eula = False
@@ -207,38 +131,82 @@ def on_start(server_name):
         except Exception as e:
             log(f"開啟 eula.txt 失敗：{e}")
             messagebox.showerror("錯誤", f"開啟 eula.txt 失敗：{e}")
-    if not success:
-        messagebox.showerror("錯誤", msg)
 
-def on_stop(server_name):
-    # 根據伺服器類型決定關閉指令
-    if "paper" in server_name.lower():
-        stop_cmd = "stop"
-    elif "bungee" in server_name.lower():
-        stop_cmd = "end"
-    else:
-        stop_cmd = "stop"  # 預設
+def on_server_output(server_name, line):
+    # 由 console 讀取執行緒呼叫，首次啟動產生 eula.txt 後再交回主執行緒檢查
+    if "eula.txt" in line.lower():
+        root.after(0, check_eula, server_name)
 
-    success, msg = stop_server(server_name, stop_cmd)
-    log(msg)
+# === 控制伺服器 ===
+def on_start(server_name):
+    # 立即返回，console 輸出由背景執行緒讀取
+    success, msg = engine.start(server_name)
+    check_eula(server_name)
     if not success:
         messagebox.showerror("錯誤", msg)
 
+def on_stop(server_name):
+    # 等待程序結束可能需要數秒，放到背景執行緒避免凍結 UI
+    def stop_task():
+        success, msg = engine.stop(server_name)
+        if not success:
+            root.after(0, lambda: messagebox.showerror("錯誤", msg))
+
+    threading.Thread(target=stop_task, daemon=True).start()
+
+def for_selected(action, paper_only=False):
+    # 對表格中選取的所有伺服器執行同一個動作
+    names = server_table.selected()
+    if paper_only:
+        names = [name for name in names if "paper" in name.lower()]
+    if not names:
+        messagebox.showinfo("提示", "請先在清單中選取伺服器")
+        return
+    for name in names:
+        action(name)
+
 def start_all():
-    for name in SERVER_PATHS:
-        on_start(name)
+    # 分批啟動：後端先、BungeeCord 最後，就緒後才放行下一台
+    threading.Thread(target=engine.start_all, daemon=True).start()
 
 def stop_all():
-    for name in SERVER_PATHS:
-        on_stop(name)
+    # 反向停止：先停 BungeeCord，再平行停止所有後端
+    threading.Thread(target=engine.stop_all, daemon=True).start()
+
+def format_uptime(seconds):
+    if seconds is None:
+        return "-"
+    minutes = int(seconds // 60)
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
 
 def update_server_statuses():
+    # 只在 UI 執行緒套用結果；實際連線由背景 poller 進行，表格只重繪有變化的列
+    for name, result in engine.poller.drain().items():
+        slp_results[name] = result
     for name in SERVER_PATHS:
-        running = is_server_running(name,port=25565)
-        lbl = status_labels.get(name)
-        if lbl:
-            lbl.config(text="🟢 運行中" if running else "🔴 未啟動", foreground="green" if running else "red")
-    root.after(3000, update_server_statuses)
+        result = slp_results.get(name, {})
+        running = is_server_running(name)
+        usage = engine.telemetry.current(name) if running else None
+        perf = engine.console_metrics.get(name)
+        if engine.elastic.is_sleeping(name):
+            # 休眠時 port 由 CraftControl 代為回應，玩家連線會自動喚醒
+            status, state = "💤 休眠中", "sleeping"
+        elif result.get("online"):
+            status, state = "🟢 運行中", "online"
+        elif running:
+            status, state = "🟡 啟動中", "starting"
+        else:
+            status, state = "🔴 未啟動", "offline"
+        server_table.update_row(name, {
+            "status": status,
+            "players": f"{result['players']}/{result['max_players']}" if state == "online" else "-",
+            "port": result.get("port", "-"),
+            "uptime": format_uptime(get_server_uptime(name)) if running else "-",
+            "ram": f"{usage['rss_bytes'] / (1024 * 1024):.0f} MB" if usage else "-",
+            "cpu": f"{usage['cpu_percent']:.0f}%" if usage else "-",
+            "tps": f"{perf['tps'][0]:.1f}" if running and perf and perf["tps"] else "-",
+        }, state)
+    root.after(500, update_server_statuses)
 
 # === 下載函式 ===
 def download_latest_paper():
@@ -247,76 +215,98 @@ def download_latest_paper():
         messagebox.showerror("錯誤", "請選擇版本")
         return
 
-    try:
-        api = f"https://api.papermc.io/v2/projects/paper/versions/{version}"
-        builds = requests.get(api).json()["builds"]
-        latest = builds[-1]
-        log(f"開始下載 Paper {version} Build {latest} 到所有資料夾...")
-
-        for name, script_path in SERVER_PATHS.items():
-            if "paper" not in name.lower():
-                continue
-
-            folder = os.path.dirname(script_path)
-            os.makedirs(folder, exist_ok=True)
-            jar_path = os.path.join(folder, "paper.jar")
-
-            if os.path.exists(jar_path):
-                log(f"{name} 已存在 paper.jar，跳過")
-                continue
-
-            jar_url = f"https://api.papermc.io/v2/projects/paper/versions/{version}/builds/{latest}/downloads/paper-{version}-{latest}.jar"
-            r = requests.get(jar_url)
-            r.raise_for_status()
-            with open(jar_path, "wb") as f:
-                f.write(r.content)
-            log(f"{name} 下載完成 paper.jar")
-    except Exception as e:
-        log(f"下載失敗：{e}")
-        messagebox.showerror("下載失敗", str(e))
+    paper_paths = {name: path for name, path in SERVER_PATHS.items() if "paper" in name.lower()}
+    for name, script_path in paper_paths.items():
+        if os.path.exists(os.path.join(os.path.dirname(script_path), "paper.jar")):
+            log(f"{name} 已存在 paper.jar，跳過")
 
-def download_latest_bungee():
-    dest_folder = "servers/bungee"
-    os.makedirs(dest_folder, exist_ok=True)
-    jar_path = os.path.join(dest_folder, "BungeeCord.jar")
+    def on_progress(name, state, detail):
+        if state == "downloading" and status_var:
+            root.after(0, status_var.set, f"{name} {detail}")
+
+    def download_task():
+        log(f"開始下載 Paper {version} 到所有資料夾...")
+        try:
+            # 同一個 build 只會從網路下載一次，其餘資料夾直接連結
+            failures = engine.provision(version, list(paper_paths), progress=on_progress, write_scripts=False)
+        except Exception as e:
+            failures = {"Paper": str(e)}
+        if failures:
+            msg = "\n".join(f"{name}：{err}" for name, err in failures.items())
+            log(f"下載失敗：{msg}")
+            root.after(0, lambda: messagebox.showerror("下載失敗", msg))
+        else:
+            log("Paper 下載完成")
 
+    threading.Thread(target=download_task, daemon=True).start()
+
+def upgrade_paper():
+    # 逐批重新啟動後端到所選版本的最新 build，BungeeCord 不中斷
+    version = paper_version_var.get().strip()
+    if not version:
+        messagebox.showerror("錯誤", "請選擇版本")
+        return
+    if not messagebox.askyesno("滾動更新", f"要將所有 Paper 伺服器更新到 {version} 的最新 build 嗎？\n"
+                                          "運行中的伺服器會逐批重新啟動。"):
+        return
+
+    def task():
+        try:
+            results = engine.upgrade(version)
+        except Exception as e:
+            log(f"更新失敗：{e}")
+            return
+        failed = {name: r for name, r in results.items() if r not in ("upgraded", "up-to-date")}
+        if failed:
+            msg = "\n".join(f"{name}：{r}" for name, r in failed.items())
+            root.after(0, lambda: messagebox.showwarning("更新未完全成功", msg))
+
+    threading.Thread(target=task, daemon=True).start()
+
+def download_latest_bungee():
+    jar_path = os.path.join(os.path.dirname(SERVER_PATHS["BungeeCord"]), "BungeeCord.jar")
     if os.path.exists(jar_path):
         log("BungeeCord 已存在，跳過下載")
         return
 
-    url = "https://ci.md-5.net/job/BungeeCord/lastSuccessfulBuild/artifact/bootstrap/target/BungeeCord.jar"
-    try:
-        r = requests.get(url)
-        r.raise_for_status()
-        with open(jar_path, "wb") as f:
-            f.write(r.content)
-        log("下載完成 BungeeCord")
-    except Exception as e:
-        log(f"BungeeCord 下載失敗：{e}")
-        messagebox.showerror("下載失敗", str(e))
+    def download_task():
+        failures = engine.provision(None, ["BungeeCord"], write_scripts=False)
+        if failures:
+            log(f"BungeeCord 下載失敗：{failures['BungeeCord']}")
+            root.after(0, lambda: messagebox.showerror("下載失敗", failures["BungeeCord"]))
+        else:
+            log("下載完成 BungeeCord")
+
+    threading.Thread(target=download_task, daemon=True).start()
 
 # === 載入 Paper 版本清單 ===
+def apply_paper_versions(versions, repair=False):
+    # 只在 UI 執行緒更新下拉選單
+    if versions:
+        versions = list(reversed(versions))
+        current = paper_version_var.get()
+        paper_version_combo['values'] = versions
+        paper_version_combo.set(current if current in versions else versions[0])
+        log("版本載入完成")
+        if repair:
+            # 載入完版本才做自動修復
+            auto_repair_missing()
+    else:
+        paper_version_combo['values'] = ["無法載入"]
+        paper_version_combo.set("無法載入")
+        log("找不到版本資料")
+
 def load_paper_versions():
+    # 有快取時立即顯示，過期的快取在背景重新驗證後再更新選單
     try:
         log("正在載入 Paper 版本清單...")
-        r = requests.get("https://api.papermc.io/v2/projects/paper")
-        r.raise_for_status()
-        data = r.json()
-        versions = data.get("versions", [])
-        if versions:
-            versions.reverse()
-            paper_version_combo['values'] = versions
-            paper_version_combo.set(versions[0])
-            log("版本載入完成")
-            # 載入完版本才做自動修復
-            auto_repair_missing()
-        else:
-            paper_version_combo['values'] = ["無法載入"]
-            paper_version_combo.set("無法載入")
-            log("找不到版本資料")
+        versions = get_versions(on_update=lambda v: root.after(0, apply_paper_versions, v))
+        root.after(0, apply_paper_versions, versions, True)
     except Exception as e:
-        paper_version_combo['values'] = ["錯誤"]
-        paper_version_combo.set("錯誤")
+        def show_error():
+            paper_version_combo['values'] = ["錯誤"]
+            paper_version_combo.set("錯誤")
+        root.after(0, show_error)
         log(f"版本載入失敗：{e}")
 
 # === 修改 Paper Server 數量 ===
@@ -331,24 +321,6 @@ def change_paper_count():
 def show_about():
     messagebox.showinfo("關於 CraftControl", f"CraftControl {APP_VERSION}\nMade By Samchen023\nMinecraft Server 控制面板")
 
-def write_start_script(path, max_ram_gb=2):
-    max_ram = f"-Xmx{max_ram_gb}G"
-    IS_WINDOWS = os.name == "nt"
-    if IS_WINDOWS:
-        content = f"""@echo off
-java {max_ram} -jar paper.jar nogui
-pause
-"""
-    else:
-        content = f"""#!/bin/bash
-java {max_ram} -jar paper.jar nogui
-read -p "Press Enter to exit..."
-"""
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(content)
-    if not IS_WINDOWS:
-        os.chmod(path, 0o755)
-
 def set_server_ram(server_name):
     script_path = SERVER_PATHS[server_name]
     win = tk.Toplevel(root)
@@ -367,11 +339,31 @@ def set_server_ram(server_name):
         except ValueError:
             messagebox.showerror("錯誤", "請輸入 1~64 之間的整數")
             return
-        write_start_script(script_path, ram_gb)
+        # 與其他伺服器目前的設定合計，檢查是否超過實體記憶體
+        heaps = engine.current_heaps()
+        heaps[server_name] = ram_gb * 1024
+        warnings = engine.check_heaps(heaps)
+        if warnings and not messagebox.askyesno("記憶體警告", "\n".join(warnings) + "\n\n仍要套用嗎？"):
+            return
+        write_start_script(script_path, "paper", ram_gb * 1024)
         messagebox.showinfo("成功", f"已設定最大記憶體為 {ram_gb} GB，並更新啟動腳本")
         win.destroy()
     tk.Button(win, text="套用", command=on_apply).pack(pady=10)
 
+def auto_plan_memory():
+    # 依主機記憶體與權重自動分配每台伺服器的 heap，並重寫啟動腳本
+    plan, warnings = engine.plan_memory()
+    summary = engine.memory_summary()
+    lines = [f"實體記憶體 {summary['total_mb']} MB，保留 {summary['headroom_mb']} MB", ""]
+    lines += [f"{name}：{heap_mb} MB" for name, heap_mb in plan.items()]
+    if warnings:
+        lines += [""] + [f"⚠️ {w}" for w in warnings]
+    if not messagebox.askyesno("自動分配記憶體", "\n".join(lines) + "\n\n要套用到啟動腳本嗎？"):
+        return
+    success, warnings = engine.apply_memory_plan(plan)
+    if not success:
+        messagebox.showerror("錯誤", "計畫超過實體記憶體，已拒絕套用：\n" + "\n".join(warnings))
+
 def open_server_folder(server_name):
     folder = os.path.dirname(SERVER_PATHS[server_name])
     abs_folder = os.path.abspath(folder)  # 取得絕對路徑
@@ -386,10 +378,144 @@ def open_server_folder(server_name):
         log(f"開啟資料夾失敗：{e}")
         messagebox.showerror("錯誤", f"開啟資料夾失敗：{e}")
 
+def export_telemetry_csv():
+    from tkinter import filedialog
+    path = filedialog.asksaveasfilename(title="匯出資源使用紀錄", defaultextension=".csv",
+                                        filetypes=[("CSV", "*.csv")])
+    if not path:
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(engine.telemetry.export_csv())
+    log(f"已匯出資源使用紀錄：{path}")
+
+def export_performance_csv():
+    from tkinter import filedialog
+    path = filedialog.asksaveasfilename(title="匯出效能事件", defaultextension=".csv",
+                                        filetypes=[("CSV", "*.csv")])
+    if not path:
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(engine.console_metrics.export_events_csv())
+    log(f"已匯出效能事件：{path}")
+
+def broadcast_command():
+    command = simpledialog.askstring("廣播指令", "要送到選取伺服器（未選取則全部）的指令：")
+    if not command:
+        return
+    names = server_table.selected() or None
+
+    def task():
+        for name, result in engine.broadcast(command, names).items():
+            response = result["response"].strip()
+            if not result["ok"]:
+                log(f"❌ {name}：{response}")
+            elif response:
+                log(f"{name}：{response}")
+
+    threading.Thread(target=task, daemon=True).start()
+
+def search_logs():
+    # 在選取（未選取則全部）伺服器的日誌中搜尋，結果顯示在獨立視窗
+    names = server_table.selected() or None
+    win = tk.Toplevel(root)
+    win.title("搜尋日誌")
+    win.geometry("900x500")
+    bar = tk.Frame(win)
+    bar.pack(fill="x", padx=5, pady=5)
+    tk.Label(bar, text="Regex：").pack(side="left")
+    pattern_entry = tk.Entry(bar)
+    pattern_entry.pack(side="left", fill="x", expand=True)
+    tk.Label(bar, text="時間範圍：").pack(side="left")
+    since_entry = tk.Entry(bar, width=8)
+    since_entry.pack(side="left")
+    since_entry.insert(0, "1d")
+    result_box = tk.Text(win, wrap="none")
+    result_box.pack(fill="both", expand=True, padx=5, pady=5)
+
+    def show(lines):
+        result_box.delete("1.0", "end")
+        result_box.insert("end", "\n".join(lines))
+
+    def on_search(event=None):
+        pattern = pattern_entry.get()
+        if not pattern:
+            return
+        try:
+            since = parse_time(since_entry.get())
+        except ValueError:
+            messagebox.showerror("錯誤", "時間範圍請輸入 30m、2h、7d 或 ISO 格式的時間", parent=win)
+            return
+
+        def task():
+            try:
+                matches = engine.search_logs(pattern, names, since=since, limit=500)
+                lines = [f"{time.strftime('%m-%d %H:%M:%S', time.localtime(m['time'])) if m['time'] else '-'} "
+                         f"{m['server']}  {m['line']}" for m in matches]
+                lines.append(f"共 {len(matches)} 筆")
+            except Exception as e:
+                lines = [f"搜尋失敗：{e}"]
+            root.after(0, lambda: show(lines))
+
+        show(["搜尋中..."])
+        threading.Thread(target=task, daemon=True).start()
+
+    pattern_entry.bind("<Return>", on_search)
+    tk.Button(bar, text="搜尋", command=on_search).pack(side="left", padx=5)
+    pattern_entry.focus_set()
+
+def backup_all():
+    # 所有伺服器同時備份，完成後依保留設定清除舊備份
+    def task():
+        failures = engine.backup()
+        engine.prune_backups()
+        if failures:
+            msg = "\n".join(f"{name}：{err}" for name, err in failures.items())
+            root.after(0, lambda: messagebox.showerror("備份失敗", msg))
+
+    threading.Thread(target=task, daemon=True).start()
+
+def restore_backup(server_name):
+    snapshots = engine.list_backups(server_name)
+    if not snapshots:
+        messagebox.showinfo("提示", f"{server_name} 還沒有備份")
+        return
+    snapshot = simpledialog.askstring("還原備份", f"{server_name} 的備份：\n" + "\n".join(snapshots[-10:])
+                                      + "\n\n請輸入要還原的備份：", initialvalue=snapshots[-1])
+    if not snapshot:
+        return
+    if snapshot not in snapshots:
+        messagebox.showerror("錯誤", f"找不到備份：{snapshot}")
+        return
+    try:
+        engine.restore(server_name, snapshot)
+    except Exception as e:
+        messagebox.showerror("錯誤", str(e))
+
+def startup_checks():
+    # 資料夾檢查在背景執行，結果透過日誌管線陸續顯示，不拖慢第一個畫面
+    engine.ensure_server_dirs()
+    engine.configure_network()
+    engine.check_server_files()
+
+def on_first_frame():
+    startup_trace.mark("first frame")
+    if startup_trace.enabled:
+        startup_trace.report()
+
+def build_open_folder_menu():
+    # 子選單在第一次展開時才建立，伺服器數量不影響啟動時間
+    if open_folder_menu.index(tk.END) is None:
+        for name in SERVER_PATHS:
+            open_folder_menu.add_command(label=name, command=lambda n=name: open_server_folder(n))
+
 # === 主程式開始 ===
-paper_count = ask_paper_count()
-SERVER_PATHS = build_server_paths(paper_count)
+with phase("config + engine"):
+    paper_count = ask_paper_count()
+    log_pipeline = LogPipeline(os.path.join(get_base_dir(), "logs", "craftcontrol.log"))
+    engine = Engine(build_server_paths(paper_count), log_pipeline)
+    SERVER_PATHS = engine.server_paths
 
+startup_trace.begin("build widgets")
 root = tk.Tk()
 root.title(f"CraftControl {APP_VERSION} - Minecraft Server 控制器")
 
@@ -397,7 +523,6 @@ status_var = tk.StringVar()
 status_var.set(f"CraftControl {APP_VERSION} 準備就緒")
 
 log_box = None
-status_labels = {}
 paper_version_var = tk.StringVar()
 paper_version_combo = None
 
@@ -409,29 +534,36 @@ server_menu.add_command(label="啟動所有伺服器", command=start_all)
 server_menu.add_command(label="停止所有伺服器", command=stop_all)
 
 # 新增「開啟伺服器資料夾」子選單
-open_folder_menu = tk.Menu(server_menu, tearoff=0)
-for name in SERVER_PATHS:
-    open_folder_menu.add_command(label=name, command=lambda n=name: open_server_folder(n))
+open_folder_menu = tk.Menu(server_menu, tearoff=0, postcommand=build_open_folder_menu)
 server_menu.add_cascade(label="開啟伺服器資料夾", menu=open_folder_menu)
+server_menu.add_command(label="匯出資源使用紀錄 (CSV)", command=export_telemetry_csv)
+server_menu.add_command(label="匯出效能事件 (CSV)", command=export_performance_csv)
+server_menu.add_command(label="廣播指令...", command=broadcast_command)
+server_menu.add_command(label="搜尋日誌...", command=search_logs)
+server_menu.add_separator()
+server_menu.add_command(label="備份所有伺服器", command=backup_all)
+server_menu.add_command(label="還原選取的伺服器...", command=lambda: for_selected(restore_backup, paper_only=True))
 
 menubar.add_cascade(label="伺服器", menu=server_menu)
 
 download_menu = tk.Menu(menubar, tearoff=0)
 download_menu.add_command(label="下載最新 Paper", command=download_latest_paper)
 download_menu.add_command(label="下載最新 BungeeCord", command=download_latest_bungee)
+download_menu.add_command(label="滾動更新 Paper", command=upgrade_paper)
 download_menu.add_separator()
-download_menu.add_command(label="前往 Paper 官網", command=lambda: webbrowser.open_new("https://papermc.io"))
-download_menu.add_command(label="前往 BungeeCord 官網", command=lambda: webbrowser.open_new("https://www.spigotmc.org/threads/1-8-1-15-bungeecord.392/"))
+download_menu.add_command(label="前往 Paper 官網", command=lambda: open_url("https://papermc.io"))
+download_menu.add_command(label="前往 BungeeCord 官網", command=lambda: open_url("https://www.spigotmc.org/threads/1-8-1-15-bungeecord.392/"))
 menubar.add_cascade(label="下載", menu=download_menu)
 
 config_menu = tk.Menu(menubar, tearoff=0)
-config_menu.add_command(label="重新載入Paper版本", command=load_paper_versions)
+config_menu.add_command(label="重新載入Paper版本", command=lambda: threading.Thread(target=load_paper_versions, daemon=True).start())
 config_menu.add_command(label="修改 Paper 數量", command=change_paper_count)
 config_menu.add_command(label="一鍵修復缺失項目", command=auto_repair_missing)
+config_menu.add_command(label="自動分配記憶體", command=auto_plan_memory)
 menubar.add_cascade(label="設定", menu=config_menu)
 
 help_menu = tk.Menu(menubar, tearoff=0)
-help_menu.add_command(label="官網", command=lambda: webbrowser.open_new("https://github.com/samchen023/CraftControl"))
+help_menu.add_command(label="官網", command=lambda: open_url("https://github.com/samchen023/CraftControl"))
 help_menu.add_command(label="關於", command=show_about)
 menubar.add_cascade(label="說明", menu=help_menu)
 
@@ -439,24 +571,16 @@ root.config(menu=menubar)
 
 # === 主界面元件 ===
 ttk.Label(root, text="伺服器控制", font=("Arial", 14, "bold")).pack(pady=10)
-for name in SERVER_PATHS:
-    frame = ttk.Frame(root)
-    frame.pack(pady=2)
-    ttk.Label(frame, text=name, width=15).pack(side=tk.LEFT)
-    ttk.Button(frame, text="啟動", command=lambda n=name: on_start(n)).pack(side=tk.LEFT, padx=5)
-    ttk.Button(frame, text="停止", command=lambda n=name: on_stop(n)).pack(side=tk.LEFT)
-    # 新增記憶體設定按鈕（僅 Paper 伺服器）
-    if "paper" in name.lower():
-        ttk.Button(frame, text="記憶體設定", command=lambda n=name: set_server_ram(n)).pack(side=tk.LEFT, padx=5)
-
-status_frame = ttk.Frame(root)
-status_frame.pack(pady=10)
-ttk.Label(status_frame, text="伺服器狀態", font=("Arial", 12, "bold")).grid(row=0, column=0, columnspan=2, pady=(0, 5))
-for i, name in enumerate(SERVER_PATHS):
-    ttk.Label(status_frame, text=name + "：").grid(row=i + 1, column=0, sticky="e")
-    lbl = ttk.Label(status_frame, text="未知", foreground="gray")
-    lbl.grid(row=i + 1, column=1, sticky="w")
-    status_labels[name] = lbl
+server_table = ServerTable(root, SERVER_PATHS)
+server_table.pack(fill=tk.BOTH, expand=True, padx=10)
+server_table.bind_double_click(lambda name: name and open_server_folder(name))
+
+frame_actions = ttk.Frame(root)
+frame_actions.pack(pady=5)
+ttk.Button(frame_actions, text="啟動選取", command=lambda: for_selected(on_start)).pack(side=tk.LEFT, padx=3)
+ttk.Button(frame_actions, text="停止選取", command=lambda: for_selected(on_stop)).pack(side=tk.LEFT, padx=3)
+ttk.Button(frame_actions, text="記憶體設定", command=lambda: for_selected(set_server_ram, paper_only=True)).pack(side=tk.LEFT, padx=3)
+ttk.Button(frame_actions, text="開啟資料夾", command=lambda: for_selected(open_server_folder)).pack(side=tk.LEFT, padx=3)
 
 ttk.Label(root, text="\n伺服器下載", font=("Arial", 14, "bold")).pack(pady=10)
 frame_dl = ttk.Frame(root)
@@ -473,14 +597,21 @@ ttk.Button(root, text="下載最新 BungeeCord", command=download_latest_bungee)
 ttk.Label(root, text="\n日誌", font=("Arial", 14, "bold")).pack()
 log_box = tk.Text(root, height=12, width=60)
 log_box.pack(pady=5)
+log_pipeline.attach(root, log_box, status_var)
 
 status_bar = ttk.Label(root, textvariable=status_var, relief=tk.SUNKEN, anchor="w")
 status_bar.pack(side=tk.BOTTOM, fill=tk.X)
 
-ensure_server_dirs()
-check_server_files()
+startup_trace.end("build widgets")
+
+add_output_listener(on_server_output)
 
+threading.Thread(target=startup_checks, daemon=True).start()
 threading.Thread(target=load_paper_versions, daemon=True).start()
+engine.start_polling()
 update_server_statuses()
+root.after(0, on_first_frame)
 
 root.mainloop()
+engine.shutdown()
+log_pipeline.close()
@@ -0,0 +1,96 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from gui import config_manager
+from gui.api_server import _is_local_origin, create_api_server
+
+
+class _Engine:
+    server_paths = {"Paper 1": "/srv/paper1"}
+
+    def __init__(self):
+        self.commands = []
+
+    def status(self):
+        return {"Paper 1": {"online": False}}
+
+    def send_command(self, name, command):
+        self.commands.append((name, command))
+        return True, "ok"
+
+
+class ApiServerTest(unittest.TestCase):
+    def setUp(self):
+        self.engine = _Engine()
+        self.server = create_api_server(self.engine, "127.0.0.1", 0, "secret")
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def request(self, method, path, body=None, headers=None):
+        req = Request(self.base_url + path, data=body, method=method)
+        for key, value in {"Authorization": "Bearer secret", **(headers or {})}.items():
+            if value is not None:
+                req.add_header(key, value)
+        try:
+            with urlopen(req, timeout=5) as r:
+                return r.status, json.loads(r.read())
+        except HTTPError as e:
+            return e.code, json.loads(e.read())
+
+    def test_authorized_json_post(self):
+        status, payload = self.request("POST", "/servers/Paper%201/command", b'{"command": "say hi"}',
+                                       {"Content-Type": "application/json"})
+        self.assertEqual(status, 200)
+        self.assertEqual(self.engine.commands, [("Paper 1", "say hi")])
+
+    def test_rejects_missing_token(self):
+        status, _ = self.request("GET", "/servers", headers={"Authorization": None})
+        self.assertEqual(status, 401)
+
+    def test_rejects_non_json_post(self):
+        # 瀏覽器 no-cors fetch 只能送 text/plain
+        status, _ = self.request("POST", "/servers/Paper%201/command", b'{"command": "op x"}',
+                                 {"Content-Type": "text/plain;charset=UTF-8"})
+        self.assertEqual(status, 415)
+        self.assertEqual(self.engine.commands, [])
+
+    def test_rejects_foreign_origin(self):
+        status, _ = self.request("POST", "/servers/Paper%201/command", b'{"command": "op x"}',
+                                 {"Content-Type": "application/json", "Origin": "https://evil.example"})
+        self.assertEqual(status, 403)
+        self.assertEqual(self.engine.commands, [])
+        status, _ = self.request("GET", "/servers", headers={"Origin": "http://localhost:3000"})
+        self.assertEqual(status, 200)
+
+    def test_is_local_origin(self):
+        self.assertTrue(_is_local_origin(None))
+        self.assertTrue(_is_local_origin("http://127.0.0.1:8765"))
+        self.assertTrue(_is_local_origin("http://[::1]:8765"))
+        self.assertFalse(_is_local_origin("null"))
+        self.assertFalse(_is_local_origin("http://127.0.0.1.evil.example"))
+
+
+class ApiTokenTest(unittest.TestCase):
+    def test_generated_once_and_persisted(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "config.json")
+            with mock.patch.object(config_manager, "CONFIG_PATH", path):
+                token = config_manager.get_api_token()
+                self.assertGreaterEqual(len(token), 24)
+                self.assertEqual(config_manager.get_api_token(), token)
+                config_manager.save_config({"api_token": ""})
+                self.assertEqual(config_manager.get_api_token(), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
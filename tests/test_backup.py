@@ -0,0 +1,86 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from gui import backup
+from gui.backup import BackupManager
+
+
+class BackupManagerTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        backup_dir = os.path.join(self.tmp.name, "backups")
+        for name, value in (("BACKUP_DIR", backup_dir), ("OBJECTS_DIR", os.path.join(backup_dir, "objects"))):
+            p = mock.patch.object(backup, name, value)
+            p.start()
+            self.addCleanup(p.stop)
+        self.commands = []
+        self.commands_lock = threading.Lock()
+        self.manager = None
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_server(self, server_id, content=b"region data" * 1000):
+        folder = os.path.join(self.tmp.name, "servers", server_id)
+        os.makedirs(os.path.join(folder, "world", "region"))
+        with open(os.path.join(folder, "world", "region", "r.0.0.mca"), "wb") as f:
+            f.write(content)
+        with open(os.path.join(folder, "world", "session.lock"), "wb") as f:
+            f.write(b"lock")
+        return folder
+
+    def send_command(self, name, command):
+        with self.commands_lock:
+            self.commands.append((name, command))
+        if command == "save-all flush":
+            self.manager.on_output(name, "[12:00:00 INFO]: Saved the game")
+
+    def make_manager(self, running=True, io_workers=2):
+        self.manager = BackupManager(self.send_command, lambda name: running, log=lambda msg: None,
+                                     io_workers=io_workers)
+        return self.manager
+
+    def test_incremental_and_restore(self):
+        manager = self.make_manager(running=False)
+        folder = self.make_server("paper1")
+        first = manager.backup("Paper 1", folder)
+        second = manager.backup("Paper 1", folder)
+        self.assertNotEqual(first, second)
+        self.assertEqual(manager.list_snapshots("paper1"), [first, second])
+        self.assertEqual(manager.load_manifest("paper1", second)["written_bytes"], 0)
+        self.assertNotIn("world/session.lock", manager.load_manifest("paper1", first)["files"])
+
+        with open(os.path.join(folder, "world", "region", "r.0.0.mca"), "wb") as f:
+            f.write(b"changed")
+        manager.restore("Paper 1", folder, first)
+        with open(os.path.join(folder, "world", "region", "r.0.0.mca"), "rb") as f:
+            self.assertEqual(f.read(), b"region data" * 1000)
+
+    def test_same_second_backups_get_distinct_ids(self):
+        manager = self.make_manager(running=False)
+        folder = self.make_server("paper1")
+        with mock.patch.object(backup.time, "time", return_value=1_700_000_000.5):
+            ids = [manager.backup("Paper 1", folder) for _ in range(3)]
+        self.assertEqual(len(set(ids)), 3)
+        self.assertEqual(manager.list_snapshots("paper1"), sorted(ids))
+
+    def test_save_off_only_while_holding_io_slot(self):
+        manager = self.make_manager(io_workers=1)
+        servers = {f"Paper {i}": self.make_server(f"paper{i}") for i in range(1, 4)}
+        self.assertEqual(manager.backup_all(servers), {})
+        # 同一時間只有一台伺服器處於 save-off
+        paused = set()
+        for name, command in self.commands:
+            if command == "save-off":
+                self.assertEqual(paused, set(), self.commands)
+                paused.add(name)
+            elif command == "save-on":
+                paused.discard(name)
+        self.assertEqual(sum(1 for _, c in self.commands if c == "save-on"), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+
+from gui.console_metrics import ConsoleMetrics
+
+# Paper 透過 RCON 回傳的 tps / mspt（legacy 顏色碼）
+RCON_TPS = "§6TPS from last 1m, 5m, 15m: §a*20.0, §a19.87, §e17.5"
+RCON_MSPT = ("§6Server tick times §e(§7avg§e/§7min§e/§7max§e)§6 from last 5s§7,§6 10s§7,§6 1m§e:\n"
+             "§6◴ §a1.2§7/§a0.8§7/§a3.4§e, §a1.1§7/§a0.7§7/§a5.0§e, §a1.3§7/§a0.7§7/§a9.1")
+
+
+class ConsoleMetricsTest(unittest.TestCase):
+    def setUp(self):
+        self.metrics = ConsoleMetrics(log=lambda msg: None)
+
+    def test_coloured_rcon_tps(self):
+        self.metrics.parse_response("Paper 1", RCON_TPS)
+        self.assertEqual(self.metrics.get("Paper 1")["tps"], [20.0, 19.87, 17.5])
+
+    def test_coloured_rcon_mspt(self):
+        self.metrics.parse_response("Paper 1", RCON_MSPT)
+        self.assertEqual(self.metrics.get("Paper 1")["mspt"], [1.2, 0.8, 3.4])
+
+    def test_console_lines_with_timestamp_and_ansi(self):
+        self.metrics.on_output("Paper 1", "[12:00:01 INFO]: \x1b[0;33;1mTPS from last 1m, 5m, 15m: \x1b[0;32;1m20.0, 20.0, 20.0\x1b[m")
+        self.metrics.on_output("Paper 1", "[12:00:02 INFO]: Server tick times (avg/min/max) from last 5s, 10s, 1m:")
+        self.metrics.on_output("Paper 1", "[12:00:02 INFO]: ◴ 2.5/1.0/7.5, 2.0/1.0/8.0, 2.1/0.9/12.0")
+        snapshot = self.metrics.get("Paper 1")
+        self.assertEqual(snapshot["tps"], [20.0, 20.0, 20.0])
+        self.assertEqual(snapshot["mspt"], [2.5, 1.0, 7.5])
+
+    def test_events(self):
+        self.metrics.on_output("Paper 1", '[12:00:00 INFO]: Done (12.345s)! For help, type "help"')
+        self.metrics.on_output("Paper 1", "[12:01:00 WARN]: Can't keep up! Is the server overloaded? "
+                                          "Running 5000ms or 100 ticks behind")
+        self.metrics.on_output("Paper 1", "[12:02:00 INFO]: [gc] GC(12) Pause Young (Normal) "
+                                          "(G1 Evacuation Pause) 100M->50M(1024M) 12.345ms")
+        snapshot = self.metrics.get("Paper 1")
+        self.assertEqual(snapshot["startup_seconds"], 12.345)
+        self.assertEqual((snapshot["lag_spikes"], snapshot["ticks_behind"], snapshot["ms_behind"]), (1, 100, 5000))
+        self.assertEqual(snapshot["gc_pause_max_ms"], 12.345)
+        self.assertEqual([e["type"] for e in self.metrics.recent_events("Paper 1")], ["startup", "lag", "gc"])
+
+    def test_unrelated_lines_create_nothing(self):
+        self.metrics.on_output("Paper 1", "[12:00:00 INFO]: <Steve> the TPS is fine, 20")
+        self.assertIsNone(self.metrics.get("Paper 1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
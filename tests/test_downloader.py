@@ -0,0 +1,126 @@
+import hashlib
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from gui.downloader import PART_SUFFIX, VALIDATOR_SUFFIX, ChecksumError, download_file
+
+
+class _Server:
+    """支援 Range / If-Range 的最小 HTTP 伺服器；content 與 etag 可在測試中替換"""
+
+    def __init__(self, content, etag='"v1"'):
+        self.content = content
+        self.etag = etag
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                server.requests.append(dict(self.headers))
+                body = server.content
+                status = 200
+                start = 0
+                range_header = self.headers.get("Range")
+                if_range = self.headers.get("If-Range")
+                if range_header and (if_range is None or if_range == server.etag):
+                    start = int(range_header.split("=")[1].rstrip("-"))
+                    if start >= len(body):
+                        self.send_response(416)
+                        self.send_header("Content-Range", f"bytes */{len(body)}")
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+                    status = 206
+                self.send_response(status)
+                if server.etag:
+                    self.send_header("ETag", server.etag)
+                if status == 206:
+                    self.send_header("Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}")
+                self.send_header("Content-Length", str(len(body) - start))
+                self.end_headers()
+                self.wfile.write(body[start:])
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/BungeeCord.jar"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class DownloadFileTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dest = os.path.join(self.tmp.name, "BungeeCord.jar")
+        self.part = self.dest + PART_SUFFIX
+        self.old = b"A" * 1000
+        self.new = b"B" * 1500
+        self.server = _Server(self.old)
+
+    def tearDown(self):
+        self.server.close()
+        self.tmp.cleanup()
+
+    def write_part(self, data, validator=None):
+        with open(self.part, "wb") as f:
+            f.write(data)
+        if validator is not None:
+            with open(self.part + VALIDATOR_SUFFIX, "w", encoding="utf-8") as f:
+                f.write(validator)
+
+    def read_dest(self):
+        with open(self.dest, "rb") as f:
+            return f.read()
+
+    def test_fresh_download_cleans_up(self):
+        digest = download_file(self.server.url, self.dest, sha256=hashlib.sha256(self.old).hexdigest())
+        self.assertEqual(digest, hashlib.sha256(self.old).hexdigest())
+        self.assertEqual(self.read_dest(), self.old)
+        self.assertFalse(os.path.exists(self.part))
+        self.assertFalse(os.path.exists(self.part + VALIDATOR_SUFFIX))
+
+    def test_resumes_with_if_range(self):
+        self.write_part(self.old[:400], '"v1"')
+        download_file(self.server.url, self.dest)
+        self.assertEqual(self.read_dest(), self.old)
+        self.assertEqual(self.server.requests[-1].get("If-Range"), '"v1"')
+        self.assertEqual(self.server.requests[-1].get("Range"), "bytes=400-")
+
+    def test_changed_file_is_not_spliced(self):
+        # .part 來自舊 build，伺服器已換成新 build：If-Range 不符，必須整份重新下載
+        self.write_part(self.old[:400], '"v1"')
+        self.server.content, self.server.etag = self.new, '"v2"'
+        download_file(self.server.url, self.dest)
+        self.assertEqual(self.read_dest(), self.new)
+
+    def test_part_without_validator_discarded_when_unverified(self):
+        self.write_part(self.old[:400])
+        self.server.content = self.new
+        download_file(self.server.url, self.dest)
+        self.assertEqual(self.read_dest(), self.new)
+        self.assertNotIn("Range", self.server.requests[-1])
+
+    def test_416_without_checksum_redownloads(self):
+        # .part 比伺服器上的新檔案還長：不可直接當成完整檔案
+        self.write_part(self.old + b"A" * 600, '"v1"')
+        self.server.content = self.new[:1000]
+        download_file(self.server.url, self.dest, backoff=0)
+        self.assertEqual(self.read_dest(), self.new[:1000])
+
+    def test_checksum_mismatch_removes_part(self):
+        with self.assertRaises(ChecksumError):
+            download_file(self.server.url, self.dest, sha256="0" * 64)
+        self.assertFalse(os.path.exists(self.part))
+        self.assertFalse(os.path.exists(self.part + VALIDATOR_SUFFIX))
+        self.assertFalse(os.path.exists(self.dest))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import asyncio
+import os
+import socket
+import tempfile
+import unittest
+from unittest import mock
+
+from gui import config_manager
+from gui.controller import is_port_open
+from gui.engine import Engine, build_server_paths
+
+
+class _Pipeline:
+    def push(self, msg, source=None):
+        pass
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class StopAllTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        for patch in (mock.patch.object(config_manager, "CONFIG_PATH", os.path.join(tmp.name, "config.json")),
+                      mock.patch.dict(os.environ, {config_manager.BASE_DIR_ENV: tmp.name})):
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.engine = Engine(build_server_paths(1, tmp.name), _Pipeline())
+
+    def test_releases_sleeping_listener(self):
+        elastic = self.engine.elastic
+        port = _free_port()
+        elastic.get_port = lambda name: port
+        elastic.stop_fn = lambda name: (True, "")
+        elastic.start()
+        asyncio.run_coroutine_threadsafe(elastic.sleep("Paper 1", "測試"), elastic._loop).result(5)
+        self.assertTrue(elastic.is_sleeping("Paper 1"))
+        self.assertTrue(is_port_open(port))
+
+        self.engine.stop_all()
+        self.assertFalse(elastic.is_sleeping("Paper 1"))
+        self.assertFalse(is_port_open(port))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import gzip
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from gui.log_index import BLOOM_BITS, LogIndex, _bloom_has, _bloom_positions, parse_time, required_tokens
+
+
+class RequiredTokensTest(unittest.TestCase):
+    def test_only_whole_words_inside_literal_segments(self):
+        self.assertEqual(required_tokens("Can't keep up"), {b"keep"})
+        self.assertEqual(required_tokens("a player joined the game"), {b"player", b"joined", b"the"})
+        # 片段邊緣的字可能與 regex 的其他部分相連
+        self.assertEqual(required_tokens(r"player (\w+) joined"), set())
+        self.assertEqual(required_tokens("keep"), set())
+
+    def test_alternation_requires_nothing(self):
+        self.assertEqual(required_tokens("foo bar baz|qux"), set())
+
+
+class BloomTest(unittest.TestCase):
+    def test_positions_in_range_and_membership(self):
+        bits = bytearray(BLOOM_BITS // 8)
+        for token in (b"keep", b"player"):
+            for pos in _bloom_positions(token):
+                self.assertTrue(0 <= pos < BLOOM_BITS)
+                bits[pos >> 3] |= 1 << (pos & 7)
+        self.assertTrue(_bloom_has(bits, b"keep"))
+        self.assertTrue(_bloom_has(bits, b"player"))
+        self.assertFalse(_bloom_has(bits, b"stopping"))
+
+
+class LogIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.server = os.path.join(self.tmp.name, "paper1")
+        self.logs = os.path.join(self.server, "logs")
+        os.makedirs(self.logs)
+        self.index_dir = os.path.join(self.tmp.name, "index")
+        self.latest = os.path.join(self.logs, "latest.log")
+        self.write_latest("[10:00:00 INFO]: Starting minecraft server\n"
+                          "[10:00:05 WARN]: Can't keep up! Is the server overloaded?\n"
+                          "[10:00:06 INFO]: <Steve> hello there\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_latest(self, text, mode="w"):
+        with open(self.latest, mode, encoding="utf-8") as f:
+            f.write(text)
+
+    def make_index(self):
+        return LogIndex({"Paper 1": self.server}, self.index_dir)
+
+    def test_search_with_level_filter(self):
+        index = self.make_index()
+        matches = index.search("keep up")
+        self.assertEqual([m["line"] for m in matches], ["[10:00:05 WARN]: Can't keep up! Is the server overloaded?"])
+        self.assertEqual(matches[0]["level"], "WARN")
+        self.assertEqual(index.search("server", levels=["WARN"])[0]["level"], "WARN")
+        self.assertEqual(index.search("hello", levels=["ERROR"]), [])
+
+    def test_index_loaded_lazily(self):
+        index = self.make_index()
+        index.update()
+        index.close()
+        with mock.patch.object(LogIndex, "_load") as load:
+            index = self.make_index()
+            load.assert_not_called()
+            index.update()
+            load.assert_called_once()
+
+    def test_close_saves_and_restart_does_not_reread(self):
+        index = self.make_index()
+        self.assertGreater(index.update(), 0)
+        # update 剛存過檔（SAVE_INTERVAL 內），新增的內容只會在 close() 時寫回
+        self.write_latest("[10:01:00 INFO]: <Alex> later line\n", "a")
+        self.assertEqual(index.update(), len("[10:01:00 INFO]: <Alex> later line\n"))
+        index.close()
+
+        restarted = self.make_index()
+        self.assertEqual(restarted.update(), 0)
+        self.assertEqual(len(restarted.search("later")), 1)
+
+    def test_partial_last_line_waits(self):
+        index = self.make_index()
+        index.update()
+        self.write_latest("[10:02:00 INFO]: half a li", "a")
+        self.assertEqual(index.update(), 0)
+        self.write_latest("ne\n", "a")
+        self.assertEqual(len(index.search("half a line")), 1)
+
+    def test_gzip_archive(self):
+        with gzip.open(os.path.join(self.logs, "2024-05-01-1.log.gz"), "wt", encoding="utf-8") as f:
+            f.write("[23:59:58 INFO]: before midnight\n[00:00:01 ERROR]: after midnight boom\n")
+        index = self.make_index()
+        matches = index.search("boom", servers=["Paper 1"])
+        self.assertEqual(len(matches), 1)
+        self.assertEqual(matches[0]["file"], "2024-05-01-1.log.gz")
+        self.assertEqual(matches[0]["level"], "ERROR")
+        self.assertEqual(matches[0]["time"], parse_time("2024-05-02 00:00:01"))
+
+
+class ParseTimeTest(unittest.TestCase):
+    def test_relative_and_iso(self):
+        self.assertIsNone(parse_time(""))
+        self.assertAlmostEqual(parse_time("2h"), parse_time("120m"), delta=1)
+        self.assertEqual(parse_time("2024-05-01 12:00"), parse_time("2024-05-01T12:00:00"))
+
+
+if __name__ == "__main__":
+    unittest.main()
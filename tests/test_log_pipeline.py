@@ -0,0 +1,71 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from gui.log_pipeline import LogPipeline, _format_batch
+
+
+class LogPipelineTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "logs", "craftcontrol.log")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read_log(self):
+        with open(self.path, encoding="utf-8") as f:
+            return f.read().splitlines()
+
+    def test_writes_every_line_with_timestamp(self):
+        pipeline = LogPipeline(self.path)
+        pipeline.push("啟動中")
+        pipeline.push("Done (1.0s)!", source="Paper 1")
+        pipeline.close()
+        lines = self.read_log()
+        self.assertEqual(len(lines), 2)
+        self.assertRegex(lines[0], r"^\d{4}-\d\d-\d\d \d\d:\d\d:\d\d,\d{3} 啟動中$")
+        self.assertTrue(lines[1].endswith(" [Paper 1] Done (1.0s)!"))
+
+    def test_pending_lines_are_bounded_and_drops_counted(self):
+        pipeline = LogPipeline(self.path, max_pending=10)
+        # 寫檔執行緒卡在第一批，緩衝區必定會滿
+        blocker = threading.Lock()
+        blocker.acquire()
+        original = pipeline._file_handler.handle
+        pipeline._file_handler.handle = lambda record: (blocker.acquire(), original(record), blocker.release())
+        pipeline.push("first", source="Paper 1")
+        for i in range(100):
+            pipeline.push(f"line {i}", source="Paper 1")
+        self.assertLessEqual(len(pipeline._pending), 10)
+        self.assertGreater(pipeline.dropped, 0)
+        # 管理訊息不會被略過
+        pipeline.push("management")
+        blocker.release()
+        pipeline.close()
+        text = "\n".join(self.read_log())
+        self.assertIn("management", text)
+        self.assertIn(f"已略過 {pipeline.dropped} 行", text)
+
+    def test_ui_buffer_keeps_only_recent_lines(self):
+        pipeline = LogPipeline(self.path, max_lines=5)
+        for i in range(20):
+            pipeline.push(f"line {i}")
+        lines, last_status = pipeline._drain()
+        pipeline.close()
+        self.assertEqual(lines, [f"line {i}" for i in range(15, 20)])
+        self.assertEqual(last_status, "line 19")
+
+
+class FormatBatchTest(unittest.TestCase):
+    def test_milliseconds_and_order(self):
+        text = _format_batch([(0.25, "a"), (0.5, "b"), (1.0, "c")])
+        lines = text.split("\n")
+        self.assertEqual([line.split(" ", 2)[2] for line in lines], ["a", "b", "c"])
+        self.assertTrue(lines[0].split(" ")[1].endswith(",250"))
+        self.assertTrue(lines[2].split(" ")[1].endswith(",000"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+
+from gui.memory_planner import (HEAP_STEP_MB, MAX_HEAP_MB, MIN_HEAP_MB, check_plan, default_headroom_mb,
+                                footprint_mb, jvm_flags, plan_memory, planned_usage_mb, read_heap_mb)
+
+SERVERS = {"BungeeCord": "bungee", "Paper 1": "paper", "Paper 2": "paper", "Paper 3": "paper"}
+
+
+def _flag(flags, prefix):
+    return next(f[len(prefix):] for f in flags if f.startswith(prefix))
+
+
+class PlanMemoryTest(unittest.TestCase):
+    def test_fits_budget_on_large_host(self):
+        plan, warnings = plan_memory(SERVERS, total_mb=32768)
+        self.assertEqual(warnings, [])
+        self.assertTrue(all(heap % HEAP_STEP_MB == 0 for heap in plan.values()))
+        self.assertLessEqual(planned_usage_mb(plan), 32768 - default_headroom_mb(32768))
+        # 預設權重 paper:bungee = 4:1
+        self.assertEqual(plan["Paper 1"], plan["Paper 3"])
+        self.assertGreater(plan["Paper 1"], 3 * plan["BungeeCord"])
+
+    def test_custom_weights(self):
+        plan, _ = plan_memory(SERVERS, weights={"Paper 1": 8}, total_mb=32768)
+        self.assertGreater(plan["Paper 1"], plan["Paper 2"] * 1.8)
+
+    def test_minimum_heaps_with_warning_on_small_host(self):
+        plan, warnings = plan_memory(SERVERS, total_mb=4096)
+        self.assertEqual(plan["Paper 1"], MIN_HEAP_MB["paper"])
+        self.assertEqual(plan["BungeeCord"], MIN_HEAP_MB["bungee"])
+        self.assertEqual(len(warnings), 1)
+        self.assertIn("OOM", warnings[0])
+
+    def test_capped_below_compressed_oops_limit(self):
+        plan, _ = plan_memory({"Paper 1": "paper"}, total_mb=256 * 1024, headroom_mb=0)
+        self.assertEqual(plan["Paper 1"], MAX_HEAP_MB)
+
+    def test_check_plan_headroom(self):
+        plan = {"Paper 1": 6144}
+        used = footprint_mb(6144)
+        self.assertEqual(check_plan(plan, total_mb=used + 2048, headroom_mb=1024), [])
+        self.assertIn("保留空間", check_plan(plan, total_mb=used + 512, headroom_mb=1024)[0])
+
+    def test_default_headroom(self):
+        self.assertEqual(default_headroom_mb(4096), 1024)
+        self.assertEqual(default_headroom_mb(65536), int(65536 * 0.15))
+
+
+class JvmFlagsTest(unittest.TestCase):
+    def test_common_flags(self):
+        for kind in ("paper", "bungee"):
+            flags = jvm_flags(kind, 2048)
+            self.assertEqual(flags[:2], ["-Xms2048M", "-Xmx2048M"])
+            self.assertIn("-XX:+UseG1GC", flags)
+            self.assertIn("-XX:+AlwaysPreTouch", flags)
+        self.assertNotIn("-Daikars.new.flags=true", jvm_flags("bungee", 512))
+
+    def test_aikar_tiers(self):
+        expected = {
+            2048: ("30", "40", "4M", "20", "15"),
+            8192: ("30", "40", "8M", "20", "15"),
+            16384: ("40", "50", "16M", "15", "20"),
+        }
+        for heap, values in expected.items():
+            flags = jvm_flags("paper", heap)
+            actual = tuple(_flag(flags, prefix) for prefix in (
+                "-XX:G1NewSizePercent=", "-XX:G1MaxNewSizePercent=", "-XX:G1HeapRegionSize=",
+                "-XX:G1ReservePercent=", "-XX:InitiatingHeapOccupancyPercent="))
+            self.assertEqual(actual, values, heap)
+            # 實驗性參數必須在使用它們之前解鎖
+            self.assertLess(flags.index("-XX:+UnlockExperimentalVMOptions"),
+                            flags.index(f"-XX:G1NewSizePercent={values[0]}"))
+
+
+class ReadHeapTest(unittest.TestCase):
+    def test_read_heap(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "start.sh")
+            self.assertIsNone(read_heap_mb(path))
+            for text, expected in (("java -Xms4G -Xmx4G -jar paper.jar", 4096),
+                                   ("java -Xmx1536m -jar paper.jar", 1536),
+                                   ("java -jar paper.jar", None)):
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(text)
+                self.assertEqual(read_heap_mb(path), expected, text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,159 @@
+import os
+import socket
+import struct
+import tempfile
+import unittest
+import zlib
+from unittest import mock
+
+from gui import config_manager, engine as engine_module
+from gui.engine import Engine, build_server_paths
+from gui.fleet import Fleet, NodeClient, split_name
+from gui.node_agent import (AUTH_MAX_FRAME, FLAG_ZLIB, MAX_FRAME, NodeAgent, NodeError, recv_frame,
+                            send_frame)
+
+
+def _raw_frame(data, flags=0):
+    return struct.pack(">IB", len(data), flags) + data
+
+
+class FrameTest(unittest.TestCase):
+    def setUp(self):
+        self.a, self.b = socket.socketpair()
+        self.b.settimeout(5)
+
+    def tearDown(self):
+        self.a.close()
+        self.b.close()
+
+    def test_round_trip_plain_and_compressed(self):
+        small = {"id": 1, "method": "status"}
+        large = [{"id": i, "result": "x" * 100} for i in range(50)]
+        send_frame(self.a, small)
+        send_frame(self.a, large)
+        self.assertEqual(recv_frame(self.b), small)
+        self.assertEqual(recv_frame(self.b), large)
+
+    def test_rejects_decompression_bomb(self):
+        bomb = zlib.compress(b"[" + b" " * (MAX_FRAME + 1024) + b"]", 9)
+        self.assertLess(len(bomb), MAX_FRAME)
+        self.a.sendall(_raw_frame(bomb, FLAG_ZLIB))
+        with self.assertRaises(NodeError):
+            recv_frame(self.b)
+
+    def test_rejects_compressed_before_auth(self):
+        self.a.sendall(_raw_frame(zlib.compress(b'{"auth": "x"}'), FLAG_ZLIB))
+        with self.assertRaises(NodeError):
+            recv_frame(self.b, authenticated=False)
+
+    def test_rejects_large_frame_before_auth(self):
+        self.a.sendall(struct.pack(">IB", AUTH_MAX_FRAME + 1, 0))
+        with self.assertRaises(NodeError):
+            recv_frame(self.b, authenticated=False)
+
+
+class _Engine:
+    server_paths = {"Paper 1": "/srv/paper1"}
+
+    def log(self, msg):
+        pass
+
+    def status(self):
+        return {"Paper 1": {"online": True}}
+
+
+class AgentTest(unittest.TestCase):
+    def setUp(self):
+        self.agent = NodeAgent(_Engine(), "a", "127.0.0.1", 0, token="secret")
+        self.port = self.agent.start()
+
+    def tearDown(self):
+        self.agent.shutdown()
+
+    def test_authenticated_calls(self):
+        client = NodeClient("a", "127.0.0.1", self.port, "secret")
+        try:
+            self.assertEqual(client.request("info", timeout=5)["servers"], ["Paper 1"])
+            futures = [client.call("status") for _ in range(50)]
+            self.assertTrue(all(f.result(5) == {"Paper 1": {"online": True}} for f in futures))
+            with self.assertRaises(NodeError):
+                client.request("start", timeout=5, name="Paper 9")
+        finally:
+            client.close()
+
+    def test_wrong_token_rejected(self):
+        client = NodeClient("a", "127.0.0.1", self.port, "wrong")
+        with self.assertRaises(NodeError):
+            client.request("info", timeout=5)
+
+
+class _Pipeline:
+    def push(self, msg, source=None):
+        pass
+
+
+class FleetTest(unittest.TestCase):
+    """同一台主機上兩個 node agent（不同 base dir 與 port）合併成一個 fleet"""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        # 固定主機記憶體，剩餘量只取決於各 node 已設定的伺服器數量
+        for patch in (mock.patch.object(config_manager, "CONFIG_PATH", os.path.join(tmp.name, "config.json")),
+                      mock.patch.object(engine_module, "host_total_memory_mb", lambda: 32768)):
+            patch.start()
+            self.addCleanup(patch.stop)
+        nodes = []
+        self.engines = {}
+        for node, paper_count in (("a", 3), ("b", 1)):
+            engine = Engine(build_server_paths(paper_count, os.path.join(tmp.name, node)), _Pipeline())
+            # 不下載 jar，只建立資料夾
+            engine.provision = lambda version, names=None, engine=engine: engine.ensure_server_dirs() or {}
+            agent = NodeAgent(engine, node, "127.0.0.1", 0, token="secret")
+            nodes.append({"name": node, "host": "127.0.0.1", "port": agent.start()})
+            self.addCleanup(agent.shutdown)
+            self.engines[node] = engine
+        self.assertNotEqual(nodes[0]["port"], nodes[1]["port"])
+        self.fleet = Fleet(nodes, "secret", log=lambda msg: None)
+        self.addCleanup(self.fleet.close)
+
+    def test_merged_status(self):
+        status = self.fleet.status()
+        self.assertEqual(sorted(status), ["a/BungeeCord", "a/Paper 1", "a/Paper 2", "a/Paper 3",
+                                          "b/BungeeCord", "b/Paper 1"])
+        self.assertEqual(status["b/Paper 1"]["node"], "b")
+        self.assertEqual(status["a/Paper 3"]["folder"], os.path.dirname(self.engines["a"].server_paths["Paper 3"]))
+        self.assertFalse(status["a/Paper 1"]["running"])
+        nodes = self.fleet.nodes()
+        self.assertEqual((nodes["a"]["servers"], nodes["b"]["servers"]), (4, 2))
+        self.assertGreater(nodes["b"]["free_mb"], nodes["a"]["free_mb"])
+
+    def test_place_on_node_with_most_free_memory(self):
+        self.assertEqual(self.fleet.place("1.21.4", timeout=30), "b/Paper 2")
+        self.assertIn("Paper 2", self.engines["b"].server_paths)
+        self.assertNotIn("Paper 4", self.engines["a"].server_paths)
+        self.assertIn("b/Paper 2", self.fleet.status())
+
+    def test_unreachable_node_left_out(self):
+        fleet = Fleet([{"name": "c", "host": "127.0.0.1", "port": _closed_port()}], "secret", log=lambda msg: None)
+        self.addCleanup(fleet.close)
+        self.assertEqual(fleet.status(), {})
+        with self.assertRaises(NodeError):
+            fleet.place("1.21.4")
+
+
+def _closed_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class SplitNameTest(unittest.TestCase):
+    def test_split(self):
+        self.assertEqual(split_name("a/Paper 1"), ("a", "Paper 1"))
+        with self.assertRaises(KeyError):
+            split_name("Paper 1")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import socket
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from benchmarks.fake_paper_api import FakePaperApi
+from gui import paper_api, upgrader
+
+
+def _closed_port_url():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{s.getsockname()[1]}/v2/projects/paper"
+
+
+class FreshBuildsTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.api = FakePaperApi(builds=5, jar_size=1024).start()
+        patches = [
+            mock.patch.object(paper_api, "PAPER_API", self.api.paper_api),
+            mock.patch.object(paper_api, "CACHE_PATH", os.path.join(self.tmp.name, "paper_meta.json")),
+            mock.patch.object(paper_api, "_cache", None),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        # 快取中的 build 清單還在 TTL 內，但已落後 API
+        paper_api._load_cache()[f"{self.api.paper_api}/versions/1.21.4"] = {
+            "data": {"builds": [1, 2]}, "etag": None, "last_modified": None, "fetched_at": time.time()}
+
+    def tearDown(self):
+        self.api.stop()
+        self.tmp.cleanup()
+
+    def test_cached_builds_served_without_request(self):
+        self.assertEqual(paper_api.get_builds("1.21.4"), [1, 2])
+        self.assertEqual(self.api.requests, 0)
+
+    def test_fresh_revalidates_synchronously(self):
+        self.assertEqual(paper_api.get_latest_download("1.21.4", fresh=True)[0], 5)
+        # 新結果寫回快取
+        self.assertEqual(paper_api.get_builds("1.21.4"), [1, 2, 3, 4, 5])
+
+    def test_fresh_failure_does_not_fall_back(self):
+        with mock.patch.object(paper_api, "PAPER_API", _closed_port_url()):
+            url = f"{paper_api.PAPER_API}/versions/1.21.4"
+            paper_api._load_cache()[url] = {"data": {"builds": [1, 2]}, "fetched_at": time.time()}
+            self.assertEqual(paper_api.get_builds("1.21.4"), [1, 2])
+            with self.assertRaises(Exception):
+                paper_api.get_builds("1.21.4", fresh=True)
+            with self.assertRaises(RuntimeError):
+                upgrader.rolling_upgrade({}, "1.21.4", None, None, log=lambda msg: None)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import socket
+import threading
+import time
+import unittest
+from collections import deque
+from unittest import mock
+
+from gui import controller
+from gui.controller import is_port_open
+from gui.scheduler import start_fleet
+
+
+class _Proc:
+    pid = 4242
+
+    def poll(self):
+        return None
+
+
+def _listener(host):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind((host, 0))
+    sock.listen()
+    return sock
+
+
+class ConnectHostTest(unittest.TestCase):
+    def setUp(self):
+        try:
+            self.sock = _listener("127.0.0.2")
+        except OSError:
+            self.skipTest("127.0.0.2 無法綁定")
+        self.addCleanup(self.sock.close)
+        self.port = self.sock.getsockname()[1]
+        for target in ("server_processes", "server_info"):
+            p = mock.patch.object(controller, target, {})
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_is_port_open_uses_host(self):
+        self.assertFalse(is_port_open(self.port))
+        self.assertTrue(is_port_open(self.port, "127.0.0.2"))
+
+    def start(self, name):
+        controller.server_processes[name] = _Proc()
+        controller.server_info[name] = {
+            "script_path": "/nonexistent/start.sh", "started_at": time.time(), "last_output": time.monotonic(),
+            "output": deque(), "ready": threading.Event(), "stopping": False,
+        }
+        return True, ""
+
+    def test_start_fleet_waits_on_backend_host(self):
+        failures = start_fleet({"Paper 1": "/nonexistent/start.sh"}, ready_timeout=2, ports={"Paper 1": self.port},
+                               log=lambda msg: None, start_fn=self.start, host="127.0.0.2")
+        self.assertEqual(failures, {})
+        self.assertTrue(controller.server_info["Paper 1"]["ready"].is_set())
+
+
+if __name__ == "__main__":
+    unittest.main()
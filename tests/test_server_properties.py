@@ -0,0 +1,189 @@
+import os
+import tempfile
+import unittest
+
+from gui.server_properties import (RCON_PORT_OFFSET, allocate_ports, configure_fleet, enable_bungee_forwarding,
+                                   get_server_port, read_properties, update_properties, write_bungee_config)
+
+# BungeeCord 第一次啟動時產生的 config.yml（節錄，保留各種縮排與清單形式）
+BUNGEE_DEFAULT = """server_connect_timeout: 5000
+listeners:
+- query_port: 25577
+  motd: '&1Another Bungee server'
+  tab_list: GLOBAL_PING
+  query_enabled: false
+  forced_hosts:
+    pvp.md-5.net: pvp
+  ping_passthrough: false
+  priorities:
+  - lobby
+  - fallback
+  bind_local_address: true
+  host: 0.0.0.0:25577
+  max_players: 1
+  force_default_server: false
+remote_ping_cache: -1
+permissions:
+  default:
+  - bungeecord.command.server
+  - bungeecord.command.list
+  admin:
+  - bungeecord.command.alert
+timeout: 30000
+ip_forward: false
+groups:
+  md_5:
+  - admin
+online_mode: true
+disabled_commands:
+- disabledcommandhere
+servers:
+  lobby:
+    motd: '&1Just another BungeeCord - Forced Host'
+    address: localhost:25565
+    restricted: false
+"""
+
+
+class TempDirTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, *parts):
+        path = os.path.join(self.tmp.name, *parts)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    def write(self, path, text):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def read(self, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+
+
+class AllocatePortsTest(unittest.TestCase):
+    def test_sequential_and_unique(self):
+        names = ["BungeeCord"] + [f"Paper {i}" for i in range(1, 4)]
+        self.assertEqual(allocate_ports(names, 30000, 29999),
+                         {"BungeeCord": 29999, "Paper 1": 30000, "Paper 2": 30001, "Paper 3": 30002})
+
+    def test_skips_proxy_port(self):
+        ports = allocate_ports(["Paper 1", "Paper 2", "Paper 3", "BungeeCord"], 25576, 25577)
+        self.assertEqual(ports, {"Paper 1": 25576, "Paper 2": 25578, "Paper 3": 25579, "BungeeCord": 25577})
+        self.assertEqual(len(set(ports.values())), len(ports))
+
+
+class BungeeConfigTest(TempDirTest):
+    def setUp(self):
+        super().setUp()
+        self.config = self.path("bungee", "config.yml")
+        self.write(self.config, BUNGEE_DEFAULT)
+        self.backends = {"paper1": ("127.0.0.1", 25566), "paper2": ("127.0.0.1", 25567)}
+
+    def test_rewrites_managed_fields_only(self):
+        self.assertTrue(write_bungee_config(self.config, self.backends, 25600, online_mode=True))
+        text = self.read(self.config)
+        self.assertIn("servers:\n  paper1:\n    motd: 'paper1'\n    address: 127.0.0.1:25566\n    restricted: false\n"
+                      "  paper2:\n    motd: 'paper2'\n    address: 127.0.0.1:25567\n    restricted: false\n", text)
+        self.assertNotIn("lobby:", text)
+        self.assertIn("  priorities:\n  - paper1\n  bind_local_address: true\n", text)
+        self.assertNotIn("- fallback", text)
+        self.assertIn("- query_port: 25600\n", text)
+        self.assertIn("  host: 0.0.0.0:25600\n", text)
+        self.assertIn("\nip_forward: true\n", text)
+        self.assertIn("\nonline_mode: true\n", text)
+        # 使用者的其他設定保持原樣
+        for untouched in ("    pvp.md-5.net: pvp\n", "  max_players: 1\n", "  - bungeecord.command.alert\n",
+                          "groups:\n  md_5:\n  - admin\n", "disabled_commands:\n- disabledcommandhere\n",
+                          "server_connect_timeout: 5000\n", "timeout: 30000\n"):
+            self.assertIn(untouched, text)
+
+    def test_idempotent(self):
+        write_bungee_config(self.config, self.backends, 25577)
+        first = self.read(self.config)
+        self.assertFalse(write_bungee_config(self.config, self.backends, 25577))
+        self.assertEqual(self.read(self.config), first)
+
+    def test_servers_block_in_middle_and_offline_mode(self):
+        text = BUNGEE_DEFAULT.replace("online_mode: true\n", "")
+        servers = text[text.index("servers:"):]
+        self.write(self.config, servers + text[:text.index("servers:")])
+        write_bungee_config(self.config, self.backends, 25577, online_mode=False)
+        result = self.read(self.config)
+        self.assertEqual(result.count("servers:"), 1)
+        self.assertTrue(result.startswith("servers:\n  paper1:"))
+        self.assertIn("\nserver_connect_timeout: 5000\n", result)
+        self.assertTrue(result.endswith("online_mode: false\n"))
+
+    def test_keeps_comments_after_servers_block(self):
+        self.write(self.config, BUNGEE_DEFAULT.replace("timeout: 30000\n", "") +
+                   "\n# 手動加的註解\ntimeout: 30000\n")
+        write_bungee_config(self.config, self.backends, 25577)
+        self.assertIn("    restricted: false\n\n# 手動加的註解\ntimeout: 30000\n", self.read(self.config))
+
+    def test_keeps_crlf_line_endings(self):
+        with open(self.config, "w", encoding="utf-8", newline="\r\n") as f:
+            f.write(BUNGEE_DEFAULT)
+        self.assertTrue(write_bungee_config(self.config, self.backends, 25577))
+        with open(self.config, "rb") as f:
+            raw = f.read()
+        self.assertEqual(raw.count(b"\n"), raw.count(b"\r\n"))
+        self.assertIn(b"address: 127.0.0.1:25566\r\n", raw)
+        self.assertFalse(write_bungee_config(self.config, self.backends, 25577))
+
+    def test_new_config_from_template(self):
+        config = self.path("fresh", "config.yml")
+        self.assertTrue(write_bungee_config(config, self.backends, 25577))
+        self.assertEqual(get_server_port("BungeeCord", self.path("fresh", "start.sh")), 25577)
+        self.assertIn("  - paper1", self.read(config))
+
+
+class PropertiesTest(TempDirTest):
+    def test_update_keeps_comments_and_order(self):
+        path = self.path("paper1", "server.properties")
+        self.write(path, "#Minecraft server properties\nmotd=Hello\nserver-port=25565\n# comment\nlevel-name=world\n")
+        self.assertTrue(update_properties(path, {"server-port": 25570, "server-ip": "127.0.0.1"}))
+        self.assertEqual(self.read(path), "#Minecraft server properties\nmotd=Hello\nserver-port=25570\n# comment\n"
+                                          "level-name=world\nserver-ip=127.0.0.1\n")
+        self.assertFalse(update_properties(path, {"server-port": "25570"}))
+        self.assertEqual(read_properties(path)["server-port"], "25570")
+
+    def test_enable_forwarding(self):
+        cases = {
+            None: "settings:\n  bungeecord: true\n",
+            "settings:\n  debug: false\n  bungeecord: false\n": "settings:\n  debug: false\n  bungeecord: true\n",
+            "settings:\n  debug: false\n": "settings:\n  bungeecord: true\n  debug: false\n",
+            "world-settings:\n  default: {}\n": "world-settings:\n  default: {}\nsettings:\n  bungeecord: true\n",
+        }
+        for i, (before, after) in enumerate(cases.items()):
+            path = self.path(f"case{i}", "spigot.yml")
+            if before is not None:
+                self.write(path, before)
+            enable_bungee_forwarding(path)
+            self.assertEqual(self.read(path), after, before)
+
+
+class ConfigureFleetTest(TempDirTest):
+    def test_end_to_end(self):
+        paths = {name: self.path(folder, "start.sh") for name, folder in
+                 (("BungeeCord", "BungeeCord"), ("Paper 1", "paper1"), ("Paper 2", "paper2"))}
+        ports, changed = configure_fleet(paths, 30000, 29999, "127.0.0.1", True, rcon_password="pw")
+        self.assertEqual(ports, {"BungeeCord": 29999, "Paper 1": 30000, "Paper 2": 30001})
+        self.assertEqual(changed, 5)
+        props = read_properties(self.path("paper2", "server.properties"))
+        self.assertEqual((props["server-port"], props["online-mode"], props["rcon.port"]),
+                         ("30001", "false", str(30001 + RCON_PORT_OFFSET)))
+        self.assertEqual(get_server_port("Paper 2", paths["Paper 2"]), 30001)
+        self.assertEqual(get_server_port("BungeeCord", paths["BungeeCord"]), 29999)
+        self.assertIn("address: 127.0.0.1:30000", self.read(self.path("BungeeCord", "config.yml")))
+        # 第二次執行沒有任何變動
+        self.assertEqual(configure_fleet(paths, 30000, 29999, "127.0.0.1", True, rcon_password="pw")[1], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import asyncio
+import socket
+import threading
+import unittest
+
+from benchmarks.fake_server import serve
+from gui.status_poller import StatusPoller, _flatten_motd, _pack_string, _pack_varint, _packet, _varint_from, ping
+
+# wiki.vg 的 VarInt 範例
+VARINTS = {
+    0: "00",
+    1: "01",
+    127: "7f",
+    128: "8001",
+    255: "ff01",
+    25565: "ddc701",
+    2097151: "ffff7f",
+    2147483647: "ffffffff07",
+    -1: "ffffffff0f",
+    -2147483648: "8080808008",
+}
+
+
+class VarIntTest(unittest.TestCase):
+    def test_known_encodings(self):
+        for value, encoded in VARINTS.items():
+            self.assertEqual(_pack_varint(value).hex(), encoded, value)
+
+    def test_decode_round_trip(self):
+        for value, encoded in VARINTS.items():
+            data = b"\xaa" + bytes.fromhex(encoded) + b"\xbb"
+            decoded, pos = _varint_from(data, 1)
+            # 解碼結果為 32-bit 無號數
+            self.assertEqual(decoded, value & 0xFFFFFFFF)
+            self.assertEqual(data[pos], 0xBB)
+
+    def test_too_long(self):
+        with self.assertRaises(ValueError):
+            _varint_from(b"\xff" * 6, 0)
+
+
+class PacketTest(unittest.TestCase):
+    def test_packet_framing(self):
+        payload = _pack_string("localhost")
+        packet = _packet(0x00, payload)
+        length, pos = _varint_from(packet, 0)
+        self.assertEqual(length, len(packet) - pos)
+        packet_id, pos = _varint_from(packet, pos)
+        self.assertEqual(packet_id, 0)
+        str_len, pos = _varint_from(packet, pos)
+        self.assertEqual(packet[pos:pos + str_len], b"localhost")
+
+    def test_string_length_is_utf8_bytes(self):
+        self.assertEqual(_pack_string("伺服器")[0], 9)
+
+    def test_flatten_motd(self):
+        self.assertEqual(_flatten_motd("plain"), "plain")
+        self.assertEqual(_flatten_motd({"text": "A", "extra": [{"text": "B", "extra": ["C"]}, "D"]}), "ABCD")
+        self.assertEqual(_flatten_motd(None), "")
+
+
+class PingTest(unittest.TestCase):
+    def setUp(self):
+        self.sock = socket.socket()
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen(8)
+        self.port = self.sock.getsockname()[1]
+        threading.Thread(target=serve, args=(self.sock, "Fake motd"), daemon=True).start()
+
+    def tearDown(self):
+        self.sock.close()
+
+    def test_ping_online(self):
+        result = asyncio.run(ping("127.0.0.1", self.port, timeout=5))
+        self.assertTrue(result["online"])
+        self.assertEqual((result["players"], result["max_players"], result["motd"]), (0, 20, "Fake motd"))
+        self.assertIsNotNone(result["latency_ms"])
+
+    def test_ping_offline(self):
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            closed = s.getsockname()[1]
+        self.assertFalse(asyncio.run(ping("127.0.0.1", closed, timeout=1))["online"])
+
+    def test_poller_drains_only_changes(self):
+        poller = StatusPoller(lambda: {"Paper 1": self.port}, timeout=5)
+        poller.poll_once()
+        self.assertEqual(list(poller.drain()), ["Paper 1"])
+        poller.poll_once()
+        # 只有 latency 變動不算變化
+        self.assertEqual(poller.drain(), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
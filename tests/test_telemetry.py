@@ -0,0 +1,66 @@
+import os
+import unittest
+
+from gui.telemetry import HAS_PROC, RingSeries, process_tree, sample_tree
+
+
+def _values(i):
+    return {"cpu_percent": float(i), "rss_bytes": i * 1024, "threads": i, "open_fds": i + 1}
+
+
+class RingSeriesTest(unittest.TestCase):
+    def test_empty(self):
+        series = RingSeries(4)
+        self.assertIsNone(series.latest())
+        self.assertIsNone(series.stats("cpu_percent"))
+        self.assertEqual(list(series.rows()), [])
+
+    def test_partial_fill_keeps_order(self):
+        series = RingSeries(4)
+        for i in range(1, 3):
+            series.append(float(i), _values(i))
+        self.assertEqual([t for t, _ in series.rows()], [1.0, 2.0])
+        self.assertEqual(series.latest()["threads"], 2)
+
+    def test_wraps_and_keeps_most_recent(self):
+        series = RingSeries(4)
+        for i in range(1, 11):
+            series.append(float(i), _values(i))
+        self.assertEqual(series.count, 4)
+        self.assertEqual([t for t, _ in series.rows()], [7.0, 8.0, 9.0, 10.0])
+        latest = series.latest()
+        self.assertEqual((latest["timestamp"], latest["rss_bytes"], latest["open_fds"]), (10.0, 10240, 11))
+
+    def test_stats_window(self):
+        series = RingSeries(4)
+        for i in range(1, 11):
+            series.append(float(i), _values(i))
+        self.assertEqual(series.stats("threads"), {"min": 7, "avg": 8.5, "max": 10})
+        self.assertEqual(series.stats("threads", window=2), {"min": 9, "avg": 9.5, "max": 10})
+        # window 大於資料量時只用現有資料
+        self.assertEqual(series.stats("threads", window=100)["min"], 7)
+
+    def test_fixed_memory(self):
+        series = RingSeries(8)
+        sizes = [len(c) for c in series.columns.values()]
+        for i in range(1000):
+            series.append(float(i), _values(i))
+        self.assertEqual([len(c) for c in series.columns.values()], sizes)
+        self.assertEqual(len(series.timestamps), 8)
+
+
+@unittest.skipUnless(HAS_PROC, "需要 /proc")
+class ProcSamplingTest(unittest.TestCase):
+    def test_sample_own_process(self):
+        self.assertIn(os.getpid(), process_tree(os.getpid()))
+        ticks, threads, rss, fds = sample_tree(os.getpid())
+        self.assertGreaterEqual(threads, 1)
+        self.assertGreater(rss, 0)
+        self.assertGreater(fds, 0)
+
+    def test_missing_process(self):
+        self.assertIsNone(sample_tree(2 ** 22 + 12345))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import threading
+import time
+import unittest
+from collections import deque
+from unittest import mock
+
+from gui import controller
+from gui.controller import Watchdog
+
+
+class _Proc:
+    pid = 4242
+
+    def poll(self):
+        return None
+
+
+class HangTest(unittest.TestCase):
+    def setUp(self):
+        self.proc = _Proc()
+        ready = threading.Event()
+        ready.set()
+        info = {
+            "script_path": "/nonexistent/start.sh",
+            "started_at": time.time() - 60,
+            "last_output": time.monotonic() - 60,
+            "output": deque(),
+            "ready": ready,
+            "stopping": False,
+        }
+        for target, value in (("server_processes", {"Paper 1": self.proc}), ("server_info", {"Paper 1": info})):
+            p = mock.patch.object(controller, target, value)
+            p.start()
+            self.addCleanup(p.stop)
+        self.info = info
+        self.logs = []
+        self.watchdog = Watchdog(lambda name: False, lambda name: (True, ""), log=self.logs.append,
+                                 hang_timeout=1)
+
+    def test_hang_killed_when_enabled(self):
+        with mock.patch.object(controller, "_kill") as kill:
+            self.watchdog._check_hangs()
+        kill.assert_called_once_with(self.proc)
+        self.assertTrue(self.info["hung"])
+        self.assertTrue(self.watchdog.stats("Paper 1")["restart_pending"])
+        self.assertTrue(any("自動重啟" in msg for msg in self.logs))
+
+    def test_hang_only_warned_when_disabled(self):
+        self.watchdog.enabled = False
+        with mock.patch.object(controller, "_kill") as kill:
+            self.watchdog._check_hangs()
+            self.watchdog._check_hangs()
+        kill.assert_not_called()
+        self.assertTrue(self.info["hung"])
+        stats = self.watchdog.stats("Paper 1")
+        self.assertEqual(stats["hangs"], 1)
+        self.assertFalse(stats["restart_pending"])
+        self.assertEqual(len([msg for msg in self.logs if "Paper 1" in msg]), 1)
+
+    def test_recovery_clears_hung(self):
+        self.watchdog.enabled = False
+        with mock.patch.object(controller, "_kill"):
+            self.watchdog._check_hangs()
+            self.info["last_output"] = time.monotonic()
+            self.watchdog._check_hangs()
+        self.assertFalse(self.info["hung"])
+
+
+if __name__ == "__main__":
+    unittest.main()